@@ -8,7 +8,11 @@ class CatalogConfig(AppConfig):
     def ready(self):
         # load key modules in proper order, make sure class inject and signal works as expected
         from catalog import apis, models, sites  # noqa
-        from catalog.models import init_catalog_audit_log, init_catalog_search_models
+        from catalog.models import (
+            init_catalog_audit_log,
+            init_catalog_search_models,
+            init_item_page_cache,
+        )
         from journal import models as journal_models  # noqa
 
         # register cron jobs
@@ -16,3 +20,4 @@ class CatalogConfig(AppConfig):
 
         init_catalog_search_models()
         init_catalog_audit_log()
+        init_item_page_cache()
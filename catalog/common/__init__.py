@@ -28,6 +28,10 @@ __all__ = (  # noqa
     "ProxiedDownloader",
     "BasicImageDownloader",
     "ProxiedImageDownloader",
+    "download_concurrently",
+    "get_async_client",
+    "get_async_loop",
+    "cookie_scope",
     "RESPONSE_OK",
     "RESPONSE_NETWORK_ERROR",
     "RESPONSE_INVALID_CONTENT",
@@ -1,6 +1,13 @@
+import asyncio
+import contextvars
 import json
+import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.cookiejar import CookieJar
 from io import BytesIO, StringIO
 from pathlib import Path
 from typing import Tuple, cast
@@ -15,8 +22,12 @@ from loguru import logger
 from lxml import etree, html
 from PIL import Image
 from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
 from requests.exceptions import RequestException
 
+from .ratelimit import acquire, backoff, get_limiter_key
+
 RESPONSE_OK = 0  # response is ready for pasring
 RESPONSE_INVALID_CONTENT = -1  # content not valid but no need to retry
 RESPONSE_NETWORK_ERROR = -2  # network error, retry next proxied url
@@ -25,6 +36,54 @@ RESPONSE_QUOTA_EXCEEDED = -4
 
 _mock_mode = False
 
+_async_loop: asyncio.AbstractEventLoop | None = None
+_async_client: httpx.AsyncClient | None = None
+_async_pid = 0
+_async_lock = threading.Lock()
+
+_POOL_SIZE_PER_HOST = 10
+_session: requests.Session | None = None
+_client: httpx.Client | None = None
+_pool_pid = 0
+_pool_lock = threading.Lock()
+_request_cookies: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "request_cookies", default=None
+)
+
+
+class _ScopedCookiesMixin:
+    """
+    cookies of pooled clients are only kept within cookie_scope(), e.g. across redirects
+    of one download, so that they don't leak between downloads of different sites.
+    """
+
+    @property
+    def _cookies(self) -> dict:
+        cookies = _request_cookies.get()
+        return {} if cookies is None else cookies
+
+    @_cookies.setter
+    def _cookies(self, value):
+        pass
+
+
+class _ScopedCookieJar(_ScopedCookiesMixin, CookieJar):
+    pass
+
+
+class _ScopedRequestsCookieJar(_ScopedCookiesMixin, RequestsCookieJar):
+    pass
+
+
+@contextmanager
+def cookie_scope():
+    """keep cookies set by responses of pooled clients until leaving this scope"""
+    token = _request_cookies.set({})
+    try:
+        yield
+    finally:
+        _request_cookies.reset(token)
+
 
 def use_local_response(func):
     def _func(args):
@@ -59,6 +118,86 @@ _local_response_path = (
 )
 
 
+def get_async_loop() -> asyncio.AbstractEventLoop:
+    """
+    long-lived event loop running in a daemon thread of current process
+
+    coroutines using get_async_client() must run in this loop, e.g. with
+    asyncio.run_coroutine_threadsafe(), so that connections are reused across requests.
+    """
+    global _async_loop, _async_client, _async_pid
+    with _async_lock:
+        if _async_loop is None or _async_pid != os.getpid():
+            # the loop thread does not survive fork, e.g. in rq work horse
+            _async_loop = asyncio.new_event_loop()
+            _async_client = None
+            _async_pid = os.getpid()
+            threading.Thread(
+                target=_async_loop.run_forever, name="async-http", daemon=True
+            ).start()
+        return _async_loop
+
+
+def _httpx_client_args() -> dict:
+    args = {
+        "limits": httpx.Limits(
+            max_connections=100, max_keepalive_connections=50, keepalive_expiry=60
+        ),
+        "cookies": _ScopedCookieJar(),
+    }
+    if settings.DOWNLOADER_HTTP2:
+        try:
+            import h2  # noqa: F401
+
+            args["http2"] = True
+        except ImportError:
+            logger.warning("HTTP/2 disabled, install httpx[http2] to enable it")
+    return args
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """shared connection-pooled client, only to be used in coroutines running in get_async_loop()"""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(**_httpx_client_args())
+    return _async_client
+
+
+def _check_pool_pid():
+    global _session, _client, _pool_pid
+    if _pool_pid != os.getpid():
+        # pooled connections must not be shared with forked processes
+        _session = None
+        _client = None
+        _pool_pid = os.getpid()
+
+
+def get_session() -> requests.Session:
+    """per-process requests session with keep-alive connection pool for each host"""
+    global _session
+    with _pool_lock:
+        _check_pool_pid()
+        if _session is None:
+            _session = requests.Session()
+            _session.cookies = _ScopedRequestsCookieJar()
+            adapter = HTTPAdapter(
+                pool_connections=100, pool_maxsize=_POOL_SIZE_PER_HOST
+            )
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def get_client() -> httpx.Client:
+    """per-process httpx client with keep-alive connection pool, and HTTP/2 if enabled"""
+    global _client
+    with _pool_lock:
+        _check_pool_pid()
+        if _client is None:
+            _client = httpx.Client(**_httpx_client_args())
+        return _client
+
+
 class MockResponse:
     def __init__(self, url):
         self.url = url
@@ -177,15 +316,28 @@ class BasicDownloader:
         else:
             return RESPONSE_INVALID_CONTENT
 
+    def _throttled(self, url):
+        self.logs.append(
+            {"response_type": RESPONSE_QUOTA_EXCEEDED, "url": url, "exception": None}
+        )
+        return None, RESPONSE_QUOTA_EXCEEDED
+
     def _download(
         self, url
     ) -> Tuple[DownloaderResponse | DownloaderResponse2 | MockResponse | None, int]:
         try:
+            limiter_key = None
             if not _mock_mode:
-                resp = cast(
-                    DownloaderResponse,
-                    requests.get(url, headers=self.headers, timeout=self.timeout),
-                )
+                limiter_key = get_limiter_key(self.url)
+                if not acquire(limiter_key):
+                    return self._throttled(url)
+                with cookie_scope():
+                    resp = cast(
+                        DownloaderResponse,
+                        get_session().get(
+                            url, headers=self.headers, timeout=self.timeout
+                        ),
+                    )
                 resp.__class__ = DownloaderResponse
                 if settings.DOWNLOADER_SAVEDIR:
                     try:
@@ -200,6 +352,11 @@ class BasicDownloader:
             else:
                 resp = MockResponse(self.url)
             response_type = self.validate_response(resp)
+            if limiter_key and response_type in [
+                RESPONSE_QUOTA_EXCEEDED,
+                RESPONSE_CENSORSHIP,
+            ]:
+                backoff(limiter_key, resp.headers.get("Retry-After"))
             self.logs.append(
                 {"response_type": response_type, "url": url, "exception": None}
             )
@@ -222,11 +379,18 @@ class BasicDownloader:
 class BasicDownloader2(BasicDownloader):
     def _download(self, url):
         try:
+            limiter_key = None
             if not _mock_mode:
-                resp = cast(
-                    DownloaderResponse2,
-                    httpx.get(url, headers=self.headers, timeout=self.timeout),
-                )
+                limiter_key = get_limiter_key(self.url)
+                if not acquire(limiter_key):
+                    return self._throttled(url)
+                with cookie_scope():
+                    resp = cast(
+                        DownloaderResponse2,
+                        get_client().get(
+                            url, headers=self.headers, timeout=self.timeout
+                        ),
+                    )
                 resp.__class__ = DownloaderResponse2
                 if settings.DOWNLOADER_SAVEDIR:
                     try:
@@ -241,6 +405,11 @@ class BasicDownloader2(BasicDownloader):
             else:
                 resp = MockResponse(self.url)
             response_type = self.validate_response(resp)
+            if limiter_key and response_type in [
+                RESPONSE_QUOTA_EXCEEDED,
+                RESPONSE_CENSORSHIP,
+            ]:
+                backoff(limiter_key, resp.headers.get("Retry-After"))
             self.logs.append(
                 {"response_type": response_type, "url": url, "exception": None}
             )
@@ -331,6 +500,26 @@ class CachedDownloader(BasicDownloader):
         return resp
 
 
+def download_concurrently(
+    downloaders: list[BasicDownloader], max_workers: int = 4
+) -> list:
+    """
+    download with a few downloaders in parallel, return responses in the same order
+
+    the first DownloadError is raised after all downloads are finished;
+    rate limits to the site apply as if they were downloaded one by one.
+    """
+    if len(downloaders) < 2 or max_workers < 2:
+        return [d.download() for d in downloaders]
+    with ThreadPoolExecutor(min(max_workers, len(downloaders))) as executor:
+        # context is copied so that requests are attributed to current site
+        futures = [
+            executor.submit(contextvars.copy_context().run, d.download)
+            for d in downloaders
+        ]
+    return [f.result() for f in futures]
+
+
 class ImageDownloaderMixin:
     def __init__(self, url, referer=None):
         self.extention = None
@@ -1,12 +1,14 @@
 import re
+import time
 import uuid
 from functools import cached_property
-from typing import TYPE_CHECKING, Any, Self
+from typing import TYPE_CHECKING, Any, Iterable, Self
 
 from auditlog.context import disable_auditlog
 from auditlog.models import LogEntry
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.signing import b62_decode, b62_encode
 from django.db import connection, models
@@ -342,6 +344,11 @@ def LanguageListField():
     )
 
 
+# seconds to keep rendered fragments of item page, see item_base.html
+ITEM_PAGE_CACHE_TTL = 3600
+_PAGE_CACHE_VERSION_KEY = "item_page_ver:"
+
+
 class Item(PolymorphicModel):
     if TYPE_CHECKING:
         external_resources: QuerySet["ExternalResource"]
@@ -661,15 +668,48 @@ class Item(PolymorphicModel):
             titles += self.parent_item.to_indexable_titles()
         return list(set(titles))
 
-    @classmethod
-    def get_by_url(cls, url_or_b62: str, resolve_merge=False) -> "Self | None":
+    @staticmethod
+    def _url_to_uid(url_or_b62: str):
         b62 = url_or_b62.strip().split("/")[-1]
         if len(b62) not in [21, 22]:
             r = re.search(r"[A-Za-z0-9]{21,22}", url_or_b62)
             if r:
                 b62 = r[0]
+        return uuid.UUID(int=b62_decode(b62))
+
+    @classmethod
+    def get_by_urls(cls, urls: Iterable[str], resolve_merge=False) -> "dict[str, Self]":
+        """find items for a list of urls in batch, keyed by url; not found ones are omitted"""
+        uids = {}
+        for url in urls:
+            try:
+                uids[url] = cls._url_to_uid(url)
+            except Exception:
+                pass
+        by_uid = {i.uid: i for i in cls.objects.filter(uid__in=set(uids.values()))}
+        if resolve_merge:
+            for _ in range(5):
+                merged = {
+                    i.merged_to_item_id for i in by_uid.values() if i.merged_to_item_id
+                }
+                if not merged:
+                    break
+                targets = cls.objects.in_bulk(merged)
+                by_uid = {
+                    k: targets.get(i.merged_to_item_id) if i.merged_to_item_id else i
+                    for k, i in by_uid.items()
+                }
+                by_uid = {k: i for k, i in by_uid.items() if i}
+            looped = {k for k, i in by_uid.items() if i.merged_to_item_id}
+            if looped:
+                logger.error(f"resolve merge loop for {len(looped)} items")
+                by_uid = {k: i for k, i in by_uid.items() if k not in looped}
+        return {url: by_uid[uid] for url, uid in uids.items() if uid in by_uid}
+
+    @classmethod
+    def get_by_url(cls, url_or_b62: str, resolve_merge=False) -> "Self | None":
         try:
-            item = cls.objects.get(uid=uuid.UUID(int=b62_decode(b62)))
+            item = cls.objects.get(uid=cls._url_to_uid(url_or_b62))
             if resolve_merge:
                 resolve_cnt = 5
                 while item.merged_to_item and resolve_cnt > 0:
@@ -794,6 +834,57 @@ class Item(PolymorphicModel):
 
         return TagManager.indexable_tags_for_item(self)
 
+    @cached_property
+    def page_cache_version(self) -> int:
+        """cached fragments of item page are re-rendered when this changes"""
+        return cache.get(_PAGE_CACHE_VERSION_KEY + str(self.pk)) or 0
+
+    @staticmethod
+    def bump_page_cache_version(item_ids: Iterable[int | None]):
+        """invalidate cached fragments of item pages, e.g. when item or its rating/tags/collections changed"""
+        v = time.time_ns()
+        versions = {_PAGE_CACHE_VERSION_KEY + str(i): v for i in item_ids if i}
+        if versions:
+            # version must outlive the fragments using it
+            cache.set_many(versions, timeout=ITEM_PAGE_CACHE_TTL * 2)
+
+    @staticmethod
+    def prefetch_rating_info(items: "list[Item]"):
+        """load rating info for a list of items in batch, to avoid query per item"""
+        from journal.models import Rating
+
+        infos = Rating.get_info_for_items(items)
+        for i in items:
+            i.__dict__["rating_info"] = infos[i.pk]
+
+    @staticmethod
+    def prefetch_tags(items: "list[Item]"):
+        """load indexable tags for a list of items in batch, to avoid query per item"""
+        from journal.models import TagManager
+
+        tags = TagManager.indexable_tags_for_items(items)
+        for i in items:
+            i.__dict__["tags"] = tags[i.pk]
+
+    @staticmethod
+    def prefetch_parent_items(items: "list[Item]"):
+        """load parent items (and their parents) for a list of items in batch, to avoid query per item"""
+        while items:
+            by_class: dict[type[Item], list[Item]] = {}
+            for i in items:
+                by_class.setdefault(i.__class__, []).append(i)
+            items = []
+            for cls, objs in by_class.items():
+                # parent is the only foreign key to a subclass of Item, e.g. TVSeason.show
+                for f in cls._meta.concrete_fields:
+                    if (
+                        f.many_to_one
+                        and f.related_model is not Item
+                        and issubclass(f.related_model, Item)  # type:ignore
+                    ):
+                        models.prefetch_related_objects(objs, f.name)
+                        items += [o.parent_item for o in objs if o.parent_item]
+
     def journal_exists(self):
         from journal.models import journal_exists_for_item
 
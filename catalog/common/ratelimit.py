@@ -0,0 +1,136 @@
+"""
+Per-site rate limiting for downloaders
+
+Requests made by downloaders are throttled with a token bucket in Redis, shared by
+all workers, so that adding fetch/crawl workers won't get us banned by upstream sites.
+
+Rates are configured per SiteName in settings.DOWNLOADER_RATE_LIMITS, e.g.
+`douban=0.5,imdb=2,*=5` (requests per second, `*` for any other site); a site
+without rate configured is not throttled, until it responds with 429 or
+censorship, then requests to it are paused for a while, and the pause doubles
+each time it happens again within a short period.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from loguru import logger
+
+_current_site: ContextVar[str | None] = ContextVar("ratelimit_site", default=None)
+
+_BUCKET_KEY = "ratelimit:"
+_PAUSE_KEY = "ratelimit_pause:"
+_BACKOFF_KEY = "ratelimit_backoff:"
+_BACKOFF_BASE = 2  # seconds to pause after the first 429
+_BACKOFF_MAX = 600
+_BACKOFF_RESET = 1800  # forget previous 429s after this many seconds
+
+# returns seconds to wait before next token is available, and consume it if ready
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+_token_bucket = None
+
+
+def _get_rates() -> dict[str, float]:
+    rates = {}
+    for s in settings.DOWNLOADER_RATE_LIMITS:
+        name, _, rate = s.partition("=")
+        try:
+            rates[name.strip()] = float(rate)
+        except ValueError:
+            logger.warning(f"invalid rate limit setting: {s}")
+    return rates
+
+
+def get_rate(name: str) -> float:
+    rates = _get_rates()
+    return rates.get(name, rates.get("*", 0))
+
+
+@contextmanager
+def rate_limited_site(site_name: str):
+    """attribute downloads in this context to the site, instead of the host of url"""
+    token = _current_site.set(site_name)
+    try:
+        yield
+    finally:
+        _current_site.reset(token)
+
+
+def get_limiter_key(url: str) -> str:
+    return _current_site.get() or urlparse(url).hostname or ""
+
+
+def _wait_time(name: str, rate: float) -> float:
+    global _token_bucket
+    r = get_redis_connection("default")
+    pause = r.pttl(_PAUSE_KEY + name)
+    if pause > 0:
+        return pause / 1000
+    if rate <= 0:
+        return 0
+    if _token_bucket is None:
+        _token_bucket = r.register_script(_TOKEN_BUCKET_LUA)
+    return float(_token_bucket(keys=[_BUCKET_KEY + name], args=[rate, max(rate, 1)]))
+
+
+def acquire(name: str, max_wait: float | None = None) -> bool:
+    """
+    block till a request to the site is allowed, return False if not possible within max_wait seconds
+    """
+    if not name:
+        return True
+    if max_wait is None:
+        max_wait = settings.DOWNLOADER_RATE_LIMIT_MAX_WAIT
+    deadline = time.monotonic() + max_wait
+    rate = get_rate(name)
+    while True:
+        try:
+            wait = _wait_time(name, rate)
+        except Exception as e:
+            logger.warning(f"rate limiter unavailable: {e}")
+            return True
+        if wait <= 0:
+            return True
+        if time.monotonic() + wait > deadline:
+            logger.warning(f"rate limit for {name} exceeded, wait {wait:.1f}s")
+            return False
+        time.sleep(wait)
+
+
+def backoff(name: str, retry_after: str | None = None):
+    """pause requests to the site after it responded with 429 or censorship"""
+    if not name:
+        return
+    try:
+        r = get_redis_connection("default")
+        level = r.incr(_BACKOFF_KEY + name)
+        r.expire(_BACKOFF_KEY + name, _BACKOFF_RESET)
+        pause = min(_BACKOFF_BASE * 2 ** (level - 1), _BACKOFF_MAX)
+        if retry_after and retry_after.isdigit():
+            pause = max(pause, min(int(retry_after), _BACKOFF_MAX))
+        r.set(_PAUSE_KEY + name, 1, px=int(pause * 1000))
+        logger.warning(f"requests to {name} paused for {pause}s")
+    except Exception as e:
+        logger.warning(f"rate limiter unavailable: {e}")
@@ -10,6 +10,7 @@ ResourceContent persists as an ExternalResource which may link to an Item
 import json
 import re
 from dataclasses import dataclass, field
+from functools import lru_cache
 from hashlib import md5
 from typing import TYPE_CHECKING, Type, TypeVar
 
@@ -21,6 +22,7 @@ from loguru import logger
 from validators import url as url_validate
 
 from .models import ExternalResource, IdealIdTypes, IdType, Item, SiteName
+from .ratelimit import rate_limited_site
 
 if TYPE_CHECKING:
     from ..search.models import ExternalSearchResultItem
@@ -252,7 +254,8 @@ class AbstractSite:
             elif isinstance(preloaded_content, dict):
                 resource_content = ResourceContent(**preloaded_content)
             else:
-                resource_content = self.scrape()
+                with rate_limited_site(self.SITE_NAME.value):
+                    resource_content = self.scrape()
             if resource_content:
                 p.update_content(resource_content)
         if not p.ready:
@@ -266,7 +269,8 @@ class AbstractSite:
                 p.item.merge_data_from_external_resources(ignore_existing_content)
                 p.item.ap_object  # validate
                 p.item.save()
-                self.scrape_additional_data()
+                with rate_limited_site(self.SITE_NAME.value):
+                    self.scrape_additional_data()
         if auto_link:
             for linked_resource in p.required_resources:
                 linked_url = linked_resource.get("url")
@@ -289,9 +293,82 @@ class AbstractSite:
 
 T = TypeVar("T", bound=AbstractSite)
 
+_PATTERN_HOST = re.compile(r"^\^?(?:\\w\+|https?)://((?:[a-zA-Z0-9\-]|\\?\.)+)/")
+_URL_HOST = re.compile(r"^\w+://([^/?#]+)")
+
+
+class _UrlRouter:
+    """
+    Precompiled index to find the site for a url without trying every site in turn
+
+    URL_PATTERNS with a literal host are indexed by that host; patterns to try for
+    a host (its own ones plus those without a literal host) are combined into one
+    regex, keeping the order of site registration. Sites overriding validate_url()
+    are called as is, at their place in that order.
+    """
+
+    def __init__(self, sites: list[Type[AbstractSite]]):
+        self.routes_by_host: dict[str, list] = {}
+        by_host: dict[str, list] = {}
+        wildcard: list = []
+        for i, site in enumerate(sites):
+            if site.validate_url.__func__ is not AbstractSite.validate_url.__func__:  # type:ignore
+                wildcard.append((i, site, None))
+                continue
+            for pattern in site.URL_PATTERNS:
+                m = _PATTERN_HOST.match(pattern)
+                if m:
+                    host = m[1].replace("\\.", ".")
+                    by_host.setdefault(host, []).append((i, site, pattern))
+                else:
+                    wildcard.append((i, site, pattern))
+        self.wildcard_routes = self._compile(wildcard)
+        for host, entries in by_host.items():
+            entries = sorted(entries + wildcard, key=lambda e: e[0])
+            self.routes_by_host[host] = self._compile(entries)
+
+    @staticmethod
+    def _compile(entries: list) -> list:
+        """combine consecutive patterns into one regex, return list of (regex, sites) or (None, site)"""
+        routes = []
+        patterns = []
+        sites = {}
+
+        def flush():
+            if patterns:
+                routes.append((re.compile("|".join(patterns)), dict(sites)))
+                patterns.clear()
+                sites.clear()
+
+        for _, site, pattern in entries:
+            if pattern is None:
+                flush()
+                routes.append((None, site))
+            else:
+                name = f"_{len(patterns)}"
+                patterns.append(f"(?P<{name}>{pattern})")
+                sites[name] = site
+        flush()
+        return routes
+
+    def match(self, url: str) -> Type[AbstractSite] | None:
+        h = _URL_HOST.match(url)
+        routes = self.routes_by_host.get(h[1]) if h else None
+        for regex, target in self.wildcard_routes if routes is None else routes:
+            if regex is None:
+                if target.validate_url(url):
+                    return target
+                continue
+            m = regex.match(url)
+            if m:
+                # outermost group of the matching alternative is closed last
+                return target[m.lastgroup]
+        return None
+
 
 class SiteManager:
     registry = {}
+    _router: _UrlRouter | None = None
 
     @staticmethod
     def register(target: Type[T]) -> Type[T]:
@@ -299,6 +376,8 @@ class SiteManager:
         if id_type in SiteManager.registry:
             raise ValueError(f"Site for {id_type} already exists")
         SiteManager.registry[id_type] = target
+        SiteManager._router = None
+        _get_class_by_url.cache_clear()
         return target
 
     @staticmethod
@@ -326,25 +405,47 @@ class SiteManager:
         cache.set(k, u if u != url else "", 3600)
         return u
 
+    @staticmethod
+    def get_router() -> _UrlRouter:
+        if SiteManager._router is None:
+            SiteManager._router = _UrlRouter(list(SiteManager.registry.values()))
+        return SiteManager._router
+
     @staticmethod
     def get_class_by_url(url: str) -> Type[AbstractSite] | None:
-        return next(
-            filter(lambda p: p.validate_url(url), SiteManager.registry.values()), None
-        )
+        """find site by URL_PATTERNS, this never makes network requests"""
+        return _get_class_by_url(url)
 
     @staticmethod
     def get_fallback_class_by_url(url: str) -> Type[AbstractSite] | None:
+        """find site by validate_url_fallback(), which may download the url"""
         return next(
             filter(
-                lambda p: p.validate_url_fallback(url), SiteManager.registry.values()
+                lambda p: p.validate_url_fallback(url),
+                SiteManager.get_fallback_sites(),
             ),
             None,
         )
 
+    @staticmethod
+    def get_fallback_sites() -> list[Type[AbstractSite]]:
+        return [
+            p
+            for p in SiteManager.registry.values()
+            if p.validate_url_fallback.__func__  # type:ignore
+            is not AbstractSite.validate_url_fallback.__func__  # type:ignore
+        ]
+
     @staticmethod
     def get_site_by_url(
-        url: str, detect_redirection: bool = True
+        url: str, detect_redirection: bool = True, detect_fallback: bool = True
     ) -> AbstractSite | None:
+        """
+        find site for the url
+
+        detect_redirection: send HEAD request to follow redirection
+        detect_fallback: try sites like RSS or Fediverse which may download the url
+        """
         if not url or not url_validate(
             url,
             skip_ipv6_addr=True,
@@ -355,11 +456,11 @@ class SiteManager:
             return None
         u = SiteManager.get_redirected_url(url, allow_head=detect_redirection)
         cls = SiteManager.get_class_by_url(u)
-        if cls is None:
+        if cls is None and detect_fallback:
             cls = SiteManager.get_fallback_class_by_url(u)
         if cls is None and u != url:
             cls = SiteManager.get_class_by_url(url)
-            if cls is None:
+            if cls is None and detect_fallback:
                 cls = SiteManager.get_fallback_class_by_url(url)
             if cls:
                 u = url
@@ -387,6 +488,11 @@ class SiteManager:
         return [ss[s] for s in settings.SEARCH_SITES if s in ss]
 
 
+@lru_cache(maxsize=4096)
+def _get_class_by_url(url: str) -> Type[AbstractSite] | None:
+    return SiteManager.get_router().match(url)
+
+
 def crawl_related_resources_task(resource_pk):
     resource = ExternalResource.objects.filter(pk=resource_pk).first()
     if not resource:
@@ -1,10 +1,34 @@
-from django.test import TestCase
+import asyncio
+import time
+import uuid
+from unittest.mock import patch
 
+import httpx
+from django.test import TestCase, override_settings
+
+from catalog.common import SiteManager, cookie_scope, get_async_loop
+from catalog.common.downloaders import (
+    BasicDownloader,
+    _httpx_client_args,
+    download_concurrently,
+    get_client,
+    get_session,
+)
+from catalog.common.ratelimit import (
+    acquire,
+    backoff,
+    get_limiter_key,
+    rate_limited_site,
+)
+from catalog.search.external import ExternalSources
+from catalog.search.models import ExternalSearchResultItem
+from catalog.search.typesense import Indexer
 from common.models import (
     SITE_PREFERRED_LANGUAGES,
     SITE_PREFERRED_LOCALES,
     detect_language,
 )
+from common.templatetags.highlight import highlight
 
 
 class CommonTestCase(TestCase):
@@ -17,7 +41,172 @@ class CommonTestCase(TestCase):
         self.assertEqual(lang, "zh-cn")
         lang = detect_language("巫师3：狂猎 The Witcher 3: Wild Hunt")
         self.assertEqual(lang, "zh-cn")
+        lang = detect_language("巫師3：狂獵")
+        self.assertEqual(lang, "zh-tw")
+        lang = detect_language("The Witcher 3\n巫師3：狂獵")
+        self.assertEqual(lang, "zh-tw")
+        s = "Geralt of Rivia, a monster slayer for hire, is on the hunt."
+        self.assertEqual(len({detect_language(s + "!" * i) for i in range(5)}), 1)
+
+    def test_pooled_clients(self):
+        self.assertIs(get_session(), get_session())
+        self.assertIs(get_client(), get_client())
+
+    def test_scoped_cookies(self):
+        def handler(request: httpx.Request):
+            if request.url.path == "/login":
+                return httpx.Response(
+                    302, headers={"Location": "/home", "Set-Cookie": "sid=1; Path=/"}
+                )
+            return httpx.Response(
+                200 if "sid=1" in request.headers.get("Cookie", "") else 403
+            )
+
+        client = httpx.Client(
+            transport=httpx.MockTransport(handler), **_httpx_client_args()
+        )
+        with cookie_scope():
+            r = client.get("https://a.example/login", follow_redirects=True)
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(client.cookies.get("sid"), "1")
+        self.assertIsNone(client.cookies.get("sid"))
+        self.assertEqual(client.get("https://a.example/home").status_code, 403)
+        session = get_session()
+        with cookie_scope():
+            session.cookies.set("sid", "1", domain="a.example")
+            self.assertEqual(len(session.cookies), 1)
+        self.assertEqual(len(session.cookies), 0)
+
+    def test_highlight(self):
+        self.assertEqual(
+            highlight("The Witcher 3: Wild Hunt", "witch  wild witcher"),
+            "The <mark>Witcher</mark> 3: <mark>Wild</mark> Hunt",
+        )
+        self.assertEqual(
+            highlight("<b>Tom & Jerry</b>", "tom b"),
+            "&lt;<mark>b</mark>&gt;<mark>Tom</mark> &amp; Jerry&lt;/<mark>b</mark>&gt;",
+        )
+        self.assertEqual(highlight("a+b", "a+b"), "<mark>a+b</mark>")
+        self.assertEqual(highlight("巫师3：狂猎", " "), "巫师3：狂猎")
+        self.assertEqual(
+            Indexer.get_matched_tokens(
+                {
+                    "highlights": [
+                        {"field": "localized_title", "matched_tokens": [["Hunt"]]},
+                        {"field": "orig_title", "matched_tokens": ["Wild"]},
+                        {"field": "director", "matched_tokens": ["Tomasz"]},
+                    ]
+                },
+                "title",
+            ),
+            ["Hunt", "Wild"],
+        )
 
     def test_lang_list(self):
         self.assertGreaterEqual(len(SITE_PREFERRED_LANGUAGES), 1)
         self.assertGreaterEqual(len(SITE_PREFERRED_LOCALES), 1)
+
+
+class SiteRouterTestCase(TestCase):
+    def test_get_class_by_url(self):
+        sites = list(SiteManager.registry.values())
+        urls = [
+            "https://movie.douban.com/subject/3541415/",
+            "https://m.douban.com/book/subject/1089243/",
+            "https://www.douban.com/location/drama/24849279/#24849280",
+            "https://www.themoviedb.org/tv/57243-doctor-who/season/4",
+            "https://www.goodreads.com/book/show/11798823",
+            "https://podcasts.apple.com/us/podcast/id1050430296",
+            "https://example.org/feed.xml",
+            "https://example.org/about",
+        ]
+        for url in urls:
+            expected = next((s for s in sites if s.validate_url(url)), None)
+            self.assertEqual(SiteManager.get_class_by_url(url), expected)
+        self.assertIsNone(SiteManager.get_class_by_url("https://example.org/about"))
+
+    def test_no_fallback(self):
+        url = "https://example.org/some/feed"
+        with patch.object(SiteManager, "get_fallback_class_by_url") as fallback:
+            fallback.return_value = None
+            SiteManager.get_site_by_url(url, False, detect_fallback=False)
+            fallback.assert_not_called()
+            SiteManager.get_site_by_url(url, False)
+            fallback.assert_called_with(url)
+
+
+class RateLimitTestCase(TestCase):
+    def test_token_bucket(self):
+        a = "test_site_a_" + str(uuid.uuid4())
+        with override_settings(DOWNLOADER_RATE_LIMITS=[f"{a}=1"]):
+            self.assertTrue(acquire(a, 0))
+            self.assertFalse(acquire(a, 0))
+            self.assertTrue(acquire(a, 2))
+        self.assertTrue(acquire("unlimited_site", 0))
+        b = "test_site_b_" + str(uuid.uuid4())
+        self.assertTrue(acquire(b, 0))
+        backoff(b)
+        self.assertFalse(acquire(b, 0))
+
+    def test_download_concurrently(self):
+        class _Downloader(BasicDownloader):
+            def download(self):
+                time.sleep(0.1 if self.url.endswith("0") else 0)
+                return (self.url, get_limiter_key(self.url))
+
+        urls = [f"https://test/{i}" for i in range(5)]
+        with rate_limited_site("test"):
+            results = download_concurrently([_Downloader(u) for u in urls])
+        self.assertEqual(results, [(u, "test") for u in urls])
+
+
+class _TestSources(ExternalSources):
+    @classmethod
+    def get_tasks(cls, query, page, category):
+        async def fast():
+            return [ExternalSearchResultItem(None, "a", "https://a/1", "A", "", "", "")]
+
+        async def slow():
+            await asyncio.sleep(0.5)
+            return [ExternalSearchResultItem(None, "b", "https://b/1", "B", "", "", "")]
+
+        return {"a": fast(), "b": slow()}
+
+
+class ExternalSearchTestCase(TestCase):
+    def test_deadline(self):
+        async def fast():
+            return ["fast"]
+
+        async def slow():
+            await asyncio.sleep(10)
+            return ["slow"]
+
+        async def broken():
+            raise ValueError()
+
+        stats = {}
+        results = asyncio.run_coroutine_threadsafe(
+            ExternalSources._gather(
+                {"a": fast(), "b": slow(), "c": broken()}, 0.5, stats
+            ),
+            get_async_loop(),
+        ).result()
+        self.assertEqual(results, ["fast"])
+        self.assertEqual(stats["b"]["timeouts"], 1)
+        self.assertEqual(stats["c"]["errors"], 1)
+        self.assertEqual(stats["a"]["errors"] + stats["a"]["timeouts"], 0)
+
+    def test_incremental(self):
+        q = str(uuid.uuid4())
+        items, offset, done = _TestSources.search_incrementally(q)
+        self.assertFalse(done)
+        urls = [i.source_url for i in items]
+        for _ in range(20):
+            if done:
+                break
+            time.sleep(0.1)
+            items, offset, done = _TestSources.search_incrementally(q, offset=offset)
+            urls += [i.source_url for i in items]
+        self.assertTrue(done)
+        self.assertEqual(urls, ["https://a/1", "https://b/1"])
@@ -1,10 +1,15 @@
 import time
-from datetime import timedelta
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Iterable
 
 from django.conf import settings
 from django.core.cache import cache
 from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save
 from django.utils import timezone
+from django_redis import get_redis_connection
 from loguru import logger
 
 from catalog.models import *
@@ -24,6 +29,187 @@ MIN_MARKS = settings.MIN_MARKS_FOR_DISCOVER
 MAX_DAYS_FOR_PERIOD = 96
 MIN_DAYS_FOR_PERIOD = 6
 DAYS_FOR_TRENDS = 3
+DAYS_FOR_TREND_COUNT = 7
+
+
+class MarkCounter:
+    """
+    Rolling counters of marks per item, for discover to find popular items without
+    aggregating ShelfMember table
+
+    marks are counted in a Redis sorted set per category and (UTC) day, maintained
+    by ShelfMember signals; the counters are rebuilt from database once a day to
+    correct drift from changes bypassing signals, e.g. bulk updates or item merges.
+    """
+
+    KEY = "discover:marks:"
+    BUILT_KEY = "discover:marks_built"
+    REBUILD_INTERVAL = 86400
+    BATCH_SIZE = 100
+
+    @staticmethod
+    def _day(dt: datetime) -> int:
+        return int(dt.timestamp() // 86400)
+
+    @classmethod
+    def _key(cls, category: ItemCategory | str, day: int) -> str:
+        return f"{cls.KEY}{ItemCategory(category).value}:{day}"
+
+    @classmethod
+    def _expire_at(cls, day: int) -> int:
+        return (day + MAX_DAYS_FOR_PERIOD + 1) * 86400
+
+    @classmethod
+    def _today(cls) -> int:
+        return cls._day(timezone.now())
+
+    @classmethod
+    def update(cls, member: ShelfMember, delta: int, created_time=None):
+        created_time = created_time or member.created_time
+        if not created_time:
+            return
+        day = cls._day(created_time)
+        if day <= cls._today() - MAX_DAYS_FOR_PERIOD:
+            return
+        if settings.DISCOVER_SHOW_LOCAL_ONLY and not member.local:
+            return
+        try:
+            category = member.item.category
+            key = cls._key(category, day)
+            r = get_redis_connection("default")
+            with r.pipeline(transaction=False) as pipe:
+                pipe.zincrby(key, delta, member.item_id)
+                pipe.expireat(key, cls._expire_at(day))
+                pipe.execute()
+        except Exception as e:
+            logger.warning(f"unable to update mark counter: {e}")
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """recount marks in recent days from database, return number of buckets"""
+        today = cls._today()
+        qs = ShelfMember.objects.filter(
+            created_time__gt=timezone.now() - timedelta(days=MAX_DAYS_FOR_PERIOD)
+        )
+        if settings.DISCOVER_SHOW_LOCAL_ONLY:
+            qs = qs.filter(local=True)
+        categories = {ct: cls.category for cls, ct in item_content_types().items()}
+        buckets: dict[str, dict[int, int]] = {}
+        for m in (
+            qs.order_by()
+            .values(
+                "item_id",
+                "item__polymorphic_ctype_id",
+                day=TruncDate("created_time", tzinfo=dt_timezone.utc),
+            )
+            .annotate(num=Count("id"))
+            .iterator()
+        ):
+            category = categories.get(m["item__polymorphic_ctype_id"])
+            if not category:
+                continue
+            day = (m["day"] - date(1970, 1, 1)).days
+            key = cls._key(category, day)
+            buckets.setdefault(key, {})[m["item_id"]] = m["num"]
+        r = get_redis_connection("default")
+        with r.pipeline() as pipe:
+            for category in categories.values():
+                pipe.delete(
+                    *[
+                        cls._key(category, day)
+                        for day in range(today - MAX_DAYS_FOR_PERIOD, today + 1)
+                    ]
+                )
+            for key, counts in buckets.items():
+                pipe.zadd(key, counts)  # type: ignore
+                pipe.expireat(key, cls._expire_at(int(key.rsplit(":", 1)[1])))
+            pipe.set(cls.BUILT_KEY, 1, ex=cls.REBUILD_INTERVAL)
+            pipe.execute()
+        return len(buckets)
+
+    @classmethod
+    def ensure_built(cls):
+        if not get_redis_connection("default").exists(cls.BUILT_KEY):
+            n = cls.rebuild()
+            logger.info(f"Mark counters rebuilt: {n} buckets.")
+
+    @classmethod
+    def _window_key(cls, category: ItemCategory, days: int) -> str:
+        """merge counters of recent days to a temporary sorted set"""
+        today = cls._today()
+        key = f"{cls.KEY}{category.value}:last{days}"
+        r = get_redis_connection("default")
+        with r.pipeline() as pipe:
+            pipe.zunionstore(key, [cls._key(category, today - d) for d in range(days)])
+            pipe.expire(key, 600)
+            pipe.execute()
+        return key
+
+    @classmethod
+    def get_top_item_ids(
+        cls,
+        category: ItemCategory,
+        days: int,
+        min_marks: int,
+        limit: int,
+        excluding_ids: Iterable[int] = (),
+        q: Q | None = None,
+    ) -> list[int]:
+        """most marked item ids in recent days, optionally filtered by q on Item"""
+        key = cls._window_key(category, days)
+        r = get_redis_connection("default")
+        excluding = set(excluding_ids)
+        item_ids = []
+        start = 0
+        while len(item_ids) < limit:
+            batch = [
+                int(i)
+                for i in r.zrevrangebyscore(
+                    key, "+inf", min_marks, start=start, num=cls.BATCH_SIZE
+                )
+            ]
+            if not batch:
+                break
+            start += len(batch)
+            batch = [i for i in batch if i not in excluding]
+            if q is not None and batch:
+                matched = set(
+                    Item.objects.filter(pk__in=batch)
+                    .filter(q)
+                    .values_list("pk", flat=True)
+                )
+                batch = [i for i in batch if i in matched]
+            item_ids += batch
+        return item_ids[:limit]
+
+    @classmethod
+    def get_counts(
+        cls, category: ItemCategory, days: int, item_ids: list[int]
+    ) -> dict[int, int]:
+        if not item_ids:
+            return {}
+        key = cls._window_key(category, days)
+        scores = get_redis_connection("default").zmscore(key, item_ids)
+        return {i: int(s or 0) for i, s in zip(item_ids, scores)}
+
+
+def _shelfmember_post_save_handler(sender, instance: ShelfMember, created, **kwargs):
+    previous = instance.previous_created_time
+    if created:
+        MarkCounter.update(instance, 1)
+    elif previous != instance.created_time:
+        if previous:
+            MarkCounter.update(instance, -1, previous)
+        MarkCounter.update(instance, 1)
+    instance.previous_created_time = instance.created_time
+
+
+def _shelfmember_post_delete_handler(sender, instance: ShelfMember, **kwargs):
+    MarkCounter.update(instance, -1, instance.previous_created_time)
+
+
+post_save.connect(_shelfmember_post_save_handler, sender=ShelfMember)
+post_delete.connect(_shelfmember_post_delete_handler, sender=ShelfMember)
 
 
 @JobManager.register
@@ -31,30 +217,16 @@ class DiscoverGenerator(BaseJob):
     interval = timedelta(minutes=settings.DISCOVER_UPDATE_INTERVAL)
 
     def get_popular_marked_item_ids(self, category, days, exisiting_ids):
-        qs = (
-            ShelfMember.objects.filter(q_item_in_category(category))
-            .filter(created_time__gt=timezone.now() - timedelta(days=days))
-            .exclude(item_id__in=exisiting_ids)
-        )
-        if settings.DISCOVER_SHOW_LOCAL_ONLY:
-            qs = qs.filter(local=True)
+        q = None
         if settings.DISCOVER_FILTER_LANGUAGE:
-            q = None
             for loc in SITE_PREFERRED_LOCALES:
                 if q:
-                    q = q | Q(item__metadata__localized_title__contains=[{"lang": loc}])
+                    q = q | Q(metadata__localized_title__contains=[{"lang": loc}])
                 else:
-                    q = Q(item__metadata__localized_title__contains=[{"lang": loc}])
-            if q:
-                qs = qs.filter(q)
-        item_ids = [
-            m["item_id"]
-            for m in qs.values("item_id")
-            .annotate(num=Count("item_id"))
-            .filter(num__gte=MIN_MARKS)
-            .order_by("-num")[:MAX_ITEMS_PER_PERIOD]
-        ]
-        return item_ids
+                    q = Q(metadata__localized_title__contains=[{"lang": loc}])
+        return MarkCounter.get_top_item_ids(
+            category, days, MIN_MARKS, MAX_ITEMS_PER_PERIOD, exisiting_ids, q
+        )
 
     def get_popular_commented_podcast_ids(self, days, exisiting_ids):
         qs = Comment.objects.filter(q_item_in_category(ItemCategory.Podcast)).filter(
@@ -84,6 +256,7 @@ class DiscoverGenerator(BaseJob):
 
     def run(self):
         logger.info("Discover data update start.")
+        MarkCounter.ensure_built()
         local = settings.DISCOVER_SHOW_LOCAL_ONLY
         gallery_categories = [
             ItemCategory.Book,
@@ -110,7 +283,8 @@ class DiscoverGenerator(BaseJob):
                     f"Most commented podcast in last {days} days: {len(extra_ids)}"
                 )
                 item_ids = extra_ids + item_ids
-            items = [Item.objects.get(pk=i) for i in item_ids]
+            loaded = Item.objects.in_bulk(item_ids)
+            items = [loaded[i] for i in item_ids if i in loaded]
             items = [i for i in items if not i.is_deleted and not i.merged_to_item_id]
             if category == ItemCategory.TV:
                 items = self.cleanup_shows(items)
@@ -121,11 +295,8 @@ class DiscoverGenerator(BaseJob):
                     "category": category,
                 }
             )
-            for i in items:
-                i.tags
-                i.rating
-                i.rating_count
-                i.rating_distribution
+            Item.prefetch_rating_info(items)
+            Item.prefetch_tags(items)
             cache.set(key, items, timeout=None)
 
             item_ids = self.get_popular_marked_item_ids(category, DAYS_FOR_TRENDS, [])[
@@ -135,10 +306,11 @@ class DiscoverGenerator(BaseJob):
                 item_ids += self.get_popular_commented_podcast_ids(
                     DAYS_FOR_TRENDS, item_ids
                 )[:3]
+            counts = MarkCounter.get_counts(
+                category, DAYS_FOR_TREND_COUNT, list(set(item_ids))
+            )
             for i in Item.objects.filter(pk__in=set(item_ids)):
-                cnt = ShelfMember.objects.filter(
-                    item=i, created_time__gt=timezone.now() - timedelta(days=7)
-                ).count()
+                cnt = counts.get(i.pk, 0)
                 trends.append(
                     {
                         "title": i.display_title,
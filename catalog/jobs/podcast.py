@@ -1,5 +1,11 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timedelta
+from urllib.parse import urlparse
 
+from django.core.cache import cache
 from loguru import logger
 
 from catalog.common.models import IdType
@@ -7,30 +13,96 @@ from catalog.models import Podcast
 from catalog.sites import RSS
 from common.models import BaseJob, JobManager
 
+_STATE_KEY = "podcast_refresh:"
+_STATE_TIMEOUT = 86400 * 14
+_MAX_WORKERS = 16
+_MAX_WORKERS_PER_HOST = 2
+_DEFAULT_INTERVAL = 7200
+_MIN_INTERVAL = 3600
+_MAX_INTERVAL = 86400
+
 
 @JobManager.register
 class PodcastUpdater(BaseJob):
-    interval = timedelta(hours=2)
+    """
+    refresh podcast feeds which are due, in parallel
+
+    each feed is refreshed with a conditional request using validators from last
+    fetch, and next refresh is scheduled by how often the podcast publishes.
+    """
+
+    interval = timedelta(minutes=30)
+
+    @staticmethod
+    def get_refresh_interval(feed: dict) -> int:
+        published = sorted(
+            [e["published"] for e in feed.get("episodes", []) if e.get("published")],
+            reverse=True,
+        )[:10]
+        if len(published) < 2:
+            return _DEFAULT_INTERVAL
+        gap = statistics.median([a - b for a, b in zip(published, published[1:])])
+        return int(min(max(gap / 4, _MIN_INTERVAL), _MAX_INTERVAL))
 
     def run(self):
         logger.info("Podcasts update start.")
+        now = time.time()
+        podcasts = list(
+            Podcast.objects.filter(
+                is_deleted=False,
+                merged_to_item__isnull=True,
+                primary_lookup_id_type=IdType.RSS,
+                primary_lookup_id_value__isnull=False,
+            ).order_by("pk")
+        )
+        states = cache.get_many([_STATE_KEY + str(p.pk) for p in podcasts])
+        due = [
+            p
+            for p in podcasts
+            if states.get(_STATE_KEY + str(p.pk), {}).get("next", 0) <= now
+        ]
+        urls = {p.pk: RSS.id_to_url(p.primary_lookup_id_value) for p in due}
+        host_limits = {
+            urlparse(url).hostname: threading.BoundedSemaphore(_MAX_WORKERS_PER_HOST)
+            for url in urls.values()
+        }
+
+        def fetch(p: Podcast):
+            url = urls[p.pk]
+            state = states.get(_STATE_KEY + str(p.pk), {})
+            with host_limits[urlparse(url).hostname]:
+                return RSS.fetch_feed(url, state.get("validators"))
+
         count = 0
-        qs = Podcast.objects.filter(
-            is_deleted=False, merged_to_item__isnull=True
-        ).order_by("pk")
-        for p in qs:
-            if (
-                p.primary_lookup_id_type == IdType.RSS
-                and p.primary_lookup_id_value is not None
-            ):
-                logger.info(f"updating {p}")
-                c = p.episodes.count()
-                site = RSS(p.feed_url)
-                r = site.scrape_additional_data()
-                if r:
-                    c2 = p.episodes.count()
-                    logger.info(f"updated {p}, {c2 - c} new episodes.")
-                    count += c2 - c
-                else:
-                    logger.warning(f"failed to update {p}")
-        logger.info(f"Podcasts update finished, {count} new episodes total.")
+        unchanged = 0
+        failed = 0
+        with ThreadPoolExecutor(_MAX_WORKERS) as executor:
+            futures = {executor.submit(fetch, p): p for p in due}
+            for future in as_completed(futures):
+                p = futures[future]
+                key = _STATE_KEY + str(p.pk)
+                state = states.get(key, {})
+                try:
+                    feed, validators = future.result()
+                    if feed:
+                        c = RSS.update_episodes(p, feed)
+                        if c:
+                            logger.info(f"updated {p}, {c} new episodes.")
+                        count += c
+                        state = {
+                            "validators": validators,
+                            "interval": self.get_refresh_interval(feed),
+                        }
+                    elif validators:
+                        unchanged += 1
+                    else:
+                        logger.warning(f"failed to update {p}")
+                        failed += 1
+                except Exception as e:
+                    logger.warning(f"failed to update {p}: {e}")
+                    failed += 1
+                state["next"] = now + state.get("interval", _DEFAULT_INTERVAL)
+                cache.set(key, state, timeout=_STATE_TIMEOUT)
+        logger.info(
+            f"Podcasts update finished, {len(due)} of {len(podcasts)} feeds due, {unchanged} unchanged, {failed} failed, {count} new episodes total."
+        )
@@ -46,6 +46,11 @@ class Command(BaseCommand):
             action="store_true",
             help="check and fix integrity for merged and deleted items",
         )
+        parser.add_argument(
+            "--rating-stats",
+            action="store_true",
+            help="rebuild rating stats for all items",
+        )
 
     def handle(self, *args, **options):
         self.verbose = options["verbose"]
@@ -56,6 +61,8 @@ class Command(BaseCommand):
             self.integrity()
         if options["localize"]:
             self.localize()
+        if options["rating_stats"]:
+            self.rating_stats()
         if options["extsearch"]:
             self.external_search(options["extsearch"], options["category"])
         self.stdout.write(self.style.SUCCESS("Done."))
@@ -75,6 +82,11 @@ class Command(BaseCommand):
                 f"{time.time() - start_time} seconds, {len(results)} items."
             )
         )
+        for provider, stats in ExternalSources.get_stats().items():
+            avg = stats.get("ms", 0) // max(stats.get("count", 0), 1)
+            self.stdout.write(
+                f"{provider}: {stats.get('count', 0)} searches, {avg}ms avg, {stats.get('errors', 0)} errors, {stats.get('timeouts', 0)} timeouts"
+            )
 
     def localize(self):
         c = Item.objects.all().count()
@@ -112,6 +124,13 @@ class Command(BaseCommand):
             i.localized_description = localized_desc
             i.save(update_fields=["metadata"])
 
+    def rating_stats(self):
+        from journal.models import RatingStats
+
+        self.stdout.write("Rebuilding rating stats...")
+        c = RatingStats.rebuild()
+        self.stdout.write(f"{c} items with rating updated.")
+
     def purge(self):
         for cls in Item.__subclasses__():
             if self.fix:
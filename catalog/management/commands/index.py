@@ -1,14 +1,30 @@
+import multiprocessing
 import pprint
-from time import sleep
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 
+import django
+from django.core.cache import cache
 from django.core.management.base import BaseCommand
-from django.core.paginator import Paginator
+from loguru import logger
 from tqdm import tqdm
 
 from catalog.models import Item
 from catalog.search.typesense import Indexer
 
 BATCH_SIZE = 1000
+MAX_IN_FLIGHT = 4
+_CHECKPOINT_KEY = "catalog_reindex_checkpoint"
+
+
+def _build_docs(ids: list[int]) -> list[dict]:
+    return Indexer.items_to_docs(Item.objects.filter(pk__in=ids).order_by("id"))
+
+
+def _import_docs(docs: "list[dict] | Future[list[dict]]"):
+    if isinstance(docs, Future):
+        docs = docs.result()
+    Indexer.import_docs(docs)
 
 
 class Command(BaseCommand):
@@ -33,6 +49,22 @@ class Command(BaseCommand):
             "--reindex",
             action="store_true",
         )
+        parser.add_argument(
+            "--resume",
+            help="resume reindex from last checkpoint",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--workers",
+            help="number of processes to build documents for reindex, 0 to build in main process",
+            type=int,
+            default=0,
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+        )
         parser.add_argument(
             "--delete",
             action="store_true",
@@ -54,19 +86,66 @@ class Command(BaseCommand):
         stats = Indexer.get_stats()
         pprint.pp(stats)
 
-    def reindex(self):
+    def id_batches(self, qs, last_id: int, batch_size: int):
+        while True:
+            ids = list(
+                qs.filter(pk__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            yield ids
+            last_id = ids[-1]
+
+    def reindex(self, resume: bool, workers: int, batch_size: int):
         if Indexer.busy():
             self.stdout.write("Please wait for previous updates")
-        # Indexer.update_settings()
-        # self.stdout.write(self.style.SUCCESS('Index settings updated.'))
-        qs = Item.objects.filter(
-            is_deleted=False, merged_to_item_id__isnull=True
-        )  # if h == 0 else c.objects.filter(edited_time__gt=timezone.now() - timedelta(hours=h))
-        pg = Paginator(qs.order_by("id"), BATCH_SIZE)
-        for p in tqdm(pg.page_range):
-            Indexer.replace_batch(pg.get_page(p).object_list)
-            while Indexer.busy():
-                sleep(0.5)
+        last_id = (cache.get(_CHECKPOINT_KEY) or 0) if resume else 0
+        if last_id:
+            self.stdout.write(f"Resuming from item id {last_id}")
+        qs = Item.objects.filter(is_deleted=False, merged_to_item_id__isnull=True)
+        pbar = tqdm(total=qs.filter(pk__gt=last_id).count())
+        builder = (
+            ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+            if workers
+            else None
+        )
+        importer = ThreadPoolExecutor(MAX_IN_FLIGHT)
+        pending: deque[tuple[int, int, Future]] = deque()
+
+        def complete_oldest():
+            # batches are completed in order so the checkpoint has no gaps
+            batch_last_id, count, f = pending.popleft()
+            f.result()
+            cache.set(_CHECKPOINT_KEY, batch_last_id, timeout=None)
+            pbar.update(count)
+
+        try:
+            for ids in self.id_batches(qs, last_id, batch_size):
+                docs = builder.submit(_build_docs, ids) if builder else _build_docs(ids)
+                pending.append((ids[-1], len(ids), importer.submit(_import_docs, docs)))
+                while len(pending) >= MAX_IN_FLIGHT + workers:
+                    complete_oldest()
+            while pending:
+                complete_oldest()
+        except Exception as e:
+            logger.error(f"reindex stopped: {e}")
+            self.stdout.write(
+                self.style.ERROR("Reindex stopped, run with --resume to continue.")
+            )
+            raise
+        finally:
+            importer.shutdown(cancel_futures=True)
+            if builder:
+                builder.shutdown(cancel_futures=True)
+            pbar.close()
+        cache.delete(_CHECKPOINT_KEY)
+        self.stdout.write(self.style.SUCCESS("Reindex completed."))
 
     def handle(self, *args, **options):
         if options["init"]:
@@ -76,7 +155,7 @@ class Command(BaseCommand):
         elif options["stat"]:
             self.stat()
         elif options["reindex"]:
-            self.reindex()
+            self.reindex(options["resume"], options["workers"], options["batch_size"])
         elif options["delete"]:
             self.delete()
         # else:
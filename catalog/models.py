@@ -1,5 +1,6 @@
 from auditlog.registry import auditlog
 from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 from loguru import logger
 
 from .book.models import Edition, EditionInSchema, EditionSchema, Series, Work
@@ -78,6 +79,34 @@ def init_catalog_search_models():
     # Indexer.update_model_indexable(CatalogCollection)
 
 
+def _item_page_item_changed(sender, instance, **kwargs):
+    # parent page lists its child items, e.g. seasons of a show
+    parent = instance.parent_item
+    Item.bump_page_cache_version([instance.pk, parent.pk if parent else None])
+
+
+def _item_page_piece_changed(sender, instance, **kwargs):
+    Item.bump_page_cache_version([instance.item_id])
+
+
+def _item_page_list_changed(sender, instance, **kwargs):
+    Item.bump_page_cache_version(instance.members.values_list("item_id", flat=True))
+
+
+def register_item_page_list_model(list_model):
+    """re-render cached item page when it's added to/removed from a list, or the list changed"""
+    post_save.connect(_item_page_list_changed, sender=list_model)
+    post_save.connect(_item_page_piece_changed, sender=list_model.MEMBER_CLASS)
+    post_delete.connect(_item_page_piece_changed, sender=list_model.MEMBER_CLASS)
+
+
+def init_item_page_cache():
+    for cls in [Item] + Item.__subclasses__():
+        post_save.connect(_item_page_item_changed, sender=cls)
+    post_save.connect(_item_page_piece_changed, sender=ExternalResource)
+    post_delete.connect(_item_page_piece_changed, sender=ExternalResource)
+
+
 def init_catalog_audit_log():
     for cls in Item.__subclasses__():
         auditlog.register(
@@ -117,6 +146,7 @@ __all__ = [
     "SiteName",
     "item_categories",
     "item_content_types",
+    "register_item_page_list_model",
     "Edition",
     "EditionInSchema",
     "EditionSchema",
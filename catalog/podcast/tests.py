@@ -1,3 +1,5 @@
+import time
+
 from django.test import TestCase
 
 from catalog.common import *
@@ -128,6 +130,28 @@ class PodcastRSSFeedTestCase(TestCase):
         self.assertIsNotNone(site.get_item().recent_episodes[0].link)
         self.assertIsNotNone(site.get_item().recent_episodes[0].media_url)
 
+    @use_local_response
+    def test_refresh(self):
+        from django.core.cache import cache
+
+        from catalog.jobs.podcast import _STATE_KEY, PodcastUpdater
+
+        t_url = "https://podcasts.files.bbci.co.uk/b006qykl.rss"
+        site = SiteManager.get_site_by_url(t_url)
+        site.get_resource_ready()
+        podcast = site.get_item()
+        cache.delete(_STATE_KEY + str(podcast.pk))
+        count = podcast.episodes.count()
+        self.assertGreater(count, 1)
+        podcast.episodes.order_by("-pub_date").first().delete(soft=False)
+        PodcastUpdater().run()
+        self.assertEqual(podcast.episodes.count(), count)
+        state = cache.get(_STATE_KEY + str(podcast.pk))
+        self.assertGreater(state["next"], time.time())
+        podcast.episodes.order_by("-pub_date").first().delete(soft=False)
+        PodcastUpdater().run()
+        self.assertEqual(podcast.episodes.count(), count - 1)
+
     # @use_local_response
     # def test_scrape_lizhi(self):
     #     t_url = "http://rss.lizhi.fm/rss/14275.xml"
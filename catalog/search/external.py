@@ -1,14 +1,121 @@
 import asyncio
+import time
+from typing import Coroutine
 
+from django.conf import settings
 from django.core.cache import cache
+from django_redis import get_redis_connection
+from loguru import logger
 
-from catalog.common import SiteManager
+from catalog.common import SiteManager, cookie_scope, get_async_loop
 from catalog.common.models import ItemCategory
 from catalog.search.models import ExternalSearchResultItem
 from catalog.sites.fedi import FediverseInstance
 
+_STATS_KEY = "external_search_stats"
+
 
 class ExternalSources:
+    @classmethod
+    async def _timed_task(
+        cls, provider: str, task: Coroutine, stats: dict, on_result=None
+    ):
+        start = time.monotonic()
+        s = stats[provider] = {"count": 1, "ms": 0, "errors": 0, "timeouts": 0}
+        try:
+            # each task runs in its own context, hence its own cookies
+            with cookie_scope():
+                r = await task
+            if on_result and r:
+                on_result(r)
+            return r
+        except asyncio.CancelledError:
+            s["timeouts"] = 1
+            raise
+        except Exception as e:
+            logger.warning(f"external search {provider} error {e}")
+            s["errors"] = 1
+            return []
+        finally:
+            s["ms"] = int((time.monotonic() - start) * 1000)
+
+    @classmethod
+    async def _gather(
+        cls, tasks: dict[str, Coroutine], timeout: float, stats: dict, on_result=None
+    ) -> list[ExternalSearchResultItem]:
+        futures = [
+            asyncio.ensure_future(cls._timed_task(provider, task, stats, on_result))
+            for provider, task in tasks.items()
+        ]
+        if not futures:
+            return []
+        _, pending = await asyncio.wait(futures, timeout=timeout)
+        for f in pending:
+            f.cancel()
+        if pending:
+            await asyncio.wait(pending)
+        results = []
+        for f in futures:
+            if not f.cancelled():
+                results.extend(f.result())
+        return results
+
+    @classmethod
+    def record_stats(cls, stats: dict):
+        r = get_redis_connection("default").pipeline()
+        for provider, s in stats.items():
+            for k, v in s.items():
+                r.hincrby(_STATS_KEY, f"{provider}:{k}", v)
+        r.execute()
+
+    @classmethod
+    def get_stats(cls) -> dict[str, dict[str, int]]:
+        """accumulated count, total latency in ms, errors and timeouts for each provider"""
+        stats = {}
+        for k, v in get_redis_connection("default").hgetall(_STATS_KEY).items():
+            provider, _, name = k.decode().rpartition(":")
+            stats.setdefault(provider, {})[name] = int(v)
+        return stats
+
+    @classmethod
+    def get_cache_key(
+        cls, query: str, category: str, visible_categories: list[ItemCategory]
+    ) -> str:
+        # same key as query_index() uses to save urls of local results
+        match category:
+            case "all":
+                return f"search_{','.join(visible_categories)}_{query}"
+            case "movietv":
+                return f"search_movie,tv_{query}"
+            case _:
+                return f"search_{category}_{query}"
+
+    @classmethod
+    def get_tasks(cls, query: str, page: int, category: str) -> dict[str, Coroutine]:
+        page_size = 5 if category == "all" else 10
+        tasks = FediverseInstance.search_tasks(query, page, category, page_size)
+        for site in SiteManager.get_sites_for_search():
+            tasks[site.SITE_NAME.value] = site.search_task(
+                query, page, category, page_size
+            )
+        return tasks
+
+    @classmethod
+    async def _search(
+        cls, tasks: dict[str, Coroutine], on_result=None
+    ) -> tuple[list[ExternalSearchResultItem], int]:
+        """return results and how long they should be cached"""
+        stats = {}
+        results = await cls._gather(tasks, settings.SEARCH_TIMEOUT, stats, on_result)
+        cls.record_stats(stats)
+        # partial results are cached briefly so slow providers can be retried soon
+        timeout = 30 if any(s["timeouts"] for s in stats.values()) else 300
+        return results, timeout
+
+    @staticmethod
+    def is_valid_query(query: str, page: int) -> bool:
+        return bool(query) and 1 <= page <= 10 and len(query) <= 100
+
     @classmethod
     def search(
         cls,
@@ -17,30 +124,86 @@ class ExternalSources:
         category: str | None = None,
         visible_categories: list[ItemCategory] = [],
     ) -> list[ExternalSearchResultItem]:
-        if not query or page < 1 or page > 10 or not query or len(query) > 100:
+        if not cls.is_valid_query(query, page):
             return []
         if category in ["", None]:
             category = "all"
-        page_size = 5 if category == "all" else 10
-        match category:
-            case "all":
-                cache_key = f"search_{','.join(visible_categories)}_{query}"
-            case "movietv":
-                cache_key = f"search_movie,tv_{query}"
-            case _:
-                cache_key = f"search_{category}_{query}"
+        cache_key = cls.get_cache_key(query, category, visible_categories)  # type:ignore
         results = cache.get("ext_" + cache_key, None)
         if results is None:
-            tasks = FediverseInstance.search_tasks(query, page, category, page_size)
-            for site in SiteManager.get_sites_for_search():
-                tasks.append(site.search_task(query, page, category, page_size))
-            # loop = asyncio.get_event_loop()
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            results = []
-            for r in loop.run_until_complete(asyncio.gather(*tasks)):
-                results.extend(r)
-            cache.set("ext_" + cache_key, results, 300)
+            tasks = cls.get_tasks(query, page, category)  # type:ignore
+            # run in the shared loop so that http connections are reused
+            results, timeout = asyncio.run_coroutine_threadsafe(
+                cls._search(tasks), get_async_loop()
+            ).result()
+            cache.set("ext_" + cache_key, results, timeout)
         dedupe_urls = cache.get(cache_key, [])
         results = [i for i in results if i.source_url not in dedupe_urls]
         return results
+
+    @classmethod
+    def search_incrementally(
+        cls,
+        query: str,
+        page: int = 1,
+        category: str | None = None,
+        visible_categories: list[ItemCategory] = [],
+        offset: int = 0,
+    ) -> tuple[list[ExternalSearchResultItem], int, bool]:
+        """
+        start searching in background if not yet, return results arrived after offset
+
+        call again with returned offset to get more results, until it returns done=True.
+        """
+        if not cls.is_valid_query(query, page):
+            return [], 0, True
+        if category in ["", None]:
+            category = "all"
+        cache_key = cls.get_cache_key(query, category, visible_categories)  # type:ignore
+        stream_key = f"ext_stream_{page}_{cache_key}"
+        state = cache.get(stream_key)
+        if state is None:
+            state = {"results": [], "done": False}
+            if cache.add(stream_key, state, settings.SEARCH_TIMEOUT + 60):
+                cls._start_stream(
+                    stream_key,
+                    state,
+                    cls.get_tasks(query, page, category),  # type:ignore
+                )
+        results = state["results"][offset:]
+        offset += len(results)
+        dedupe_urls = cache.get(cache_key, [])
+        results = [i for i in results if i.source_url not in dedupe_urls]
+        return results, offset, state["done"]
+
+    @classmethod
+    def _start_stream(cls, stream_key: str, state: dict, tasks: dict[str, Coroutine]):
+        # one writer saves state to cache in a thread, so the shared loop is not blocked
+        async def run():
+            changed = asyncio.Event()
+            timeout = 30
+
+            def on_result(r):
+                state["results"] = state["results"] + r
+                changed.set()
+
+            async def write():
+                while True:
+                    await changed.wait()
+                    changed.clear()
+                    # results arrived during last write are saved together
+                    done = state["done"]
+                    ttl = timeout if done else settings.SEARCH_TIMEOUT + 60
+                    await asyncio.to_thread(cache.set, stream_key, dict(state), ttl)
+                    if done:
+                        return
+
+            writer = asyncio.ensure_future(write())
+            try:
+                _, timeout = await cls._search(tasks, on_result)
+            finally:
+                state["done"] = True
+                changed.set()
+                await writer
+
+        asyncio.run_coroutine_threadsafe(run(), get_async_loop())
@@ -323,18 +323,23 @@ class Indexer:
         except Exception as e:
             logger.error(f"replace item error: \n{e}")
 
+    @classmethod
+    def items_to_docs(cls, objects) -> list[dict]:
+        objects = [x for x in objects if hasattr(x, "indexable_fields")]
+        Item.prefetch_rating_info(objects)
+        Item.prefetch_tags(objects)
+        return list(map(lambda o: cls.obj_to_dict(o), objects))
+
+    @classmethod
+    def import_docs(cls, docs: list[dict]):
+        if docs:
+            cls.instance().documents.import_(docs, {"action": "upsert"})
+
     @classmethod
     def replace_batch(cls, objects):
         try:
-            items = list(
-                map(
-                    lambda o: cls.obj_to_dict(o),
-                    [x for x in objects if hasattr(x, "indexable_fields")],
-                )
-            )
             # TODO check is_deleted=False, merged_to_item_id__isnull=True and call delete_batch()
-            if items:
-                cls.instance().documents.import_(items, {"action": "upsert"})
+            cls.import_docs(cls.items_to_docs(objects))
         except Exception as e:
             logger.error(f"replace batch error: \n{e}")
 
@@ -372,13 +377,15 @@ class Indexer:
 
         try:
             r = cls.instance().documents.search(options)
-            results.items = list(
-                [
-                    x
-                    for x in map(lambda i: cls.item_to_obj(i["document"]), r["hits"])
-                    if x is not None
-                ]
-            )
+            results.items = []
+            for hit in r["hits"]:
+                x = cls.item_to_obj(hit["document"])
+                if x is None:
+                    continue
+                # words to highlight: query and title tokens matched by typesense
+                tokens = cls.get_matched_tokens(hit, "title")
+                x.search_highlight = " ".join([q] + tokens)
+                results.items.append(x)
             results.count = r["found"]
             results.num_pages = (r["found"] + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE
         except ObjectNotFound:
@@ -387,6 +394,17 @@ class Indexer:
             logger.error(e)
         return results
 
+    @staticmethod
+    def get_matched_tokens(hit: dict, field_suffix: str = "") -> list[str]:
+        """flatten matched tokens of fields in highlights of a search hit"""
+        tokens = []
+        for h in hit.get("highlights") or []:
+            if not h.get("field", "").endswith(field_suffix):
+                continue
+            for t in h.get("matched_tokens") or []:
+                tokens += t if isinstance(t, list) else [t]
+        return [t for t in tokens if isinstance(t, str)]
+
     @classmethod
     def item_to_obj(cls, item):
         try:
@@ -136,6 +136,8 @@ def search(request):
 
     keywords = re.sub(r"[^\w-]+", " ", keywords)
     items, num_pages, __, dup_items = query_index(keywords, categories, tag, p)
+    Item.prefetch_rating_info(items + dup_items)
+    Item.prefetch_tags(items + dup_items)
     return render(
         request,
         "search_results.html",
@@ -154,14 +156,23 @@ def external_search(request):
     category = request.GET.get("c", default="all").strip().lower()
     keywords = request.GET.get("q", default="").strip()
     page_number = int_(request.GET.get("page"), 1)
-    items = (
-        ExternalSources.search(
-            keywords, page_number, category, visible_categories(request)
+    offset = int_(request.GET.get("offset"), 0)
+    if keywords:
+        items, offset, done = ExternalSources.search_incrementally(
+            keywords, page_number, category, visible_categories(request), offset
         )
-        if keywords
-        else []
+    else:
+        items, offset, done = [], 0, True
+    return render(
+        request,
+        "external_search_results.html",
+        {
+            "external_items": items,
+            "offset": offset,
+            "done": done,
+            "page": page_number,
+        },
     )
-    return render(request, "external_search_results.html", {"external_items": items})
 
 
 @login_required
@@ -48,27 +48,27 @@ class ApplePodcast(AbstractSite):
             return []
         results = []
         search_url = f"https://itunes.apple.com/search?entity=podcast&limit={page * page_size}&term={quote_plus(q)}"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(search_url, timeout=2)
-                r = response.json()
-                for p in r["results"][(page - 1) * page_size :]:
-                    if p.get("feedUrl"):
-                        results.append(
-                            ExternalSearchResultItem(
-                                ItemCategory.Podcast,
-                                SiteName.RSS,
-                                p["feedUrl"],
-                                p["trackName"],
-                                p["artistName"],
-                                "",
-                                p["artworkUrl600"],
-                            )
+        client = get_async_client()
+        try:
+            response = await client.get(search_url, timeout=2)
+            r = response.json()
+            for p in r["results"][(page - 1) * page_size :]:
+                if p.get("feedUrl"):
+                    results.append(
+                        ExternalSearchResultItem(
+                            ItemCategory.Podcast,
+                            SiteName.RSS,
+                            p["feedUrl"],
+                            p["trackName"],
+                            p["artistName"],
+                            "",
+                            p["artworkUrl600"],
                         )
-            except httpx.ReadTimeout:
-                logger.warning("ApplePodcast search timeout", extra={"query": q})
-            except Exception as e:
-                logger.error(
-                    "ApplePodcast search error", extra={"query": q, "exception": e}
-                )
+                    )
+        except httpx.ReadTimeout:
+            logger.warning("ApplePodcast search timeout", extra={"query": q})
+        except Exception as e:
+            logger.error(
+                "ApplePodcast search error", extra={"query": q, "exception": e}
+            )
         return results
@@ -141,33 +141,33 @@ class Bangumi(AbstractSite):
         if category not in bgm_type:
             return results
         search_url = f"https://api.bgm.tv/v0/search/subjects?limit={page_size}&offset={(page - 1) * page_size}"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    search_url,
-                    headers={"User-Agent": settings.NEODB_USER_AGENT},
-                    json={"keyword": q, "filter": {"type": bgm_type[category]}},
-                    timeout=2,
-                )
-                if response.status_code == 200:
-                    r = response.json()
-                    for s in r["data"]:
-                        cat, _ = cls.get_category(s)
-                        results.append(
-                            ExternalSearchResultItem(
-                                category=cat,
-                                source_site=cls.SITE_NAME,
-                                source_url=cls.id_to_url(s["id"]),
-                                title=s["name"],
-                                subtitle="",
-                                brief=s.get("summary", ""),
-                                cover_url=s["images"].get("common"),
-                            )
+        client = get_async_client()
+        try:
+            response = await client.post(
+                search_url,
+                headers={"User-Agent": settings.NEODB_USER_AGENT},
+                json={"keyword": q, "filter": {"type": bgm_type[category]}},
+                timeout=2,
+            )
+            if response.status_code == 200:
+                r = response.json()
+                for s in r["data"]:
+                    cat, _ = cls.get_category(s)
+                    results.append(
+                        ExternalSearchResultItem(
+                            category=cat,
+                            source_site=cls.SITE_NAME,
+                            source_url=cls.id_to_url(s["id"]),
+                            title=s["name"],
+                            subtitle="",
+                            brief=s.get("summary", ""),
+                            cover_url=s["images"].get("common"),
                         )
-            except httpx.ReadTimeout:
-                logger.warning("Bangumi search timeout", extra={"query": q})
-            except Exception as e:
-                logger.error("Bangumi search error", extra={"query": q, "exception": e})
+                    )
+        except httpx.ReadTimeout:
+            logger.warning("Bangumi search timeout", extra={"query": q})
+        except Exception as e:
+            logger.error("Bangumi search error", extra={"query": q, "exception": e})
         return results
 
     def scrape(self):
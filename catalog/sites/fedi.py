@@ -1,7 +1,6 @@
 import re
 from urllib.parse import quote_plus, urlparse
 
-import httpx
 from django.conf import settings
 from django.core.validators import URLValidator
 from loguru import logger
@@ -16,7 +15,7 @@ from catalog.common import (
     SiteManager,
     SiteName,
 )
-from catalog.common.downloaders import DownloadError
+from catalog.common.downloaders import DownloadError, get_async_client
 from catalog.models import (
     Album,
     Edition,
@@ -150,43 +149,45 @@ class FediverseInstance(AbstractSite):
         p = (page - 1) * page_size // 20 + 1
         offset = (page - 1) * page_size % 20
         api_url = f"https://{host}/api/catalog/search?query={quote_plus(q)}&page={p}{'&category=' + category if category and category != 'all' else ''}"
-        async with httpx.AsyncClient() as client:
-            results = []
-            try:
-                response = await client.get(
-                    api_url,
-                    timeout=2,
-                )
-                r = response.json()
-            except Exception as e:
-                logger.error(
-                    f"Fediverse search {host} error",
-                    extra={"url": api_url, "query": q, "exception": e},
+        client = get_async_client()
+        results = []
+        try:
+            response = await client.get(
+                api_url,
+                timeout=2,
+            )
+            r = response.json()
+        except Exception as e:
+            logger.error(
+                f"Fediverse search {host} error",
+                extra={"url": api_url, "query": q, "exception": e},
+            )
+            return []
+        if "data" in r:
+            for item in r["data"]:
+                if any(
+                    urlparse(res["url"]).hostname in settings.SITE_DOMAINS
+                    for res in item.get("external_resources", [])
+                ):
+                    continue
+                url = (
+                    f"https://{host}{item['url']}"  # FIXME update API and use abs urls
                 )
-                return []
-            if "data" in r:
-                for item in r["data"]:
-                    if any(
-                        urlparse(res["url"]).hostname in settings.SITE_DOMAINS
-                        for res in item.get("external_resources", [])
-                    ):
-                        continue
-                    url = f"https://{host}{item['url']}"  # FIXME update API and use abs urls
-                    try:
-                        cat = ItemCategory(item["category"])
-                    except Exception:
-                        cat = None
-                    results.append(
-                        ExternalSearchResultItem(
-                            cat,
-                            host,
-                            url,
-                            item["display_title"],
-                            "",
-                            item["brief"],
-                            item["cover_image_url"],
-                        )
+                try:
+                    cat = ItemCategory(item["category"])
+                except Exception:
+                    cat = None
+                results.append(
+                    ExternalSearchResultItem(
+                        cat,
+                        host,
+                        url,
+                        item["display_title"],
+                        "",
+                        item["brief"],
+                        item["cover_image_url"],
                     )
+                )
         return results[offset : offset + page_size]
 
     @classmethod
@@ -203,4 +204,6 @@ class FediverseInstance(AbstractSite):
     ):
         peers = cls.get_peers_for_search()
         c = category if category != "movietv" else "movie,tv"
-        return [cls.peer_search_task(host, q, page, c, page_size) for host in peers]
+        return {
+            host: cls.peer_search_task(host, q, page, c, page_size) for host in peers
+        }
@@ -125,49 +125,47 @@ class GoogleBooks(AbstractSite):
             return []
         results = []
         api_url = f"https://www.googleapis.com/books/v1/volumes?country=us&q={quote_plus(q)}&startIndex={page_size * (page - 1)}&maxResults={page_size}&maxAllowedMaturityRating=MATURE"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(api_url, timeout=2)
-                j = response.json()
-                if "items" in j:
-                    for b in j["items"]:
-                        if "title" not in b["volumeInfo"]:
-                            continue
-                        title = b["volumeInfo"]["title"]
-                        subtitle = ""
-                        if "publishedDate" in b["volumeInfo"]:
-                            subtitle += b["volumeInfo"]["publishedDate"] + " "
-                        if "authors" in b["volumeInfo"]:
-                            subtitle += ", ".join(b["volumeInfo"]["authors"])
-                        if "description" in b["volumeInfo"]:
-                            brief = b["volumeInfo"]["description"]
-                        elif "textSnippet" in b["volumeInfo"]:
-                            brief = b["volumeInfo"]["textSnippet"]["searchInfo"]
-                        else:
-                            brief = ""
-                        category = ItemCategory.Book
-                        # b['volumeInfo']['infoLink'].replace('http:', 'https:')
-                        url = "https://books.google.com/books?id=" + b["id"]
-                        cover = (
-                            b["volumeInfo"]["imageLinks"]["thumbnail"]
-                            if "imageLinks" in b["volumeInfo"]
-                            else ""
+        client = get_async_client()
+        try:
+            response = await client.get(api_url, timeout=2)
+            j = response.json()
+            if "items" in j:
+                for b in j["items"]:
+                    if "title" not in b["volumeInfo"]:
+                        continue
+                    title = b["volumeInfo"]["title"]
+                    subtitle = ""
+                    if "publishedDate" in b["volumeInfo"]:
+                        subtitle += b["volumeInfo"]["publishedDate"] + " "
+                    if "authors" in b["volumeInfo"]:
+                        subtitle += ", ".join(b["volumeInfo"]["authors"])
+                    if "description" in b["volumeInfo"]:
+                        brief = b["volumeInfo"]["description"]
+                    elif "textSnippet" in b["volumeInfo"]:
+                        brief = b["volumeInfo"]["textSnippet"]["searchInfo"]
+                    else:
+                        brief = ""
+                    category = ItemCategory.Book
+                    # b['volumeInfo']['infoLink'].replace('http:', 'https:')
+                    url = "https://books.google.com/books?id=" + b["id"]
+                    cover = (
+                        b["volumeInfo"]["imageLinks"]["thumbnail"]
+                        if "imageLinks" in b["volumeInfo"]
+                        else ""
+                    )
+                    results.append(
+                        ExternalSearchResultItem(
+                            category,
+                            SiteName.GoogleBooks,
+                            url,
+                            title,
+                            subtitle,
+                            brief,
+                            cover,
                         )
-                        results.append(
-                            ExternalSearchResultItem(
-                                category,
-                                SiteName.GoogleBooks,
-                                url,
-                                title,
-                                subtitle,
-                                brief,
-                                cover,
-                            )
-                        )
-            except httpx.ReadTimeout:
-                logger.warning("GoogleBooks search timeout", extra={"query": q})
-            except Exception as e:
-                logger.error(
-                    "GoogleBooks search error", extra={"query": q, "exception": e}
-                )
+                    )
+        except httpx.ReadTimeout:
+            logger.warning("GoogleBooks search timeout", extra={"query": q})
+        except Exception as e:
+            logger.error("GoogleBooks search error", extra={"query": q, "exception": e})
         return results
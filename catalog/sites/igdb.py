@@ -4,6 +4,7 @@ IGDB
 use (e.g. "portal-2") as id, which is different from real id in IGDB API
 """
 
+import asyncio
 import datetime
 import json
 from urllib.parse import quote_plus
@@ -29,7 +30,8 @@ def _igdb_access_token():
         token = cache.get(_cache_key)
         if not token:
             j = requests.post(
-                f"https://id.twitch.tv/oauth2/token?client_id={settings.IGDB_CLIENT_ID}&client_secret={settings.IGDB_CLIENT_SECRET}&grant_type=client_credentials"
+                f"https://id.twitch.tv/oauth2/token?client_id={settings.IGDB_CLIENT_ID}&client_secret={settings.IGDB_CLIENT_SECRET}&grant_type=client_credentials",
+                timeout=3,
             ).json()
             token = j["access_token"]
             ttl = j["expires_in"] - 60
@@ -173,17 +175,19 @@ class IGDB(AbstractSite):
         limit = page_size
         offset = (page - 1) * limit
         q = f'fields *, cover.url, genres.name, platforms.name, involved_companies.*, involved_companies.company.name; search "{quote_plus(q)}"; limit {limit}; offset {offset};'
-        _wrapper = IGDBWrapper(settings.IGDB_CLIENT_ID, _igdb_access_token())
-        async with httpx.AsyncClient() as client:
-            rs = []
-            try:
-                url = IGDBWrapper._build_url("games")
-                params = _wrapper._compose_request(q)
-                response = await client.post(url, **params)
-                if response.status_code == 200:
-                    rs = json.loads(response.content)
-            except httpx.HTTPError as e:
-                logger.error(f"IGDB API: {e}", extra={"exception": e})
+        # token refresh is blocking, keep it off the shared loop
+        token = await asyncio.to_thread(_igdb_access_token)
+        _wrapper = IGDBWrapper(settings.IGDB_CLIENT_ID, token)
+        client = get_async_client()
+        rs = []
+        try:
+            url = IGDBWrapper._build_url("games")
+            params = _wrapper._compose_request(q)
+            response = await client.post(url, **params)
+            if response.status_code == 200:
+                rs = json.loads(response.content)
+        except httpx.HTTPError as e:
+            logger.error(f"IGDB API: {e}", extra={"exception": e})
         result = []
         for r in rs:
             subtitle = ""
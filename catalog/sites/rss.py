@@ -1,7 +1,7 @@
 import logging
 import pickle
-import urllib.request
 from datetime import datetime
+from io import BytesIO
 
 import bleach
 import podcastparser
@@ -16,7 +16,9 @@ from catalog.common.downloaders import (
     _local_response_path,
     get_mock_file,
     get_mock_mode,
+    get_session,
 )
+from catalog.common.ratelimit import acquire, backoff, get_limiter_key
 from catalog.models import *
 from catalog.podcast.models import PodcastEpisode
 from common.models.lang import detect_language
@@ -33,35 +35,63 @@ class RSS(AbstractSite):
     URL_PATTERNS = [r".+[./](rss|xml)"]
 
     @staticmethod
-    def parse_feed_from_url(url):
-        if not url:
-            return None
-        cache_key = f"rss:{url}"
-        feed = cache.get(cache_key)
-        if feed:
-            return feed
+    def fetch_feed(
+        url: str, validators: dict[str, str] | None = None
+    ) -> tuple[dict | None, dict[str, str] | None]:
+        """
+        download and parse feed, return (feed, validators)
+
+        with validators (ETag and Last-Modified) from previous fetch, a conditional
+        request is made and (None, validators) is returned if feed is not modified;
+        (None, None) is returned if feed is not available.
+        """
         if get_mock_mode():
             feed = pickle.load(open(_local_response_path + get_mock_file(url), "rb"))
-        else:
-            req = urllib.request.Request(url)
-            req.add_header("User-Agent", settings.NEODB_USER_AGENT)
+            return feed, {}
+        headers = {"User-Agent": settings.NEODB_USER_AGENT}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        for u in [url, url.replace("https://", "http://")]:
+            limiter_key = get_limiter_key(u)
+            if not acquire(limiter_key):
+                return None, None
             try:
-                feed = podcastparser.parse(url, urllib.request.urlopen(req, timeout=3))
+                resp = get_session().get(u, headers=headers, timeout=3)
+                if resp.status_code == 304 and validators:
+                    return None, validators
+                if resp.status_code == 429:
+                    backoff(limiter_key, resp.headers.get("Retry-After"))
+                resp.raise_for_status()
+                feed = podcastparser.parse(u, BytesIO(resp.content))
             except Exception:
-                url = url.replace("https://", "http://")
-                req = urllib.request.Request(url)
-                req.add_header("User-Agent", settings.NEODB_USER_AGENT)
-                try:
-                    feed = podcastparser.parse(
-                        url, urllib.request.urlopen(req, timeout=3)
-                    )
-                except Exception:
-                    return None
+                if u.startswith("https://"):
+                    continue
+                return None, None
             if settings.DOWNLOADER_SAVEDIR:
                 pickle.dump(
                     feed,
-                    open(settings.DOWNLOADER_SAVEDIR + "/" + get_mock_file(url), "wb"),
+                    open(settings.DOWNLOADER_SAVEDIR + "/" + get_mock_file(u), "wb"),
                 )
+            return feed, {
+                "etag": resp.headers.get("ETag", ""),
+                "last_modified": resp.headers.get("Last-Modified", ""),
+            }
+        return None, None
+
+    @staticmethod
+    def parse_feed_from_url(url):
+        if not url:
+            return None
+        cache_key = f"rss:{url}"
+        feed = cache.get(cache_key)
+        if feed:
+            return feed
+        feed, _ = RSS.fetch_feed(url)
+        if not feed:
+            return None
         cache.set(cache_key, feed, timeout=settings.DOWNLOADER_CACHE_TIMEOUT)
         return feed
 
@@ -119,25 +149,45 @@ class RSS(AbstractSite):
         if not item:
             logger.warning(f"item for RSS {self.url} not found")
             return False
+        RSS.update_episodes(item, feed)
+        return True
+
+    @staticmethod
+    def update_episodes(podcast: Podcast, feed: dict) -> int:
+        """create episodes not seen before in feed, return number of new episodes"""
+        episodes = {}
         for episode in feed["episodes"]:
-            PodcastEpisode.objects.get_or_create(
-                program=item,
-                guid=episode.get("guid"),
-                defaults={
-                    "title": episode["title"],
-                    "brief": bleach.clean(episode.get("description"), strip=True),
-                    "description_html": episode.get("description_html"),
-                    "cover_url": episode.get("episode_art_url"),
-                    "media_url": (
-                        episode.get("enclosures")[0].get("url")
-                        if episode.get("enclosures")
-                        else None
-                    ),
-                    "pub_date": make_aware(
-                        datetime.fromtimestamp(episode.get("published"))
-                    ),
-                    "duration": episode.get("duration"),
-                    "link": episode.get("link"),
-                },
+            episodes.setdefault(episode.get("guid"), episode)
+        guids = [g for g in episodes.keys() if g is not None]
+        existing = set(
+            PodcastEpisode.objects.filter(program=podcast, guid__in=guids).values_list(
+                "guid", flat=True
             )
-        return True
+        )
+        if (
+            None in episodes
+            and PodcastEpisode.objects.filter(program=podcast, guid=None).exists()
+        ):
+            existing.add(None)
+        created = 0
+        for guid, episode in episodes.items():
+            if guid in existing:
+                continue
+            PodcastEpisode.objects.create(
+                program=podcast,
+                guid=guid,
+                title=episode["title"],
+                brief=bleach.clean(episode.get("description"), strip=True),
+                description_html=episode.get("description_html"),
+                cover_url=episode.get("episode_art_url"),
+                media_url=(
+                    episode.get("enclosures")[0].get("url")
+                    if episode.get("enclosures")
+                    else None
+                ),
+                pub_date=make_aware(datetime.fromtimestamp(episode.get("published"))),
+                duration=episode.get("duration"),
+                link=episode.get("link"),
+            )
+            created += 1
+        return created
@@ -2,6 +2,7 @@
 Spotify
 """
 
+import asyncio
 import logging
 import time
 
@@ -117,36 +118,38 @@ class Spotify(AbstractSite):
             return []
         results = []
         api_url = f"https://api.spotify.com/v1/search?q={q}&type=album&limit={page_size}&offset={page * page_size}"
-        async with httpx.AsyncClient() as client:
-            try:
-                headers = {"Authorization": f"Bearer {get_spotify_token()}"}
-                response = await client.get(api_url, headers=headers, timeout=2)
-                j = response.json()
-                if j.get("albums"):
-                    for a in j["albums"]["items"]:
-                        title = a["name"]
-                        subtitle = a.get("release_date", "")
-                        for artist in a.get("artists", []):
-                            subtitle += " " + artist.get("name", "")
-                        url = a["external_urls"]["spotify"]
-                        cover = a["images"][0]["url"] if a.get("images") else ""
-                        results.append(
-                            ExternalSearchResultItem(
-                                ItemCategory.Music,
-                                SiteName.Spotify,
-                                url,
-                                title,
-                                subtitle,
-                                "",
-                                cover,
-                            )
+        client = get_async_client()
+        try:
+            # token refresh is blocking, keep it off the shared loop
+            token = await asyncio.to_thread(get_spotify_token)
+            headers = {"Authorization": f"Bearer {token}"}
+            response = await client.get(api_url, headers=headers, timeout=2)
+            j = response.json()
+            if j.get("albums"):
+                for a in j["albums"]["items"]:
+                    title = a["name"]
+                    subtitle = a.get("release_date", "")
+                    for artist in a.get("artists", []):
+                        subtitle += " " + artist.get("name", "")
+                    url = a["external_urls"]["spotify"]
+                    cover = a["images"][0]["url"] if a.get("images") else ""
+                    results.append(
+                        ExternalSearchResultItem(
+                            ItemCategory.Music,
+                            SiteName.Spotify,
+                            url,
+                            title,
+                            subtitle,
+                            "",
+                            cover,
                         )
-                else:
-                    logger.warning(f"Spotify search '{q}' no results found.")
-            except httpx.ReadTimeout:
-                logger.warning("Spotify search timeout", extra={"query": q})
-            except Exception as e:
-                logger.error("Spotify search error", extra={"query": q, "exception": e})
+                    )
+            else:
+                logger.warning(f"Spotify search '{q}' no results found.")
+        except httpx.ReadTimeout:
+            logger.warning("Spotify search timeout", extra={"query": q})
+        except Exception as e:
+            logger.error("Spotify search error", extra={"query": q, "exception": e})
         return results
 
 
@@ -170,6 +173,7 @@ def invoke_spotify_token():
         "https://accounts.spotify.com/api/token",
         data={"grant_type": "client_credentials"},
         headers={"Authorization": f"Basic {settings.SPOTIFY_CREDENTIAL}"},
+        timeout=3,
     )
     data = r.json()
     if r.status_code == 401:
@@ -180,6 +184,7 @@ def invoke_spotify_token():
             "https://accounts.spotify.com/api/token",
             data={"grant_type": "client_credentials"},
             headers={"Authorization": f"Basic {settings.SPOTIFY_CREDENTIAL}"},
+            timeout=3,
         )
         data = r.json()
     elif r.status_code != 200:
@@ -50,6 +50,7 @@ def _get_preferred_languages():
 
 TMDB_DEFAULT_LANG = _get_language_code()
 TMDB_PREFERRED_LANGS = _get_preferred_languages()
+_MAX_CONCURRENT_REQUESTS = 4
 
 
 def search_tmdb_by_imdb_id(imdb_id):
@@ -66,6 +67,20 @@ def query_tmdb_tv_episode(tv, season, episode):
     return res_data
 
 
+def _download_localized(api_url: str) -> list[tuple[str, dict]]:
+    """
+    GET api url in all preferred locales in parallel, `{lang}` in url is replaced with language param
+
+    results are in reversed order of preference, so that the last one is in most preferred language
+    """
+    langs = list(reversed(TMDB_PREFERRED_LANGS.items()))
+    responses = download_concurrently(
+        [BasicDownloader(api_url.format(lang=p)) for _, p in langs],
+        _MAX_CONCURRENT_REQUESTS,
+    )
+    return [(lang, r.json()) for (lang, _), r in zip(langs, responses)]
+
+
 def _copy_dict(s, key_map):
     d = {}
     for src, dst in key_map.items():
@@ -91,9 +106,8 @@ class TMDB_Movie(AbstractSite):
         localized_desc = []
         # GET api urls in all locales
         # btw it seems no way to tell if TMDB does not have a certain translation
-        for lang, lang_param in reversed(TMDB_PREFERRED_LANGS.items()):
-            api_url = f"https://api.themoviedb.org/3/movie/{self.id_value}?api_key={settings.TMDB_API3_KEY}&language={lang_param}&append_to_response=external_ids,credits"
-            res_data = BasicDownloader(api_url).download().json()
+        api_url = f"https://api.themoviedb.org/3/movie/{self.id_value}?api_key={settings.TMDB_API3_KEY}&language={{lang}}&append_to_response=external_ids,credits"
+        for lang, res_data in _download_localized(api_url):
             localized_title.append({"lang": lang, "text": res_data["title"]})
             if res_data.get("overview", "").strip():
                 localized_desc.append({"lang": lang, "text": res_data["overview"]})
@@ -188,44 +202,44 @@ class TMDB_Movie(AbstractSite):
         offset = (page - 1) * page_size % 20
         results = []
         api_url = f"https://api.themoviedb.org/3/search/multi?query={quote_plus(q)}&page={p}&api_key={settings.TMDB_API3_KEY}&language={TMDB_DEFAULT_LANG}&include_adult=true"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(api_url, timeout=2)
-                j = response.json()
-                if j.get("results"):
-                    for m in j["results"]:
-                        if m["media_type"] in ["tv", "movie"]:
-                            url = f"https://www.themoviedb.org/{m['media_type']}/{m['id']}"
-                            if m["media_type"] == "tv":
-                                cat = ItemCategory.TV
-                                title = m["name"]
-                                subtitle = f"{m.get('first_air_date', '')} {m.get('original_name', '')}"
-                            else:
-                                cat = ItemCategory.Movie
-                                title = m["title"]
-                                subtitle = f"{m.get('release_date', '')} {m.get('original_name', '')}"
-                            cover = (
-                                f"https://image.tmdb.org/t/p/w500/{m.get('poster_path')}"
-                                if m.get("poster_path")
-                                else ""
-                            )
-                            results.append(
-                                ExternalSearchResultItem(
-                                    cat,
-                                    SiteName.TMDB,
-                                    url,
-                                    title,
-                                    subtitle,
-                                    m.get("overview"),
-                                    cover,
-                                )
+        client = get_async_client()
+        try:
+            response = await client.get(api_url, timeout=2)
+            j = response.json()
+            if j.get("results"):
+                for m in j["results"]:
+                    if m["media_type"] in ["tv", "movie"]:
+                        url = f"https://www.themoviedb.org/{m['media_type']}/{m['id']}"
+                        if m["media_type"] == "tv":
+                            cat = ItemCategory.TV
+                            title = m["name"]
+                            subtitle = f"{m.get('first_air_date', '')} {m.get('original_name', '')}"
+                        else:
+                            cat = ItemCategory.Movie
+                            title = m["title"]
+                            subtitle = f"{m.get('release_date', '')} {m.get('original_name', '')}"
+                        cover = (
+                            f"https://image.tmdb.org/t/p/w500/{m.get('poster_path')}"
+                            if m.get("poster_path")
+                            else ""
+                        )
+                        results.append(
+                            ExternalSearchResultItem(
+                                cat,
+                                SiteName.TMDB,
+                                url,
+                                title,
+                                subtitle,
+                                m.get("overview"),
+                                cover,
                             )
-                else:
-                    logger.warning(f"TMDB search '{q}' no results found.")
-            except httpx.ReadTimeout:
-                logger.warning("TMDb search timeout", extra={"query": q})
-            except Exception as e:
-                logger.error("TMDb search error", extra={"query": q, "exception": e})
+                        )
+            else:
+                logger.warning(f"TMDB search '{q}' no results found.")
+        except httpx.ReadTimeout:
+            logger.warning("TMDb search timeout", extra={"query": q})
+        except Exception as e:
+            logger.error("TMDb search error", extra={"query": q, "exception": e})
         return results[offset : offset + page_size]
 
 
@@ -248,9 +262,8 @@ class TMDB_TV(AbstractSite):
         res_data = {}
         localized_title = []
         localized_desc = []
-        for lang, lang_param in reversed(TMDB_PREFERRED_LANGS.items()):
-            api_url = f"https://api.themoviedb.org/3/tv/{self.id_value}?api_key={settings.TMDB_API3_KEY}&language={lang_param}&append_to_response=external_ids,credits"
-            res_data = BasicDownloader(api_url).download().json()
+        api_url = f"https://api.themoviedb.org/3/tv/{self.id_value}?api_key={settings.TMDB_API3_KEY}&language={{lang}}&append_to_response=external_ids,credits"
+        for lang, res_data in _download_localized(api_url):
             localized_title.append({"lang": lang, "text": res_data["name"]})
             if res_data.get("overview", "").strip():
                 localized_desc.append({"lang": lang, "text": res_data["overview"]})
@@ -369,9 +382,8 @@ class TMDB_TVSeason(AbstractSite):
         res_data = {}
         localized_title = []
         localized_desc = []
-        for lang, lang_param in reversed(TMDB_PREFERRED_LANGS.items()):
-            api_url = f"https://api.themoviedb.org/3/tv/{show_id}/season/{season_id}?api_key={settings.TMDB_API3_KEY}&language={lang_param}&append_to_response=external_ids,credits"
-            res_data = BasicDownloader(api_url).download().json()
+        api_url = f"https://api.themoviedb.org/3/tv/{show_id}/season/{season_id}?api_key={settings.TMDB_API3_KEY}&language={{lang}}&append_to_response=external_ids,credits"
+        for lang, res_data in _download_localized(api_url):
             localized_title.append({"lang": lang, "text": res_data["name"]})
             if res_data.get("overview", "").strip():
                 localized_desc.append({"lang": lang, "text": res_data["overview"]})
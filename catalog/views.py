@@ -27,6 +27,7 @@ from journal.models import (
 )
 from takahe.utils import Takahe
 
+from .common.models import ITEM_PAGE_CACHE_TTL
 from .forms import *
 from .models import *
 from .search.views import *
@@ -101,7 +102,7 @@ def retrieve(request, item_path, item_uuid):
     shelf_statuses = ShelfManager.get_statuses_for_category(item.category)
     if request.user.is_authenticated:
         visible = q_piece_visible_to_user(request.user)
-        mark = Mark(request.user.identity, item)
+        mark = Mark.bulk_load(request.user.identity, [item])[item.pk]
         child_item_comments = Comment.objects.filter(
             owner=request.user.identity, item__in=item.child_items.all()
         )
@@ -134,6 +135,7 @@ def retrieve(request, item_path, item_uuid):
             "collection_list": collection_list,
             "shelf_actions": shelf_actions,
             "shelf_statuses": shelf_statuses,
+            "page_cache_ttl": ITEM_PAGE_CACHE_TTL,
         },
     )
 
@@ -159,6 +161,7 @@ def mark_list(request, item_path, item_uuid, following_only=False):
     paginator = CustomPaginator(queryset, request)
     page_number = request.GET.get("page", default=1)
     marks = paginator.get_page(page_number)
+    Mark.bulk_for_members(marks)
     pagination = PageLinksGenerator(page_number, paginator.num_pages, request.GET)
     return render(
         request,
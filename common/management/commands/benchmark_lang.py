@@ -0,0 +1,81 @@
+import json
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from langdetect import detect
+
+from common.models import lang
+
+_tag = re.compile(r"<[^>]*>")
+_chn_t = re.compile(r".*[" + lang._tc_char + "].*")
+
+
+def legacy_detect_language(s: str) -> str:
+    """detect_language() before the cached engine, for comparison"""
+    if lang._eng.match(s):
+        return "en"
+    if lang._chn_latin.match(s) and not lang._latin.match(s):
+        if _chn_t.match(s):
+            return "zh-tw"
+        return "zh-cn"
+    try:
+        return detect(s).lower()
+    except Exception:
+        return "x"
+
+
+def _strings(o):
+    if isinstance(o, str):
+        yield o
+    elif isinstance(o, dict):
+        for v in o.values():
+            yield from _strings(v)
+    elif isinstance(o, list):
+        for v in o:
+            yield from _strings(v)
+
+
+class Command(BaseCommand):
+    help = "Benchmark detect_language() against previous implementation with test data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path", default=str(Path(settings.BASE_DIR) / "test_data")
+        )
+        parser.add_argument("--per-file", type=int, default=20)
+        parser.add_argument("--rounds", type=int, default=3)
+
+    def load_samples(self, path: str, per_file: int) -> list[str]:
+        samples = []
+        for f in sorted(Path(path).iterdir()):
+            text = f.read_bytes().decode(errors="ignore")
+            try:
+                strings = list(_strings(json.loads(text)))
+            except ValueError:
+                strings = _tag.sub("\n", text).splitlines()
+            strings = [s.strip() for s in strings if len(s.strip()) > 1]
+            samples += strings[:per_file]
+        return samples
+
+    def timeit(self, func, samples: list[str]) -> tuple[float, list[str]]:
+        t = time.perf_counter()
+        results = [func(s) for s in samples]
+        return time.perf_counter() - t, results
+
+    def handle(self, *args, **options):
+        samples = self.load_samples(options["path"], options["per_file"])
+        self.stdout.write(f"{len(samples)} samples")
+        for r in range(options["rounds"]):
+            lang._detected.clear()
+            legacy, expected = self.timeit(legacy_detect_language, samples)
+            cold, results = self.timeit(lang.detect_language, samples)
+            warm, _ = self.timeit(lang.detect_language, samples)
+            same = sum(a == b for a, b in zip(expected, results))
+            self.stdout.write(
+                f"round {r + 1}: legacy {legacy:.3f}s, "
+                f"new {cold:.3f}s, cached {warm:.3f}s, "
+                f"{same}/{len(samples)} same results"
+            )
@@ -1,6 +1,10 @@
+import re
+from functools import lru_cache
+
 from django import template
 from django.template.defaultfilters import stringfilter
-from django.utils.safestring import mark_safe
+from django.utils.html import conditional_escape
+from django.utils.safestring import SafeData, mark_safe
 
 register = template.Library()
 
@@ -14,26 +18,34 @@ def _cc(text):
     # return cc.convert(text)
 
 
-@register.filter
+@lru_cache(maxsize=256)
+def _get_pattern(search: str) -> re.Pattern | None:
+    """compile words in search into one regex, longer words first so they win at the same position"""
+    words = sorted(
+        {w for w in _cc(search.strip().lower()).split(" ") if w}, key=len, reverse=True
+    )
+    return re.compile("|".join(map(re.escape, words))) if words else None
+
+
+@register.filter(needs_autoescape=True)
 @stringfilter
-def highlight(text, search):
+def highlight(text, search, autoescape=True):
+    """
+    mark words in search found in text, case-insensitively
+
+    search is usually the query, or query with tokens matched by search engine
+    """
+    esc = conditional_escape if autoescape and not isinstance(text, SafeData) else str
     otext = _cc(text.lower())
-    sl = len(text)
-    if sl != len(otext):
-        return text  # in rare cases, the lowered&converted text has a different length
-    rtext = ""
-    words = list(set([w for w in _cc(search.strip().lower()).split(" ") if w]))
-    words.sort(key=len, reverse=True)
+    pattern = _get_pattern(search or "")
+    if len(text) != len(otext) or not pattern:
+        # in rare cases, the lowered&converted text has a different length
+        return mark_safe(esc(text))
+    parts = []
     i = 0
-    while i < sl:
-        m = None
-        for w in words:
-            if otext[i : i + len(w)] == w:
-                m = f"<mark>{text[i : i + len(w)]}</mark>"
-                i += len(w)
-                break
-        if not m:
-            m = text[i]
-            i += 1
-        rtext += m
-    return mark_safe(rtext)
+    for m in pattern.finditer(otext):
+        parts += [esc(text[i : m.start()]), "<mark>", esc(text[m.start() : m.end()])]
+        parts.append("</mark>")
+        i = m.end()
+    parts.append(esc(text[i:]))
+    return mark_safe("".join(parts))
@@ -7,10 +7,12 @@ class JournalConfig(AppConfig):
 
     def ready(self):
         # load key modules in proper order, make sure class inject and signal works as expected
-        from catalog.models import Indexer
+        from catalog.models import Indexer, register_item_page_list_model
 
         from . import apis  # noqa
-        from .models import Rating, Tag
+        from .models import Collection, Rating, Tag
 
         Indexer.register_list_model(Tag)
         Indexer.register_piece_model(Rating)
+        register_item_page_list_model(Tag)
+        register_item_page_list_model(Collection)
@@ -2,8 +2,10 @@ import csv
 import os
 import shutil
 import tempfile
+from itertools import batched
 
 from django.conf import settings
+from django.db.models import prefetch_related_objects
 
 from catalog.common.models import Item
 from catalog.models import ItemCategory
@@ -11,7 +13,7 @@ from common.utils import GenerateDateUUIDMediaFilePath
 from journal.models import Note, Review, ShelfMember, q_item_in_category
 from users.models import Task
 
-#
+_CHUNK_SIZE = 500
 
 _mark_heading = [
     "title",
@@ -82,6 +84,9 @@ class CsvExporter(Task):
             links.append(ext.url)
         return " ".join(links)
 
+    def prefetch_items(self, pieces):
+        prefetch_related_objects(pieces, "item", "item__external_resources")
+
     def run(self):
         user = self.user
         temp_dir = tempfile.mkdtemp()
@@ -107,20 +112,23 @@ class CsvExporter(Task):
             with open(csv_file_path + "_mark.csv", "w") as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow(_mark_heading)
-                for mark in marks:
-                    total += 1
-                    item = mark.item
-                    line = [
-                        item.display_title,
-                        self.get_item_info(item),
-                        self.get_item_links(item),
-                        mark.created_time.isoformat(),
-                        mark.shelf_type,
-                        mark.rating_grade,
-                        mark.comment_text,
-                        " ".join(mark.tags),
-                    ]
-                    writer.writerow(line)
+                for chunk in batched(marks.iterator(_CHUNK_SIZE), _CHUNK_SIZE):
+                    self.prefetch_items(chunk)
+                    ShelfMember.prefetch_siblings(list(chunk))
+                    for mark in chunk:
+                        total += 1
+                        item = mark.item
+                        line = [
+                            item.display_title,
+                            self.get_item_info(item),
+                            self.get_item_links(item),
+                            mark.created_time.isoformat(),
+                            mark.shelf_type,
+                            mark.rating_grade,
+                            mark.comment_text,
+                            " ".join(mark.tags),
+                        ]
+                        writer.writerow(line)
             reviews = (
                 Review.objects.filter(owner=user.identity)
                 .filter(q)
@@ -129,18 +137,20 @@ class CsvExporter(Task):
             with open(csv_file_path + "_review.csv", "w") as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow(_review_heading)
-                for review in reviews:
-                    total += 1
-                    item = review.item
-                    line = [
-                        item.display_title,
-                        self.get_item_info(item),
-                        self.get_item_links(item),
-                        review.created_time.isoformat(),
-                        review.title,
-                        review.body,
-                    ]
-                    writer.writerow(line)
+                for chunk in batched(reviews.iterator(_CHUNK_SIZE), _CHUNK_SIZE):
+                    self.prefetch_items(chunk)
+                    for review in chunk:
+                        total += 1
+                        item = review.item
+                        line = [
+                            item.display_title,
+                            self.get_item_info(item),
+                            self.get_item_links(item),
+                            review.created_time.isoformat(),
+                            review.title,
+                            review.body,
+                        ]
+                        writer.writerow(line)
             with open(csv_file_path + "_note.csv", "w") as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow(_note_heading)
@@ -149,19 +159,21 @@ class CsvExporter(Task):
                     .filter(q)
                     .order_by("created_time")
                 )
-                for note in notes:
-                    total += 1
-                    item = note.item
-                    line = [
-                        item.display_title,
-                        self.get_item_info(item),
-                        self.get_item_links(item),
-                        note.created_time.isoformat(),
-                        note.progress_display,
-                        note.title,
-                        note.content,
-                    ]
-                    writer.writerow(line)
+                for chunk in batched(notes.iterator(_CHUNK_SIZE), _CHUNK_SIZE):
+                    self.prefetch_items(chunk)
+                    for note in chunk:
+                        total += 1
+                        item = note.item
+                        line = [
+                            item.display_title,
+                            self.get_item_info(item),
+                            self.get_item_links(item),
+                            note.created_time.isoformat(),
+                            note.progress_display,
+                            note.title,
+                            note.content,
+                        ]
+                        writer.writerow(line)
 
         filename = GenerateDateUUIDMediaFilePath(
             "f.zip", settings.MEDIA_ROOT + "/" + settings.EXPORT_FILE_PATH_ROOT
@@ -4,26 +4,36 @@ import re
 import shutil
 import tempfile
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import batched
 
 from django.conf import settings
+from django.db.models import prefetch_related_objects
 from django.utils import timezone
 from loguru import logger
 
 from catalog.common import ProxiedImageDownloader
+from catalog.models import Item
 from common.utils import GenerateDateUUIDMediaFilePath
 from journal.models import (
     Collection,
     Content,
     Note,
+    Piece,
     Review,
     ShelfLogEntry,
     ShelfMember,
     Tag,
     TagMember,
 )
+from journal.models.shelf import ShelfLogEntryPost
 from takahe.models import Post
 from users.models import Task
 
+_CHUNK_SIZE = 500
+_MAX_ATTACHMENT_WORKERS = 4
+_RE_MARKDOWN_IMAGE = re.compile(r"(?<=!\[\]\()([^)]+)(?=\))")
+
 
 class NdjsonExporter(Task):
     class Meta:
@@ -34,7 +44,7 @@ class NdjsonExporter(Task):
         "file": None,
         "total": 0,
     }
-    ref_items = []
+    ref_items: set[int]
 
     @property
     def filename(self) -> str:
@@ -42,10 +52,14 @@ class NdjsonExporter(Task):
         return f"neodb_{self.user.username}_{d}_ndjson"
 
     def ref(self, item) -> str:
-        if item not in self.ref_items:
-            self.ref_items.append(item)
+        self.ref_items.add(item.pk)
         return item.absolute_url
 
+    def _prefetch(self, pieces):
+        prefetch_related_objects(pieces, "item")
+        for p in pieces:
+            p.owner = self.user.identity
+
     def get_header(self):
         return {
             "server": settings.SITE_DOMAIN,
@@ -87,124 +101,161 @@ class NdjsonExporter(Task):
                 return p
             return url
 
-        filename = os.path.join(temp_folder_path, "journal.ndjson")
-        total = 0
-        with open(filename, "w") as f:
-            f.write(json.dumps(self.get_header()) + "\n")
+        def _copy_attachment(a):
+            dest = os.path.join(attachment_path, os.path.basename(a.file.name))
+            try:
+                shutil.copy2(a.file.path, dest)
+            except Exception as e:
+                logger.error(
+                    f"error copying {a.file.path} to {dest}",
+                    extra={"exception": e},
+                )
+
+        def _log_error(future):
+            if future.exception():
+                logger.error(
+                    "error exporting attachment",
+                    extra={"exception": future.exception()},
+                )
 
-            for cls in list(Content.__subclasses__()):
-                pieces = cls.objects.filter(owner=user.identity)
-                for p in pieces:
+        identity = user.identity
+        self.ref_items = set()
+        # attachments are downloaded or copied in background while exporting
+        with ThreadPoolExecutor(_MAX_ATTACHMENT_WORKERS) as executor:
+            filename = os.path.join(temp_folder_path, "journal.ndjson")
+            total = 0
+            with open(filename, "w") as f:
+                f.write(json.dumps(self.get_header()) + "\n")
+
+                for cls in list(Content.__subclasses__()):
+                    pieces = cls.objects.filter(owner=identity)
+                    for chunk in batched(pieces.iterator(_CHUNK_SIZE), _CHUNK_SIZE):
+                        self._prefetch(chunk)
+                        if cls == Note:
+                            Piece.prefetch_latest_posts(list(chunk))
+                            prefetch_related_objects(
+                                [p.latest_post for p in chunk if p.latest_post],
+                                "attachments",
+                            )
+                        for p in chunk:
+                            total += 1
+                            self.ref(p.item)
+                            o = {
+                                "type": p.__class__.__name__,
+                                "content": p.ap_object,
+                                "visibility": p.visibility,
+                                "metadata": p.metadata,
+                            }
+                            f.write(json.dumps(o, default=str) + "\n")
+                            if cls == Review:
+                                for url in _RE_MARKDOWN_IMAGE.findall(p.body):  # type: ignore
+                                    executor.submit(_save_image, url).add_done_callback(
+                                        _log_error
+                                    )
+                            elif cls == Note and p.latest_post:
+                                for a in p.latest_post.attachments.all():
+                                    executor.submit(
+                                        _copy_attachment, a
+                                    ).add_done_callback(_log_error)
+
+                collections = Collection.objects.filter(owner=identity)
+                for c in collections.iterator(_CHUNK_SIZE):
                     total += 1
-                    self.ref(p.item)
+                    members = c.ordered_members
+                    prefetch_related_objects(members, "item")
                     o = {
-                        "type": p.__class__.__name__,
-                        "content": p.ap_object,
-                        "visibility": p.visibility,
-                        "metadata": p.metadata,
+                        "type": "Collection",
+                        "content": c.ap_object,
+                        "visibility": c.visibility,
+                        "metadata": c.metadata,
+                        "items": [
+                            {"item": self.ref(m.item), "metadata": m.metadata}
+                            for m in members
+                        ],
                     }
                     f.write(json.dumps(o, default=str) + "\n")
-                    if cls == Review:
-                        re.sub(
-                            r"(?<=!\[\]\()([^)]+)(?=\))",
-                            lambda x: _save_image(x[1]),
-                            p.body,  # type: ignore
-                        )
-                    elif cls == Note and p.latest_post:
-                        for a in p.latest_post.attachments.all():
-                            dest = os.path.join(
-                                attachment_path, os.path.basename(a.file.name)
+
+                tags = Tag.objects.filter(owner=identity)
+                for t in tags.iterator(_CHUNK_SIZE):
+                    total += 1
+                    o = {
+                        "type": "Tag",
+                        "name": t.title,
+                        "visibility": t.visibility,
+                        "pinned": t.pinned,
+                    }
+                    f.write(json.dumps(o, default=str) + "\n")
+
+                tags = TagMember.objects.filter(owner=identity).select_related("parent")
+                for chunk in batched(tags.iterator(_CHUNK_SIZE), _CHUNK_SIZE):
+                    self._prefetch(chunk)
+                    for t in chunk:
+                        total += 1
+                        o = {
+                            "type": "TagMember",
+                            "content": t.ap_object,
+                            "visibility": t.visibility,
+                            "metadata": t.metadata,
+                        }
+                        f.write(json.dumps(o, default=str) + "\n")
+
+                marks = ShelfMember.objects.filter(owner=identity).select_related(
+                    "parent"
+                )
+                for chunk in batched(marks.iterator(_CHUNK_SIZE), _CHUNK_SIZE):
+                    self._prefetch(chunk)
+                    for m in chunk:
+                        total += 1
+                        o = {
+                            "type": "ShelfMember",
+                            "content": m.ap_object,
+                            "visibility": m.visibility,
+                            "metadata": m.metadata,
+                        }
+                        f.write(json.dumps(o, default=str) + "\n")
+
+                logs = ShelfLogEntry.objects.filter(owner=identity)
+                for chunk in batched(logs.iterator(_CHUNK_SIZE), _CHUNK_SIZE):
+                    prefetch_related_objects(chunk, "item")
+                    post_ids: dict[int, list[int]] = {}
+                    for log_id, post_id in ShelfLogEntryPost.objects.filter(
+                        log_entry_id__in=[log.pk for log in chunk]
+                    ).values_list("log_entry_id", "post_id"):
+                        post_ids.setdefault(log_id, []).append(post_id)
+                    for log in chunk:
+                        total += 1
+                        o = {
+                            "type": "ShelfLog",
+                            "item": self.ref(log.item),
+                            "status": log.shelf_type,
+                            "posts": post_ids.get(log.pk, []),
+                            "timestamp": log.timestamp,
+                        }
+                        f.write(json.dumps(o, default=str) + "\n")
+
+                posts = Post.objects.filter(author_id=identity.pk).exclude(
+                    type_data__has_key="object"
+                )
+                for chunk in batched(posts.iterator(_CHUNK_SIZE), _CHUNK_SIZE):
+                    prefetch_related_objects(chunk, "attachments")
+                    for p in chunk:
+                        total += 1
+                        o = {"type": "post", "post": p.to_mastodon_json()}
+                        for a in p.attachments.all():
+                            executor.submit(_copy_attachment, a).add_done_callback(
+                                _log_error
                             )
-                            try:
-                                shutil.copy2(a.file.path, dest)
-                            except Exception as e:
-                                logger.error(
-                                    f"error copying {a.file.path} to {dest}",
-                                    extra={"exception": e},
-                                )
-
-            collections = Collection.objects.filter(owner=user.identity)
-            for c in collections:
-                total += 1
-                o = {
-                    "type": "Collection",
-                    "content": c.ap_object,
-                    "visibility": c.visibility,
-                    "metadata": c.metadata,
-                    "items": [
-                        {"item": self.ref(m.item), "metadata": m.metadata}
-                        for m in c.ordered_members
-                    ],
-                }
-                f.write(json.dumps(o, default=str) + "\n")
-
-            tags = Tag.objects.filter(owner=user.identity)
-            for t in tags:
-                total += 1
-                o = {
-                    "type": "Tag",
-                    "name": t.title,
-                    "visibility": t.visibility,
-                    "pinned": t.pinned,
-                }
-                f.write(json.dumps(o, default=str) + "\n")
-
-            tags = TagMember.objects.filter(owner=user.identity)
-            for t in tags:
-                total += 1
-                o = {
-                    "type": "TagMember",
-                    "content": t.ap_object,
-                    "visibility": t.visibility,
-                    "metadata": t.metadata,
-                }
-                f.write(json.dumps(o, default=str) + "\n")
-            marks = ShelfMember.objects.filter(owner=user.identity)
-            for m in marks:
-                total += 1
-                o = {
-                    "type": "ShelfMember",
-                    "content": m.ap_object,
-                    "visibility": m.visibility,
-                    "metadata": m.metadata,
-                }
-                f.write(json.dumps(o, default=str) + "\n")
-
-            logs = ShelfLogEntry.objects.filter(owner=user.identity)
-            for log in logs:
-                total += 1
-                o = {
-                    "type": "ShelfLog",
-                    "item": self.ref(log.item),
-                    "status": log.shelf_type,
-                    "posts": list(log.all_post_ids()),
-                    "timestamp": log.timestamp,
-                }
-                f.write(json.dumps(o, default=str) + "\n")
-
-            posts = Post.objects.filter(author_id=user.identity.pk).exclude(
-                type_data__has_key="object"
-            )
-
-            for p in posts:
-                total += 1
-                o = {"type": "post", "post": p.to_mastodon_json()}
-                for a in p.attachments.all():
-                    dest = os.path.join(attachment_path, os.path.basename(a.file.name))
-                    try:
-                        shutil.copy2(a.file.path, dest)
-                    except Exception as e:
-                        logger.error(
-                            f"error copying {a.file.path} to {dest}",
-                            extra={"exception": e},
-                        )
-                f.write(json.dumps(o, default=str) + "\n")
-
-        filename = os.path.join(temp_folder_path, "catalog.ndjson")
-        with open(filename, "w") as f:
-            f.write(json.dumps(self.get_header()) + "\n")
-            for item in self.ref_items:
-                f.write(json.dumps(item.ap_object, default=str) + "\n")
+                        f.write(json.dumps(o, default=str) + "\n")
+
+            filename = os.path.join(temp_folder_path, "catalog.ndjson")
+            with open(filename, "w") as f:
+                f.write(json.dumps(self.get_header()) + "\n")
+                for item_ids in batched(sorted(self.ref_items), _CHUNK_SIZE):
+                    items = list(Item.objects.filter(pk__in=item_ids))
+                    prefetch_related_objects(items, "external_resources")
+                    Item.prefetch_parent_items(items)
+                    for item in items:
+                        f.write(json.dumps(item.ap_object, default=str) + "\n")
 
         # Export actor.ndjson with Takahe identity data
         filename = os.path.join(temp_folder_path, "actor.ndjson")
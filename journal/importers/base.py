@@ -1,12 +1,15 @@
 import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Literal, Optional
 
 from django.conf import settings
+from django.db import connections
 from django.utils.dateparse import parse_datetime
 from loguru import logger
 
 from catalog.common.sites import SiteManager
-from catalog.models import Edition, IdType, Item, SiteName
+from catalog.models import Edition, ExternalResource, IdType, Item, SiteName
 from journal.models import ShelfType
 from users.models import Task
 
@@ -19,6 +22,7 @@ _PREFERRED_SITES = [
     SiteName.Goodreads,
     SiteName.IGDB,
 ]
+_MAX_FETCH_WORKERS = 4
 
 
 class BaseImporter(Task):
@@ -37,10 +41,15 @@ class BaseImporter(Task):
         "file": None,
         "visibility": 0,
     }
+    ProgressSaveInterval = 2  # seconds between saving progress to database
+    _progress_saved_at = 0.0
 
     def progress(self, result: ImportResult) -> None:
         """Update import progress.
 
+        Progress is saved at most once every ProgressSaveInterval seconds, and
+        when the last record is processed; caller should save after the import.
+
         Args:
             result: The import result ('imported', 'skipped', or 'failed')
         """
@@ -59,11 +68,99 @@ class BaseImporter(Task):
             f"{self.metadata['skipped']} skipped, "
             f"{self.metadata['failed']} failed"
         )
-        self.save(update_fields=["metadata", "message"])
+        now = time.monotonic()
+        if (
+            now - self._progress_saved_at >= self.ProgressSaveInterval
+            or self.metadata["processed"] >= self.metadata["total"]
+        ):
+            self._progress_saved_at = now
+            self.save(update_fields=["metadata", "message"])
 
     def run(self) -> None:
         raise NotImplementedError
 
+    def get_items_by_links(
+        self, links_by_key: Dict[str, List[str]]
+    ) -> Dict[str, Optional[Item]]:
+        """Find items for many entries, each with a list of links, in batch.
+
+        Local items and items of known external resources are resolved with a
+        few queries for all entries; only those not found this way are looked
+        up one by one with get_item_by_info_and_links(), which may fetch from
+        remote sites, in a pool of threads.
+
+        Args:
+            links_by_key: URLs of each entry, keyed by arbitrary entry keys
+
+        Returns:
+            Item or None for each key
+        """
+        site_url = settings.SITE_INFO["site_url"] + "/"
+        local_links = {
+            link
+            for links in links_by_key.values()
+            for link in links
+            if link.startswith("/") or link.startswith(site_url)
+        }
+        local_items = Item.get_by_urls(local_links, resolve_merge=True)
+        sites = {}
+        for links in links_by_key.values():
+            for link in links:
+                if link not in local_links and link not in sites:
+                    sites[link] = SiteManager.get_site_by_url(
+                        link, detect_redirection=False, detect_fallback=False
+                    )
+        resources = ExternalResource.objects.filter(
+            url__in=[site.url for site in sites.values() if site and site.url]
+        ).exclude(item__isnull=True)
+        resource_items = dict(resources.values_list("url", "item_id"))
+        items_by_id = Item.objects.in_bulk(set(resource_items.values()))
+        for item in list(items_by_id.values()):
+            if item.merged_to_item_id:
+                items_by_id[item.pk] = item.merged_to_item
+
+        items: Dict[str, Optional[Item]] = {}
+        misses = {}
+        for key, links in links_by_key.items():
+            found = [
+                local_items[link]
+                for link in links
+                if link in local_items and not local_items[link].is_deleted
+            ]
+            if not found:
+                entry_sites = sorted(
+                    [sites[link] for link in links if sites.get(link)],
+                    key=lambda x: _PREFERRED_SITES.index(x.SITE_NAME)
+                    if x.SITE_NAME in _PREFERRED_SITES
+                    else 99,
+                )
+                found = [
+                    items_by_id[resource_items[site.url]]
+                    for site in entry_sites
+                    if resource_items.get(site.url) in items_by_id
+                ]
+            if found:
+                items[key] = found[0]
+            else:
+                misses[key] = links
+        if misses:
+            logger.info(f"fetching {len(misses)} items not found locally")
+
+        def _find(links):
+            try:
+                return self.get_item_by_info_and_links("", "", links)
+            finally:
+                connections.close_all()
+
+        if len(misses) > 1:
+            with ThreadPoolExecutor(_MAX_FETCH_WORKERS) as executor:
+                results = executor.map(_find, misses.values())
+                items.update(zip(misses.keys(), results))
+        else:
+            for key, links in misses.items():
+                items[key] = self.get_item_by_info_and_links("", "", links)
+        return items
+
     def get_item_by_info_and_links(
         self, title: str, info_str: str, links: list[str]
     ) -> Optional[Item]:
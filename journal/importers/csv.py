@@ -9,6 +9,7 @@ from loguru import logger
 
 from catalog.models import ItemCategory
 from journal.models import Mark, Note, Review
+from takahe.utils import Takahe
 
 from .base import BaseImporter
 
@@ -211,7 +212,7 @@ class CsvImporter(BaseImporter):
     def process_csv_file(self, file_path: str, import_function) -> None:
         """Process a CSV file using the specified import function."""
         logger.debug(f"Processing {file_path}")
-        with open(file_path, "r") as csvfile:
+        with open(file_path, "r") as csvfile, Takahe.bulk_posting():
             reader = csv.DictReader(csvfile)
             for row in reader:
                 result = import_function(row)
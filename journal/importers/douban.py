@@ -15,6 +15,7 @@ from catalog.sites import DoubanBook, DoubanDrama, DoubanGame, DoubanMovie, Doub
 from catalog.sites.douban import DoubanDownloader
 from common.utils import GenerateDateUUIDMediaFilePath
 from journal.models import *
+from takahe.utils import Takahe
 from users.models import Task
 
 _tz_sh = pytz.timezone("Asia/Shanghai")
@@ -157,10 +158,11 @@ class DoubanImporter(Task):
         self.message = f"豆瓣标记和评论导入开始，共{self.metadata['total']}篇。"
         self.save(update_fields=["message"])
         logger.info(f"{self.user} sheet loaded, {self.metadata['total']} lines total")
-        for name, param in self.mark_sheet_config.items():
-            self.import_mark_sheet(self.mark_data[name], param[0], name)
-        for name, param in self.review_sheet_config.items():
-            self.import_review_sheet(self.review_data[name], name)
+        with Takahe.bulk_posting():
+            for name, param in self.mark_sheet_config.items():
+                self.import_mark_sheet(self.mark_data[name], param[0], name)
+            for name, param in self.review_sheet_config.items():
+                self.import_review_sheet(self.review_data[name], name)
         self.message = f"豆瓣标记和评论导入完成，共处理{self.metadata['total']}篇，已存在{self.metadata['skipped']}篇，新增{self.metadata['imported']}篇。"
         if len(self.metadata["failed_urls"]) > 0:
             self.message += f"导入时未能处理{len(self.metadata['failed_urls'])}个网址。"
@@ -8,6 +8,7 @@ from catalog.common import *
 from catalog.common.downloaders import *
 from catalog.models import *
 from journal.models import *
+from takahe.utils import Takahe
 from users.models import Task
 
 re_list = r"^https://www\.goodreads\.com/list/show/\d+"
@@ -83,37 +84,38 @@ class GoodreadsImporter(Task):
                 ShelfType.PROGRESS: f"https://www.goodreads.com/review/list/{uid}?shelf=currently-reading",
                 ShelfType.COMPLETE: f"https://www.goodreads.com/review/list/{uid}?shelf=read",
             }
-            for shelf_type in shelves:
-                shelf_url = shelves.get(shelf_type)
-                shelf = self.parse_shelf(shelf_url)
-                for book in shelf["books"]:
-                    mark = Mark(user.identity, book["book"])
-                    if (
-                        (
-                            mark.shelf_type == shelf_type
-                            and mark.comment_text == book["review"]
-                        )
-                        or (
-                            mark.shelf_type == ShelfType.COMPLETE
-                            and shelf_type != ShelfType.COMPLETE
-                        )
-                        or (
-                            mark.shelf_type == ShelfType.PROGRESS
-                            and shelf_type == ShelfType.WISHLIST
-                        )
-                    ):
-                        print(
-                            f"Skip {shelf_type}/{book['book']} bc it was marked {mark.shelf_type}"
-                        )
-                    else:
-                        mark.update(
-                            shelf_type,
-                            book["review"],
-                            book["rating"],
-                            visibility=visibility,
-                            created_time=book["last_updated"] or timezone.now(),
-                        )
-                    total += 1
+            with Takahe.bulk_posting():
+                for shelf_type in shelves:
+                    shelf_url = shelves.get(shelf_type)
+                    shelf = self.parse_shelf(shelf_url)
+                    for book in shelf["books"]:
+                        mark = Mark(user.identity, book["book"])
+                        if (
+                            (
+                                mark.shelf_type == shelf_type
+                                and mark.comment_text == book["review"]
+                            )
+                            or (
+                                mark.shelf_type == ShelfType.COMPLETE
+                                and shelf_type != ShelfType.COMPLETE
+                            )
+                            or (
+                                mark.shelf_type == ShelfType.PROGRESS
+                                and shelf_type == ShelfType.WISHLIST
+                            )
+                        ):
+                            print(
+                                f"Skip {shelf_type}/{book['book']} bc it was marked {mark.shelf_type}"
+                            )
+                        else:
+                            mark.update(
+                                shelf_type,
+                                book["review"],
+                                book["rating"],
+                                visibility=visibility,
+                                created_time=book["last_updated"] or timezone.now(),
+                            )
+                        total += 1
             self.message = f"Imported {total} records from Goodreads profile."
         self.metadata["total"] = total
         self.save()
@@ -15,6 +15,7 @@ from catalog.common import *
 from catalog.common.downloaders import *
 from catalog.models import *
 from journal.models import *
+from takahe.utils import Takahe
 from users.models import *
 
 _tz_sh = pytz.timezone("Asia/Shanghai")
@@ -145,7 +146,7 @@ class LetterboxdImporter(Task):
     def run(self):
         uris = set()
         filename = self.metadata["file"]
-        with zipfile.ZipFile(filename, "r") as zipref:
+        with zipfile.ZipFile(filename, "r") as zipref, Takahe.bulk_posting():
             with tempfile.TemporaryDirectory() as tmpdirname:
                 logger.debug(f"Extracting {filename} to {tmpdirname}")
                 zipref.extractall(tmpdirname)
@@ -2,8 +2,10 @@ import json
 import os
 import tempfile
 import zipfile
+from array import array
 from typing import Any, Dict
 
+from django.db import transaction
 from loguru import logger
 
 from journal.models import (
@@ -22,6 +24,8 @@ from takahe.utils import Takahe
 
 from .base import BaseImporter
 
+_BATCH_SIZE = 100
+
 
 class NdjsonImporter(BaseImporter):
     """Importer for NDJSON files exported from NeoDB."""
@@ -332,12 +336,17 @@ class NdjsonImporter(BaseImporter):
             "ShelfLog": self.import_shelf_log,
             "Post": self.import_post,
         }
-        journal = {k: [] for k in import_funcs.keys()}
-        with open(file_path, "r") as jsonfile:
+        # first pass: locate records of each type, so that they can be imported
+        # in dependency order without loading the whole journal into memory
+        offsets: Dict[str, array] = {k: array("q") for k in import_funcs.keys()}
+        with open(file_path, "rb") as jsonfile:
             # Skip header line
-            next(jsonfile, None)
-
-            for line in jsonfile:
+            jsonfile.readline()
+            while True:
+                offset = jsonfile.tell()
+                line = jsonfile.readline()
+                if not line:
+                    break
                 try:
                     data = json.loads(line)
                 except json.JSONDecodeError:
@@ -346,11 +355,11 @@ class NdjsonImporter(BaseImporter):
                 data_type = data.get("type")
                 if not data_type:
                     continue
-                if data_type not in journal:
-                    journal[data_type] = []
-                journal[data_type].append(data)
+                if data_type not in offsets:
+                    offsets[data_type] = array("q")
+                offsets[data_type].append(offset)
 
-        self.metadata["total"] = sum(len(items) for items in journal.values())
+        self.metadata["total"] = sum(len(o) for o in offsets.values())
         self.message = f"found {self.metadata['total']} records to import"
         self.save(update_fields=["metadata", "message"])
 
@@ -358,10 +367,28 @@ class NdjsonImporter(BaseImporter):
         if lines_error:
             logger.error(f"Error processing journal.ndjson: {lines_error} lines")
 
-        for typ, func in import_funcs.items():
-            for data in journal.get(typ, []):
-                result = func(data)
-                self.progress(result)
+        # second pass: read and import records by type, a batch in each transaction
+        with open(file_path, "rb") as jsonfile:
+            for typ, func in import_funcs.items():
+                typ_offsets = offsets.get(typ, array("q"))
+                for i in range(0, len(typ_offsets), _BATCH_SIZE):
+                    with (
+                        transaction.atomic(),
+                        Takahe.bulk_posting(discard_on_error=True),
+                    ):
+                        for offset in typ_offsets[i : i + _BATCH_SIZE]:
+                            jsonfile.seek(offset)
+                            data = json.loads(jsonfile.readline())
+                            sid = transaction.savepoint()
+                            with Takahe.recording_new_posts() as new_posts:
+                                result = func(data)
+                            if result == "failed":
+                                # posts are in takahe db, not rolled back with savepoint
+                                Takahe.discard_posts(new_posts)
+                                transaction.savepoint_rollback(sid)
+                            else:
+                                transaction.savepoint_commit(sid)
+                            self.progress(result)
         logger.info(
             f"Imported {self.metadata['imported']}, skipped {self.metadata['skipped']}, failed {self.metadata['failed']}"
         )
@@ -371,6 +398,7 @@ class NdjsonImporter(BaseImporter):
         logger.debug(f"Parsing catalog file: {file_path}")
         item_count = 0
         try:
+            links_by_id = {}
             with open(file_path, "r") as jsonfile:
                 for line in jsonfile:
                     try:
@@ -384,7 +412,8 @@ class NdjsonImporter(BaseImporter):
                     # self.catalog_items[u] = i
                     item_count += 1
                     links = [u] + [r["url"] for r in i.get("external_resources", [])]
-                    self.items[u] = self.get_item_by_info_and_links("", "", links)
+                    links_by_id[u] = links
+            self.items.update(self.get_items_by_links(links_by_id))
             logger.info(f"Loaded {item_count} items from catalog")
             self.metadata["catalog_processed"] = item_count
         except Exception:
@@ -1,8 +1,10 @@
+import time
 from argparse import RawTextHelpFormatter
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import timedelta
 
 from django.core.management.base import BaseCommand
-from django.core.paginator import Paginator
 from django.db.models import Q
 from django.utils import timezone
 from tqdm import tqdm
@@ -16,6 +18,7 @@ from journal.models import (
     Piece,
     Review,
     ShelfMember,
+    get_pending_index_stats,
     update_journal_for_merged_item,
 )
 from journal.models.index import JournalQueryParser
@@ -81,8 +84,15 @@ class Command(BaseCommand):
         )
         parser.add_argument(
             "--batch-size",
+            type=int,
             default=1000,
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="number of concurrent imports to index while reindexing",
+        )
         parser.add_argument(
             "--item-class",
             action="append",
@@ -114,6 +124,51 @@ class Command(BaseCommand):
                 if self.fix:
                     update_journal_for_merged_item(i.url)
 
+    def batches_by_pk(self, qs):
+        last_id = 0
+        while True:
+            batch = list(qs.filter(pk__gt=last_id).order_by("pk")[: self.batch_size])
+            if not batch:
+                break
+            yield batch
+            last_id = batch[-1].pk
+
+    def pieces_without_post_to_docs(self, pieces: list[Piece]) -> list[dict]:
+        # pieces with posts are indexed along with their posts
+        Piece.prefetch_latest_posts(pieces)
+        pieces = [p for p in pieces if p.latest_post is None]
+        return JournalIndex.pieces_to_docs(pieces)
+
+    def reindex(self, index: JournalIndex, qs, to_docs):
+        """build docs batch by batch while previous batches are being imported"""
+        importer = ThreadPoolExecutor(self.workers)
+        pending: deque[tuple[int, Future]] = deque()
+        c = 0
+        start = time.monotonic()
+        pbar = tqdm(total=qs.count())
+        try:
+            for batch in self.batches_by_pk(qs):
+                docs = to_docs(batch)
+                c += len(docs)
+                pending.append((len(batch), importer.submit(index.replace_docs, docs)))
+                while len(pending) >= self.workers:
+                    n, f = pending.popleft()
+                    f.result()
+                    pbar.update(n)
+            while pending:
+                n, f = pending.popleft()
+                f.result()
+                pbar.update(n)
+        finally:
+            importer.shutdown(cancel_futures=True)
+            pbar.close()
+        elapsed = time.monotonic() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"indexed {c} docs in {elapsed:.0f}s, {c / max(elapsed, 0.001):.0f} docs/sec."
+            )
+        )
+
     def export(self, owner_ids):
         users = User.objects.filter(identity__in=owner_ids)
         for user in users:
@@ -137,6 +192,7 @@ class Command(BaseCommand):
         verbose,
         fix,
         batch_size,
+        workers,
         fast,
         *args,
         **kwargs,
@@ -144,6 +200,7 @@ class Command(BaseCommand):
         self.verbose = verbose
         self.fix = fix
         self.batch_size = batch_size
+        self.workers = max(workers, 1)
         index = JournalIndex.instance()
 
         if owner:
@@ -189,6 +246,10 @@ class Command(BaseCommand):
                     self.stdout.write(str(r))
                 except Exception as e:
                     self.stdout.write(self.style.ERROR(str(e)))
+                stats = get_pending_index_stats()
+                self.stdout.write(
+                    f"pending: {stats['pending']} pieces, lag: {stats['lag']:.1f}s"
+                )
 
             case "idx-delete":
                 if owners:
@@ -217,13 +278,7 @@ class Command(BaseCommand):
                         self.style.SUCCESS(f"indexing for {len(owners)} users.")
                     )
                     posts = posts.filter(author_id__in=owners)
-                c = 0
-                pg = Paginator(posts.order_by("id"), self.batch_size)
-                for p in tqdm(pg.page_range):
-                    docs = index.posts_to_docs(pg.get_page(p).object_list)
-                    c += len(docs)
-                    index.replace_docs(docs)
-                self.stdout.write(self.style.SUCCESS(f"indexed {c} docs."))
+                self.reindex(index, posts, index.posts_to_docs)
                 # index remaining pieces without posts
                 for cls in (
                     [
@@ -237,23 +292,7 @@ class Command(BaseCommand):
                     pieces = cls.objects.filter(local=True)
                     if owners:
                         pieces = pieces.filter(owner_id__in=owners)
-                    c = 0
-                    pg = Paginator(pieces.order_by("id"), self.batch_size)
-                    for p in tqdm(pg.page_range):
-                        pieces = [
-                            p
-                            for p in pg.get_page(p).object_list
-                            if p.latest_post is None
-                        ]
-                        docs = index.pieces_to_docs(pieces)
-                        c += len(docs)
-                        index.replace_docs(docs)
-                self.stdout.write(self.style.SUCCESS(f"indexed {c} docs."))
-                # posts = posts.exclude(type_data__object__has_key="relatedWith")
-                # docs = index.posts_to_docs(posts)
-                # c = len(docs)
-                # index.insert_docs(docs)
-                # self.stdout.write(self.style.SUCCESS(f"indexed {c} posts."))
+                    self.reindex(index, pieces, self.pieces_without_post_to_docs)
 
             case "idx-search":
                 q = JournalQueryParser("" if query == "-" else query, page_size=100)
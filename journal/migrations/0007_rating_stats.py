@@ -0,0 +1,39 @@
+# Generated by Django 4.2.19 on 2026-10-17 06:50
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0002_fix_soft_deleted_edition"),
+        ("journal", "0006_csvimporter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RatingStats",
+            fields=[
+                (
+                    "item",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="catalog.item",
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                ("total", models.IntegerField(default=0)),
+                (
+                    "histogram",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(), size=11
+                    ),
+                ),
+            ],
+        ),
+    ]
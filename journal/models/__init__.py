@@ -12,12 +12,18 @@ from .common import (
     q_piece_in_home_feed_of_user,
     q_piece_visible_to_user,
 )
-from .index import JournalIndex, JournalQueryParser
+from .index import (
+    JournalIndex,
+    JournalQueryParser,
+    enqueue_index_pieces,
+    flush_pending_index,
+    get_pending_index_stats,
+)
 from .like import Like
 from .mark import Mark
 from .mixins import UserOwnedObjectMixin
 from .note import Note
-from .rating import Rating
+from .rating import Rating, RatingStats
 from .renderers import render_md
 from .review import Review
 from .shelf import Shelf, ShelfLogEntry, ShelfManager, ShelfMember, ShelfType
@@ -37,6 +43,9 @@ __all__ = [
     "FeaturedCollection",
     "Comment",
     "JournalIndex",
+    "enqueue_index_pieces",
+    "flush_pending_index",
+    "get_pending_index_stats",
     "Piece",
     "PieceInteraction",
     "PiecePost",
@@ -52,6 +61,7 @@ __all__ = [
     "Note",
     "JournalQueryParser",
     "Rating",
+    "RatingStats",
     "render_md",
     "Review",
     "Shelf",
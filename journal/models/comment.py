@@ -157,6 +157,30 @@ class Comment(Content):
 
         return ShelfMember.objects.filter(owner=self.owner, item=self.item).first()
 
+    @staticmethod
+    def prefetch_siblings(comments: "list[Comment]"):
+        """load sibling shelf member and rating grade for a list of comments in batch, to avoid queries per comment"""
+        from .shelf import ShelfMember
+
+        owner_ids = {c.owner_id for c in comments}
+        item_ids = {c.item_id for c in comments}
+        members = {
+            (m.owner_id, m.item_id): m
+            for m in ShelfMember.objects.filter(
+                owner_id__in=owner_ids, item_id__in=item_ids
+            )
+        }
+        grades = {
+            (owner_id, item_id): grade
+            for owner_id, item_id, grade in Rating.objects.filter(
+                owner_id__in=owner_ids, item_id__in=item_ids
+            ).values_list("owner_id", "item_id", "grade")
+        }
+        for c in comments:
+            k = (c.owner_id, c.item_id)
+            c.__dict__["sibling_shelfmember"] = members.get(k)
+            c.__dict__["rating_grade"] = grades.get(k) or None
+
     def to_indexable_doc(self) -> dict[str, Any]:
         if self.sibling_shelfmember:
             return {}
@@ -13,7 +13,7 @@ from django.conf import settings
 from django.core.exceptions import PermissionDenied, RequestAborted
 from django.core.signing import b62_decode, b62_encode
 from django.db import models
-from django.db.models import CharField, Q
+from django.db.models import CharField, Max, Q
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from loguru import logger
@@ -26,7 +26,7 @@ from takahe.utils import Takahe
 from users.middlewares import activate_language_for_user
 from users.models import APIdentity, User
 
-from .index import JournalIndex
+from .index import enqueue_index_pieces
 from .mixins import UserOwnedObjectMixin
 
 if TYPE_CHECKING:
@@ -244,6 +244,23 @@ class Piece(PolymorphicModel, UserOwnedObjectMixin):
         pk = self.latest_post_id
         return Takahe.get_post(pk) if pk else None
 
+    @staticmethod
+    def prefetch_latest_posts(pieces: "list[Piece]"):
+        """load latest_post_id and latest_post for a list of pieces in batch, to avoid queries per piece"""
+        from takahe.models import Post
+
+        post_ids = dict(
+            PiecePost.objects.filter(piece_id__in=[p.pk for p in pieces])
+            .values("piece_id")
+            .annotate(latest=Max("post_id"))
+            .values_list("piece_id", "latest")
+        )
+        posts = Post.objects.in_bulk(post_ids.values())
+        for p in pieces:
+            pk = post_ids.get(p.pk)
+            p.__dict__["latest_post_id"] = pk
+            p.__dict__["latest_post"] = posts.get(pk) if pk else None
+
     @cached_property
     def all_post_ids(self):
         post_ids = list(
@@ -528,18 +545,11 @@ class Piece(PolymorphicModel, UserOwnedObjectMixin):
         return post
 
     def update_index(self):
-        index = JournalIndex.instance()
-        doc = index.piece_to_doc(self)
-        if doc:
-            try:
-                index.delete_by_piece([self.pk])
-                index.replace_docs([doc])
-            except Exception as e:
-                logger.error(f"Indexing {self} error {e}")
+        enqueue_index_pieces([self.pk])
 
     def delete_index(self):
-        index = JournalIndex.instance()
-        index.delete_by_piece([self.pk])
+        # flush will remove docs of this piece since it's no longer in db then
+        enqueue_index_pieces([self.pk])
 
     def to_indexable_doc(self) -> dict[str, Any]:
         raise NotImplementedError(
@@ -1,10 +1,16 @@
 import re
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from functools import cached_property, reduce
 from typing import TYPE_CHECKING, Iterable
 
+import django_rq
 from dateutil.relativedelta import relativedelta
-from django.db.models import QuerySet
+from django.db import transaction
+from django.db.models import QuerySet, prefetch_related_objects
+from django_redis import get_redis_connection
+from loguru import logger
+from rq.job import Job
 
 from catalog.common.models import item_categories
 from catalog.models import Item
@@ -16,6 +22,15 @@ from users.models.apidentity import APIdentity
 if TYPE_CHECKING:
     from journal.models import Piece
 
+_PENDING_INDEX_KEY = "journal_pending_index_ids"
+_PENDING_INDEX_SINCE_KEY = "journal_pending_index_since"
+_PENDING_INDEX_QUEUE = "import"
+_PENDING_INDEX_JOB_ID = "journal_pending_index_flush"
+_PENDING_INDEX_DELAY = timedelta(seconds=2)
+_PENDING_INDEX_RETRY_JOB_ID = "journal_pending_index_retry"
+_PENDING_INDEX_RETRY_DELAY = timedelta(seconds=60)
+_PENDING_INDEX_BATCH_SIZE = 1000
+
 
 def _get_item_ids(doc):
     from journal.models import Collection
@@ -351,8 +366,36 @@ class JournalIndex(Index):
         doc.update(d)
         return doc
 
+    @classmethod
+    def prefetch_pieces(cls, pieces: "list[Piece]"):
+        """load everything piece_to_doc() needs for a list of pieces in a few queries"""
+        from journal.models import Collection, Comment, Piece, ShelfMember
+
+        Piece.prefetch_latest_posts(
+            [p for p in pieces if "latest_post" not in p.__dict__]
+        )
+        with_item = [
+            p
+            for p in pieces
+            if hasattr(p, "item_id") and not p._meta.get_field("item").is_cached(p)  # type:ignore
+        ]
+        items = Item.objects.in_bulk({p.item_id for p in with_item})  # type:ignore
+        for p in with_item:
+            if p.item_id in items:  # type:ignore
+                p.item = items[p.item_id]  # type:ignore
+        collections = [p for p in pieces if isinstance(p, Collection)]
+        prefetch_related_objects(collections, "members__item")
+        Item.prefetch_parent_items(
+            [p.item for p in pieces if hasattr(p, "item_id") and p.item]  # type:ignore
+            + [m.item for c in collections for m in c.members.all()]
+        )
+        ShelfMember.prefetch_siblings([p for p in pieces if isinstance(p, ShelfMember)])
+        Comment.prefetch_siblings([p for p in pieces if isinstance(p, Comment)])
+
     @classmethod
     def pieces_to_docs(cls, pieces: "Iterable[Piece]") -> list[dict]:
+        pieces = list(pieces)
+        cls.prefetch_pieces(pieces)
         docs = [cls.piece_to_doc(p) for p in pieces]
         return [d for d in docs if d]
 
@@ -382,6 +425,30 @@ class JournalIndex(Index):
 
     @classmethod
     def posts_to_docs(cls, posts: Iterable[Post]) -> list[dict]:
+        from journal.models import Piece, PiecePost, ShelfMember
+
+        posts = list(posts)
+        piece_ids: dict[int, list[int]] = {}
+        for post_id, piece_id in PiecePost.objects.filter(
+            post_id__in=[p.pk for p in posts]
+        ).values_list("post_id", "piece_id"):
+            piece_ids.setdefault(post_id, []).append(piece_id)
+        pieces = Piece.objects.in_bulk([i for ids in piece_ids.values() for i in ids])
+        selected = []
+        for post in posts:
+            # same as Post.piece
+            pcs = [pieces[i] for i in piece_ids.get(post.pk, []) if i in pieces]
+            pc = (
+                pcs[0]
+                if len(pcs) == 1
+                else next((p for p in pcs if p.__class__ == ShelfMember), None)
+            )
+            post.__dict__["piece"] = pc
+            if pc:
+                pc.latest_post = post
+                pc.latest_post_id = post.pk
+                selected.append(pc)
+        cls.prefetch_pieces(selected)
         return [cls.post_to_doc(p) for p in posts]
 
     def delete_all(self):
@@ -416,3 +483,86 @@ class JournalIndex(Index):
     ) -> JournalSearchResult:
         r = super().search(query)
         return r  # type:ignore
+
+
+def flush_pending_index():
+    """update index for all pending pieces, deleting docs for pieces that no longer exist"""
+    from journal.models import Piece
+
+    r = get_redis_connection("default")
+    since, _ = (
+        r.pipeline()
+        .get(_PENDING_INDEX_SINCE_KEY)
+        .delete(_PENDING_INDEX_SINCE_KEY)
+        .execute()
+    )
+    index = JournalIndex.instance()
+    updated = 0
+    piece_ids = r.spop(_PENDING_INDEX_KEY, _PENDING_INDEX_BATCH_SIZE)
+    while piece_ids:
+        piece_ids = [int(i) for i in piece_ids]
+        try:
+            pieces = list(Piece.objects.filter(pk__in=piece_ids))
+            index.delete_by_piece(piece_ids)
+            index.replace_docs(index.pieces_to_docs(pieces))
+        except Exception as e:
+            # put them back and schedule a retry, keep the lag from original time
+            r.pipeline().sadd(_PENDING_INDEX_KEY, *piece_ids).set(
+                _PENDING_INDEX_SINCE_KEY, since or time.time(), nx=True
+            ).execute()
+            django_rq.get_queue(_PENDING_INDEX_QUEUE).enqueue_in(
+                _PENDING_INDEX_RETRY_DELAY,
+                flush_pending_index,
+                job_id=_PENDING_INDEX_RETRY_JOB_ID,
+            )
+            logger.error(f"Journal index update error {e}")
+            raise
+        updated += len(piece_ids)
+        piece_ids = r.spop(_PENDING_INDEX_KEY, _PENDING_INDEX_BATCH_SIZE)
+    lag = time.time() - float(since) if since else 0
+    logger.info(f"Journal index updated for {updated} pieces, lag {lag:.1f}s")
+
+
+def enqueue_index_pieces(piece_ids: list[int]):
+    """
+    add pieces to the pending set to be indexed (or removed from index) shortly.
+
+    pieces are added after current transaction commits, otherwise the flush may
+    not see them yet and remove them from index instead.
+    saving one piece multiple times before the flush only results in one update;
+    a scheduled flush is not postponed by new pieces, so lag is bounded under load.
+    """
+    if not piece_ids:
+        return
+    piece_ids = list(piece_ids)
+    transaction.on_commit(lambda: _add_pending_index(piece_ids))
+
+
+def _add_pending_index(piece_ids: list[int]):
+    r = get_redis_connection("default")
+    r.pipeline().sadd(_PENDING_INDEX_KEY, *piece_ids).set(
+        _PENDING_INDEX_SINCE_KEY, time.time(), nx=True
+    ).execute()
+    try:
+        job = Job.fetch(
+            id=_PENDING_INDEX_JOB_ID,
+            connection=django_rq.get_connection(_PENDING_INDEX_QUEUE),
+        )
+        if job.get_status() in ["queued", "scheduled"]:
+            return
+    except Exception:
+        pass
+    django_rq.get_queue(_PENDING_INDEX_QUEUE).enqueue_in(
+        _PENDING_INDEX_DELAY, flush_pending_index, job_id=_PENDING_INDEX_JOB_ID
+    )
+
+
+def get_pending_index_stats() -> dict:
+    r = get_redis_connection("default")
+    pending, since = (
+        r.pipeline().scard(_PENDING_INDEX_KEY).get(_PENDING_INDEX_SINCE_KEY).execute()
+    )
+    return {
+        "pending": pending,
+        "lag": time.time() - float(since) if since else 0,
+    }
@@ -1,7 +1,8 @@
 from datetime import datetime
 from functools import cached_property
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable
 
+from django.db.models import prefetch_related_objects
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -10,10 +11,15 @@ from takahe.utils import Takahe
 from users.models import APIdentity
 
 from .comment import Comment
+from .common import Piece
 from .note import Note
 from .rating import Rating
 from .review import Review
 from .shelf import Shelf, ShelfLogEntry, ShelfManager, ShelfMember, ShelfType
+from .tag import TagMember
+
+if TYPE_CHECKING:
+    from .itemlist import ListMember
 
 
 class Mark:
@@ -27,6 +33,75 @@ class Mark:
         self.owner = owner
         self.item = item
 
+    @staticmethod
+    def bulk_load(owner: APIdentity, items: "list[Item]") -> "dict[int, Mark]":
+        """load marks of an owner for a list of items in a fixed number of queries, keyed by item id"""
+        marks = {i.pk: Mark(owner, i) for i in items}
+        Mark.prefetch(list(marks.values()))
+        return marks
+
+    @staticmethod
+    def bulk_for_members(members: "Iterable[ListMember]") -> "list[Mark]":
+        """load marks for a list of ShelfMember/TagMember/CollectionMember in a fixed number of queries"""
+        members = list(members)
+        prefetch_related_objects(members, "owner", "item")
+        marks = [m.mark for m in members]
+        Mark.prefetch(marks)
+        return marks
+
+    @staticmethod
+    def prefetch(marks: "list[Mark]"):
+        """populate shelfmember, rating, comment, review, tags and notes for a list of marks in batch"""
+        if not marks:
+            return
+        owner_ids = {m.owner.pk for m in marks}
+        item_ids = {m.item.pk for m in marks}
+
+        def _load(model, qs=None):
+            qs = qs if qs is not None else model.objects.all()
+            return {
+                (p.owner_id, p.item_id): p
+                for p in qs.filter(owner_id__in=owner_ids, item_id__in=item_ids)
+            }
+
+        missing = [m for m in marks if "shelfmember" not in m.__dict__]
+        if missing:
+            members = _load(ShelfMember)
+            for m in missing:
+                m.shelfmember = members.get((m.owner.pk, m.item.pk))
+        prefetch_related_objects(
+            [m.shelfmember for m in marks if m.shelfmember], "parent"
+        )
+        ratings = _load(Rating)
+        comments = _load(Comment)
+        reviews = _load(Review)
+        notes: dict[tuple[int, int], list[Note]] = {}
+        for n in Note.objects.filter(
+            owner_id__in=owner_ids, item_id__in=item_ids
+        ).order_by("-created_time"):
+            notes.setdefault((n.owner_id, n.item_id), []).append(n)
+        tags: dict[tuple[int, int], list[str]] = {}
+        for owner_id, item_id, title in TagMember.objects.filter(
+            parent__owner_id__in=owner_ids, item_id__in=item_ids
+        ).values_list("parent__owner_id", "item_id", "parent__title"):
+            tags.setdefault((owner_id, item_id), []).append(title)
+        pieces = []
+        for m in marks:
+            k = (m.owner.pk, m.item.pk)
+            m.rating = ratings.get(k)
+            m.rating_grade = (m.rating.grade or None) if m.rating else None
+            m.comment = comments.get(k)
+            m.review = reviews.get(k)
+            for p in [m.comment, m.review]:
+                if p:
+                    p.item = m.item
+            m.notes = notes.get(k, [])
+            m.tags = sorted(tags.get(k, []))
+            pieces += [p for p in [m.shelfmember, m.comment, m.review] if p]
+        Piece.prefetch_latest_posts(
+            [p for p in pieces if "latest_post" not in p.__dict__]
+        )
+
     @cached_property
     def shelfmember(self) -> ShelfMember | None:
         return self.owner.shelf_manager.locate_item(self.item)
@@ -1,9 +1,12 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable
 
+from django.apps import apps
+from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import Avg, Count
+from django.db import connection, models, transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete
 
 from catalog.models import Item, Performance, TVShow
 from takahe.utils import Takahe
@@ -22,6 +25,39 @@ class Rating(Content):
     grade = models.PositiveSmallIntegerField(
         default=0, validators=[MaxValueValidator(10), MinValueValidator(1)], null=True
     )
+    previous_grade: int | None = None
+    previous_item_id: int | None = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "grade" in field_names and "item_id" in field_names:
+            instance.previous_grade = instance.grade
+            instance.previous_item_id = instance.item_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"grade", "item", "item_id"} & set(update_fields):
+            self.update_stats()
+
+    def update_stats(self, deleted: bool = False):
+        """apply the change of this rating to RatingStats as deltas"""
+        old = (self.previous_item_id, self.previous_grade)
+        new = (None, None) if deleted else (self.item_id, self.grade)
+        if old == new:
+            return
+        if old[0]:
+            old_item = (
+                self.item
+                if old[0] == self.item_id
+                else Item.objects.filter(pk=old[0]).first()
+            )
+            RatingStats.update_for_rating(old_item, old[1], -1)
+        if new[0]:
+            RatingStats.update_for_rating(self.item, new[1], 1)
+        self.previous_item_id, self.previous_grade = new
 
     @property
     def ap_object(self):
@@ -75,78 +111,23 @@ class Rating(Content):
 
     @classmethod
     def get_info_for_item(cls, item: Item) -> dict:
-        stat = Rating.objects.filter(grade__isnull=False)
-        if item.__class__ in RATING_INCLUDES_CHILD_ITEMS:
-            stat = stat.filter(item_id__in=item.child_item_ids + [item.pk])
-        else:
-            stat = stat.filter(item=item)
-        stat = stat.values("grade").annotate(count=Count("grade"))
-        grades = [0] * 11
-        votes = 0
-        total = 0
-        for s in stat:
-            if s["grade"] and s["grade"] > 0 and s["grade"] < 11:
-                grades[s["grade"]] = s["count"]
-                total += s["count"] * s["grade"]
-                votes += s["count"]
-        if votes < MIN_RATING_COUNT:
-            return {"average": None, "count": votes, "distribution": [0] * 5}
-        else:
-            return {
-                "average": round(total / votes, 1),
-                "count": votes,
-                "distribution": [
-                    100 * (grades[1] + grades[2]) // votes,
-                    100 * (grades[3] + grades[4]) // votes,
-                    100 * (grades[5] + grades[6]) // votes,
-                    100 * (grades[7] + grades[8]) // votes,
-                    100 * (grades[9] + grades[10]) // votes,
-                ],
-            }
+        return RatingStats.get_for_item(item).info
+
+    @classmethod
+    def get_info_for_items(cls, items: "Iterable[Item]") -> dict[int, dict]:
+        return {pk: s.info for pk, s in RatingStats.get_for_items(items).items()}
 
     @staticmethod
     def get_rating_for_item(item: Item) -> float | None:
-        stat = Rating.objects.filter(grade__isnull=False)
-        if item.__class__ in RATING_INCLUDES_CHILD_ITEMS:
-            stat = stat.filter(item_id__in=item.child_item_ids + [item.pk])
-        else:
-            stat = stat.filter(item=item)
-        stat = stat.aggregate(average=Avg("grade"), count=Count("item"))
-        return round(stat["average"], 1) if stat["count"] >= MIN_RATING_COUNT else None
+        return RatingStats.get_for_item(item).info["average"]
 
     @staticmethod
     def get_rating_count_for_item(item: Item) -> int:
-        stat = Rating.objects.filter(grade__isnull=False)
-        if item.__class__ in RATING_INCLUDES_CHILD_ITEMS:
-            stat = stat.filter(item_id__in=item.child_item_ids + [item.pk])
-        else:
-            stat = stat.filter(item=item)
-        stat = stat.aggregate(count=Count("item"))
-        return stat["count"]
+        return RatingStats.get_for_item(item).count
 
     @staticmethod
     def get_rating_distribution_for_item(item: Item):
-        stat = Rating.objects.filter(grade__isnull=False)
-        if item.__class__ in RATING_INCLUDES_CHILD_ITEMS:
-            stat = stat.filter(item_id__in=item.child_item_ids + [item.pk])
-        else:
-            stat = stat.filter(item=item)
-        stat = stat.values("grade").annotate(count=Count("grade")).order_by("grade")
-        g = [0] * 11
-        t = 0
-        for s in stat:
-            g[s["grade"]] = s["count"]
-            t += s["count"]
-        if t < MIN_RATING_COUNT:
-            return [0] * 5
-        r = [
-            100 * (g[1] + g[2]) // t,
-            100 * (g[3] + g[4]) // t,
-            100 * (g[5] + g[6]) // t,
-            100 * (g[7] + g[8]) // t,
-            100 * (g[9] + g[10]) // t,
-        ]
-        return r
+        return RatingStats.get_for_item(item).info["distribution"]
 
     @staticmethod
     def update_item_rating(
@@ -175,3 +156,174 @@ class Rating(Content):
     def to_indexable_doc(self) -> dict[str, Any]:
         # rating is not indexed individually but with shelfmember
         return {}
+
+
+class RatingStats(models.Model):
+    """
+    Rating count, sum and histogram of an item, rolled up with its child items if
+    the item class is in RATING_INCLUDES_CHILD_ITEMS.
+
+    It's created on first read or rating, and updated by Rating as deltas afterwards,
+    use `manage.py catalog --rating-stats` to rebuild it if drifted.
+    """
+
+    # no db constraint as item may be read (hence stats created) while being deleted
+    item = models.OneToOneField(
+        Item,
+        primary_key=True,
+        db_constraint=False,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    count = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    histogram = ArrayField(models.IntegerField(), size=11)  # count of each grade
+
+    @property
+    def info(self) -> dict:
+        votes = self.count
+        g = self.histogram
+        if votes < MIN_RATING_COUNT:
+            return {"average": None, "count": votes, "distribution": [0] * 5}
+        return {
+            "average": round(self.total / votes, 1),
+            "count": votes,
+            "distribution": [
+                100 * (g[1] + g[2]) // votes,
+                100 * (g[3] + g[4]) // votes,
+                100 * (g[5] + g[6]) // votes,
+                100 * (g[7] + g[8]) // votes,
+                100 * (g[9] + g[10]) // votes,
+            ],
+        }
+
+    @staticmethod
+    def rollup_item_ids(item: Item) -> list[int]:
+        parent = item.parent_item
+        if parent and parent.__class__ in RATING_INCLUDES_CHILD_ITEMS:
+            return [item.pk, parent.pk]
+        return [item.pk]
+
+    @classmethod
+    def from_histogram(cls, item_id: int, histogram: list[int]) -> "RatingStats":
+        return cls(
+            item_id=item_id,
+            count=sum(histogram),
+            total=sum(grade * c for grade, c in enumerate(histogram)),
+            histogram=histogram,
+        )
+
+    @staticmethod
+    def _child_parent_pairs(parent_ids: list[int] | None = None):
+        for parent_class in RATING_INCLUDES_CHILD_ITEMS:
+            child_class = apps.get_model("catalog", parent_class.child_class)
+            children = child_class.objects.filter(
+                show__isnull=False, is_deleted=False, merged_to_item__isnull=True
+            )
+            if parent_ids is not None:
+                children = children.filter(show_id__in=parent_ids)
+            yield from children.values_list("pk", "show_id").iterator()
+
+    @classmethod
+    def compute_for_items(cls, items: "list[Item]") -> "list[RatingStats]":
+        targets: dict[int, list[int]] = {}  # rated item id -> item ids to count in
+        for item in items:
+            targets.setdefault(item.pk, []).append(item.pk)
+        parent_ids = [i.pk for i in items if i.__class__ in RATING_INCLUDES_CHILD_ITEMS]
+        if parent_ids:
+            for child_id, parent_id in cls._child_parent_pairs(parent_ids):
+                targets.setdefault(child_id, []).append(parent_id)
+        histograms = {item.pk: [0] * 11 for item in items}
+        stat = (
+            Rating.objects.filter(
+                grade__gte=1, grade__lte=10, item_id__in=list(targets.keys())
+            )
+            .values("item_id", "grade")
+            .annotate(count=Count("grade"))
+            .order_by()
+        )
+        for s in stat:
+            for target_id in targets[s["item_id"]]:
+                histograms[target_id][s["grade"]] += s["count"]
+        return [cls.from_histogram(k, v) for k, v in histograms.items()]
+
+    @classmethod
+    def get_for_items(cls, items: "Iterable[Item]") -> "dict[int, RatingStats]":
+        items = list(items)
+        stats = {s.pk: s for s in cls.objects.filter(item_id__in=[i.pk for i in items])}
+        missing = [i for i in items if i.pk not in stats]
+        if missing:
+            computed = cls.compute_for_items(missing)
+            cls.objects.bulk_create(computed, ignore_conflicts=True)
+            stats.update({s.pk: s for s in computed})
+        return stats
+
+    @classmethod
+    def get_for_item(cls, item: Item) -> "RatingStats":
+        return cls.get_for_items([item])[item.pk]
+
+    @classmethod
+    def update_for_rating(cls, item: Item | None, grade: int | None, delta: int):
+        """add delta to stats of item and its parent, missing rows are computed from ratings"""
+        if not item or not grade or grade < 1 or grade > 10:
+            return
+        item_ids = cls.rollup_item_ids(item)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {cls._meta.db_table} SET count = count + %s, total = total + %s, histogram[%s] = histogram[%s] + %s WHERE item_id = ANY(%s) RETURNING item_id",
+                [
+                    delta,
+                    delta * grade,
+                    grade + 1,
+                    grade + 1,
+                    delta,
+                    item_ids,
+                ],
+            )
+            updated = {r[0] for r in cursor.fetchall()}
+        if len(updated) < len(item_ids):
+            # a concurrent get_for_items() may be inserting rows computed before this
+            # rating, upsert current ones so that stale rows are ignored on conflict
+            items = [item, item.parent_item]
+            missing = [
+                i for i in items if i and i.pk in item_ids and i.pk not in updated
+            ]
+            cls.objects.bulk_create(
+                cls.compute_for_items(missing),
+                update_conflicts=True,
+                unique_fields=["item"],
+                update_fields=["count", "total", "histogram"],
+            )
+        Item.bump_page_cache_version(item_ids)
+
+    @classmethod
+    def rebuild(cls, batch_size: int = 1000) -> int:
+        histograms: dict[int, list[int]] = {}
+        stat = (
+            Rating.objects.filter(grade__gte=1, grade__lte=10)
+            .values("item_id", "grade")
+            .annotate(count=Count("grade"))
+            .order_by()
+        )
+        for s in stat.iterator():
+            histograms.setdefault(s["item_id"], [0] * 11)[s["grade"]] = s["count"]
+        rollups = {k: v.copy() for k, v in histograms.items()}
+        for child_id, parent_id in cls._child_parent_pairs():
+            h = histograms.get(child_id)
+            if h:
+                r = rollups.setdefault(parent_id, [0] * 11)
+                rollups[parent_id] = [a + b for a, b in zip(r, h)]
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                [cls.from_histogram(k, v) for k, v in rollups.items()],
+                batch_size=batch_size,
+            )
+        return len(rollups)
+
+
+def _rating_post_delete_handler(sender, instance: Rating, **kwargs):
+    instance.update_stats(deleted=True)
+
+
+post_delete.connect(_rating_post_delete_handler, sender=Rating)
@@ -349,6 +349,15 @@ class ShelfMember(ListMember):
             models.Index(fields=["parent_id", "visibility", "created_time"]),
         ]
 
+    previous_created_time: datetime | None = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "created_time" in field_names:
+            instance.previous_created_time = instance.created_time
+        return instance
+
     @property
     def ap_object(self):
         return {
@@ -480,6 +489,10 @@ class ShelfMember(ListMember):
             del self._comment_text  # type:ignore
         except AttributeError:
             pass
+        try:
+            del self._tags  # type:ignore
+        except AttributeError:
+            pass
         return super().save(*args, **kwargs)
 
     @cached_property
@@ -494,6 +507,36 @@ class ShelfMember(ListMember):
 
         return Rating.objects.filter(owner=self.owner, item=self.item).first()
 
+    @staticmethod
+    def prefetch_siblings(members: "list[ShelfMember]"):
+        """load sibling rating, comment and tags for a list of members in batch, to avoid queries per member"""
+        from .comment import Comment
+        from .rating import Rating
+        from .tag import TagMember
+
+        owner_ids = {m.owner_id for m in members}
+        item_ids = {m.item_id for m in members}
+        ratings = {
+            (r.owner_id, r.item_id): r
+            for r in Rating.objects.filter(owner_id__in=owner_ids, item_id__in=item_ids)
+        }
+        comments = {
+            (c.owner_id, c.item_id): c
+            for c in Comment.objects.filter(
+                owner_id__in=owner_ids, item_id__in=item_ids
+            )
+        }
+        tags: dict[tuple[int, int], list[str]] = {}
+        for owner_id, item_id, title in TagMember.objects.filter(
+            parent__owner_id__in=owner_ids, item_id__in=item_ids
+        ).values_list("parent__owner_id", "item_id", "parent__title"):
+            tags.setdefault((owner_id, item_id), []).append(title)
+        for m in members:
+            k = (m.owner_id, m.item_id)
+            m.__dict__["sibling_rating"] = ratings.get(k)
+            m.__dict__["sibling_comment"] = comments.get(k)
+            m._tags = sorted(tags.get(k, []))  # type:ignore
+
     @cached_property
     def mark(self) -> "Mark":
         from .mark import Mark
@@ -529,7 +572,10 @@ class ShelfMember(ListMember):
 
     @property
     def tags(self):
-        return self.mark.tags
+        try:
+            return getattr(self, "_tags")
+        except AttributeError:
+            return self.mark.tags
 
     def ensure_log_entry(self):
         log, _ = ShelfLogEntry.objects.get_or_create(
@@ -106,6 +106,32 @@ class TagManager:
         )
         return tag_titles
 
+    @staticmethod
+    def indexable_tags_for_items(items) -> dict[int, list[str]]:
+        """same as indexable_tags_for_item() but for a list of items in one query"""
+        tags = (
+            TagMember.objects.filter(
+                item_id__in=[i.pk for i in items], parent__visibility=0
+            )
+            .values("item_id", "parent__title")
+            .annotate(frequency=Count("id"))
+            .order_by("item_id", "-frequency")
+        )
+        titles: dict[int, list[str]] = {i.pk: [] for i in items}
+        for t in tags:
+            if len(titles[t["item_id"]]) < 20:
+                titles[t["item_id"]].append(t["parent__title"])
+        return {
+            pk: sorted(
+                [
+                    t
+                    for t in set(map(lambda t: Tag.deep_cleanup_title(t), v))
+                    if t and t != "_"
+                ]
+            )
+            for pk, v in titles.items()
+        }
+
     @staticmethod
     def tag_item_for_owner(
         owner: APIdentity,
@@ -27,6 +27,18 @@ def user_stats_of(collection: Collection, identity: APIdentity):
     return collection.get_stats(identity) if identity else {}
 
 
+@register.simple_tag()
+def featured_collections_of(identity: APIdentity):
+    """featured collections of identity, with stats of each loaded in batch"""
+    if not identity:
+        return []
+    collections = list(identity.featured_collections.all())
+    stats = Collection.get_stats_for_collections(collections, identity)
+    for collection in collections:
+        collection.stats = stats[collection.pk]
+    return collections
+
+
 @register.simple_tag()
 def prural_items(count: int, category: str):
     match category:
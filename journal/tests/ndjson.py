@@ -9,6 +9,7 @@ from loguru import logger
 
 from catalog.models import (
     Edition,
+    ExternalResource,
     IdType,
     Movie,
     Podcast,
@@ -504,3 +505,36 @@ class NdjsonExportImportTest(TestCase):
         l1 = [(log.item, log.shelf_type, log.timestamp) for log in logs]
         l2 = [(log.item, log.shelf_type, log.timestamp) for log in logs2]
         self.assertEqual(l1, l2)
+
+    def test_get_items_by_links(self):
+        importer = NdjsonImporter.create(user=self.user2, file="")
+        merged = Edition.objects.create(title="Hyperion (old)")
+        merged.merge_to(self.book1)
+        ExternalResource.objects.create(
+            item=self.movie1,
+            id_type=IdType.IMDB,
+            id_value="tt1375666",
+            url="https://www.imdb.com/title/tt1375666/",
+        )
+        links = {
+            "a": [self.book2.absolute_url, "https://www.imdb.com/title/tt1375666/"],
+            "b": [merged.absolute_url],
+            "c": ["https://other.site/book/1", "https://www.imdb.com/title/tt1375666"],
+            "d": ["not a link"],
+        }
+        items = importer.get_items_by_links({k: links[k] for k in "abc"})
+        # uids, merged items, external resources and their items, by item types
+        with self.assertNumQueries(7):
+            items = importer.get_items_by_links({k: links[k] for k in "abc"})
+        self.assertEqual(items, {"a": self.book2, "b": self.book1, "c": self.movie1})
+        self.assertIsNone(importer.get_items_by_links(links)["d"])
+
+    def test_progress(self):
+        importer = NdjsonImporter.create(user=self.user2, file="")
+        importer.metadata["total"] = 4
+        with self.assertNumQueries(2):
+            for result in ["imported", "skipped", "failed", "imported"]:
+                importer.progress(result)  # type: ignore
+        importer.refresh_from_db()
+        self.assertEqual(importer.metadata["processed"], 4)
+        self.assertIn("2 imported, 1 skipped, 1 failed", importer.message)
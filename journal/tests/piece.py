@@ -1,8 +1,10 @@
 import time
+from datetime import timedelta
 
 from django.test import TestCase
+from django.utils import timezone
 
-from catalog.models import Edition
+from catalog.models import Edition, ItemCategory
 from journal.models.common import Debris
 from users.models import User
 
@@ -45,6 +47,33 @@ class CollectionTest(TestCase):
             return
         self.assertEqual(member2.note, "test")  # type: ignore
 
+    def test_collection_stats(self):
+        c1 = Collection.objects.create(title="c1", owner=self.user.identity)
+        c2 = Collection.objects.create(title="c2", owner=self.user.identity)
+        c3 = Collection.objects.create(title="c3", owner=self.user.identity)
+        c1.append_item(self.book1)
+        c1.append_item(self.book2)
+        c2.append_item(self.book2)
+        Mark(self.user.identity, self.book1).update(ShelfType.COMPLETE)
+        Mark(self.user.identity, self.book2).update(ShelfType.WISHLIST)
+        stats = c1.get_stats(self.user.identity)
+        self.assertEqual(stats["total"], 2)
+        self.assertEqual(stats["complete"], 1)
+        self.assertEqual(stats["wishlist"], 1)
+        self.assertEqual(stats["progress"], 0)
+        self.assertEqual(stats["percentage"], 50)
+        with self.assertNumQueries(1):
+            stats = Collection.get_stats_for_collections(
+                [c1, c2, c3], self.user.identity
+            )
+        self.assertEqual(stats[c2.pk]["total"], 1)
+        self.assertEqual(stats[c2.pk]["wishlist"], 1)
+        self.assertEqual(stats[c2.pk]["percentage"], 0)
+        self.assertEqual(stats[c3.pk]["total"], 0)
+        self.assertEqual(c1.get_progress(self.user.identity), 50)
+        other = User.register(email="x@b.com", username="other")
+        self.assertEqual(c1.get_stats(other.identity)["complete"], 0)
+
 
 class ShelfTest(TestCase):
     databases = "__all__"
@@ -220,6 +249,191 @@ class MarkTest(TestCase):
         mark = Mark(self.user1.identity, self.book1)
         self.assertEqual(mark.tags, ["Sci-Fi", "fic"])
 
+    def test_bulk_load(self):
+        book2 = Edition.objects.create(title="Andymion")
+        Mark(self.user1.identity, self.book1).update(
+            ShelfType.PROGRESS, "a comment", 8, ["scifi"], 0
+        )
+        Review.update_item_review(self.book1, self.user1.identity, "Critic", "Review")
+        marks = Mark.bulk_load(self.user1.identity, [self.book1, book2])
+        with self.assertNumQueries(0):
+            mark = marks[self.book1.pk]
+            self.assertEqual(mark.shelf_type, ShelfType.PROGRESS)
+            self.assertEqual(mark.comment_text, "a comment")
+            self.assertEqual(mark.rating_grade, 8)
+            self.assertEqual(mark.tags, ["scifi"])
+            self.assertEqual(mark.review.title, "Critic")  # type:ignore
+            self.assertEqual(list(mark.notes), [])
+            mark = marks[book2.pk]
+            self.assertIsNone(mark.shelf_type)
+            self.assertIsNone(mark.comment)
+            self.assertEqual(mark.tags, [])
+        members = self.user1.identity.shelf_manager.get_latest_members(
+            ShelfType.PROGRESS
+        )
+        marks = Mark.bulk_for_members(members)
+        with self.assertNumQueries(0):
+            self.assertEqual(marks[0].rating_grade, 8)
+            self.assertEqual(marks[0].comment_text, "a comment")
+
+    def test_bulk_posting(self):
+        from takahe.models import Post, TimelineEvent
+        from takahe.utils import Takahe
+
+        book2 = Edition.objects.create(title="Andymion")
+        old = timezone.now() - timedelta(days=400)
+        identity = self.user1.identity
+        posts = Post.objects.filter(author_id=identity.pk)
+        with Takahe.bulk_posting():
+            Mark(identity, self.book1).update(
+                ShelfType.COMPLETE, "a #scifi :blobcat:", 8, created_time=old
+            )
+            Mark(identity, book2).update(ShelfType.WISHLIST, created_time=old)
+            self.assertEqual(posts.count(), 0)
+            # recent marks are posted as usual after pending ones are saved
+            Mark(identity, book2).update(ShelfType.PROGRESS)
+            self.assertEqual(posts.count(), 3)
+            post = posts.get(published=old, hashtags__isnull=False)
+            self.assertEqual(post.state, "fanned_out")
+            self.assertEqual(post.object_uri, post.urls.object_uri)
+            self.assertEqual(post.hashtags, ["scifi"])
+            # pending posts are saved before being edited
+            book3 = Edition.objects.create(title="Ilium")
+            Mark(identity, book3).update(ShelfType.WISHLIST, created_time=old)
+            self.assertEqual(posts.count(), 3)
+            Mark(identity, book3).update(ShelfType.WISHLIST, "a comment")
+            self.assertEqual(posts.count(), 4)
+        self.assertEqual(posts.count(), 4)
+        self.assertEqual(
+            TimelineEvent.objects.filter(identity_id=identity.pk).count(), 4
+        )
+
+    def test_bulk_posting_error(self):
+        from takahe.models import Post
+        from takahe.utils import Takahe
+
+        old = timezone.now() - timedelta(days=400)
+        identity = self.user1.identity
+        with self.assertRaises(ValueError):
+            with Takahe.bulk_posting():
+                Mark(identity, self.book1).update(ShelfType.WISHLIST, created_time=old)
+                raise ValueError()
+        # pending post of saved mark is not lost
+        post = Mark(identity, self.book1).shelfmember.latest_post  # type:ignore
+        self.assertIsNotNone(post)
+        self.assertTrue(Post.objects.filter(pk=post.pk).exists())  # type:ignore
+
+    def test_bulk_posting_rollback(self):
+        from django.db import transaction
+
+        from takahe.models import Post
+        from takahe.utils import Takahe
+
+        old = timezone.now() - timedelta(days=400)
+        identity = self.user1.identity
+        with self.assertRaises(ValueError):
+            with transaction.atomic(), Takahe.bulk_posting(discard_on_error=True):
+                Mark(identity, self.book1).update(ShelfType.WISHLIST, created_time=old)
+                raise ValueError()
+        # pending post of rolled back mark is not saved
+        self.assertIsNone(Mark(identity, self.book1).shelfmember)
+        self.assertFalse(Post.objects.filter(author_id=identity.pk).exists())
+
+    def test_bulk_posting_discard(self):
+        from takahe.models import Post
+        from takahe.utils import Takahe
+
+        book2 = Edition.objects.create(title="Andymion")
+        old = timezone.now() - timedelta(days=400)
+        identity = self.user1.identity
+        posts = Post.objects.filter(author_id=identity.pk)
+        with Takahe.bulk_posting():
+            # pending post is dropped
+            with Takahe.recording_new_posts() as new_posts:
+                Mark(identity, self.book1).update(ShelfType.WISHLIST, created_time=old)
+            self.assertEqual(len(new_posts), 1)
+            Takahe.discard_posts(new_posts)
+            # saved post is deleted
+            with Takahe.recording_new_posts() as new_posts:
+                Mark(identity, book2).update(ShelfType.PROGRESS)
+            self.assertEqual(len(new_posts), 1)
+            Takahe.discard_posts(new_posts)
+        self.assertEqual(posts.exclude(state="deleted").count(), 0)
+        self.assertEqual(posts.count(), 1)
+
+
+class ItemPageCacheTest(TestCase):
+    databases = "__all__"
+
+    def test_page_cache_version(self):
+        book = Edition.objects.create(title="Hyperion")
+        user = User.register(email="a@b.com", username="user")
+
+        def changed():
+            v = book.page_cache_version
+            del book.page_cache_version
+            return book.page_cache_version != v
+
+        book.page_cache_version
+        book.title = "Hyperion 2"
+        book.save()
+        self.assertTrue(changed())
+        Mark(user.identity, book).update(ShelfType.WISHLIST, None, 8, None, 0)
+        self.assertTrue(changed())
+        TagManager.tag_item_for_owner(user.identity, book, ["scifi"])
+        self.assertTrue(changed())
+        collection = Collection.objects.create(owner=user.identity, title="c")
+        collection.append_item(book)
+        self.assertTrue(changed())
+        self.assertFalse(changed())
+
+
+class MarkCounterTest(TestCase):
+    databases = "__all__"
+
+    def test_mark_counter(self):
+        from catalog.jobs.discover import MarkCounter
+
+        MarkCounter.rebuild()
+        book1 = Edition.objects.create(title="Hyperion")
+        book2 = Edition.objects.create(title="Endymion")
+        users = [
+            User.register(email=f"u{i}@b.com", username=f"user{i}") for i in range(3)
+        ]
+        for u in users:
+            Mark(u.identity, book1).update(ShelfType.WISHLIST, None, None, None, 0)
+        Mark(users[0].identity, book2).update(ShelfType.PROGRESS, None, None, None, 0)
+        Mark(users[1].identity, book2).update(
+            ShelfType.PROGRESS,
+            None,
+            None,
+            None,
+            0,
+            created_time=timezone.now() - timedelta(days=30),
+        )
+
+        def top(days, min_marks=1):
+            return MarkCounter.get_top_item_ids(ItemCategory.Book, days, min_marks, 10)
+
+        self.assertEqual(top(6), [book1.pk, book2.pk])
+        self.assertEqual(top(6, 2), [book1.pk])
+        self.assertEqual(top(96), [book1.pk, book2.pk])
+        self.assertEqual(
+            MarkCounter.get_counts(ItemCategory.Book, 96, [book1.pk, book2.pk]),
+            {book1.pk: 3, book2.pk: 2},
+        )
+        self.assertEqual(MarkCounter.get_top_item_ids(ItemCategory.Movie, 6, 1, 10), [])
+        Mark(users[0].identity, book2).update(ShelfType.COMPLETE, None, None, None, 0)
+        Mark(users[1].identity, book1).delete()
+        expected = {book1.pk: 2, book2.pk: 2}
+        counts = MarkCounter.get_counts(ItemCategory.Book, 96, [book1.pk, book2.pk])
+        self.assertEqual(counts, expected)
+        MarkCounter.rebuild()
+        counts = MarkCounter.get_counts(ItemCategory.Book, 96, [book1.pk, book2.pk])
+        self.assertEqual(counts, expected)
+        counts = MarkCounter.get_counts(ItemCategory.Book, 6, [book1.pk, book2.pk])
+        self.assertEqual(counts, {book1.pk: 2, book2.pk: 1})
+
 
 class DebrisTest(TestCase):
     databases = "__all__"
@@ -2,7 +2,8 @@ from django.test import TestCase
 
 from catalog.common.models import Item
 from catalog.models import Edition, IdType, Movie, TVEpisode, TVSeason, TVShow
-from journal.models.rating import Rating
+from journal.models import TagManager
+from journal.models.rating import Rating, RatingStats
 from users.models import User
 
 
@@ -199,3 +200,68 @@ class RatingTest(TestCase):
 
         # The average should consider all ratings (6 + 5*10 = 56, divided by 6 = 9.3)
         self.assertEqual(tvshow_info["average"], 9.3)
+
+    def test_rating_stats(self):
+        """Test rating stats are updated as deltas and match a rebuild."""
+        for i in range(1, 6):
+            Rating.update_item_rating(
+                self.tvseason, self.users[i].identity, 8, visibility=1
+            )
+        self.assertEqual(Rating.get_info_for_item(self.tvshow)["count"], 5)
+        self.assertEqual(Rating.get_info_for_item(self.tvseason)["average"], 8.0)
+
+        # change grade of existing rating, parent stats should follow
+        Rating.update_item_rating(self.tvseason, self.users[1].identity, 3)
+        stats = RatingStats.objects.get(item=self.tvshow)
+        self.assertEqual(stats.count, 5)
+        self.assertEqual(stats.total, 35)
+        self.assertEqual(stats.histogram[3], 1)
+        self.assertEqual(stats.histogram[8], 4)
+
+        # delete and move rating to another item
+        Rating.update_item_rating(self.tvseason, self.users[2].identity, None)
+        r = Rating.objects.get(owner=self.users[3].identity, item=self.tvseason)
+        r.item = self.movie
+        r.save(update_fields=["item_id"])
+        self.assertEqual(Rating.get_rating_count_for_item(self.tvshow), 3)
+        self.assertEqual(Rating.get_rating_count_for_item(self.tvseason), 3)
+        self.assertEqual(Rating.get_rating_count_for_item(self.movie), 1)
+
+        before = {
+            s.pk: (s.count, s.total, s.histogram)
+            for s in RatingStats.objects.exclude(count=0)
+        }
+        RatingStats.rebuild()
+        after = {
+            s.pk: (s.count, s.total, s.histogram) for s in RatingStats.objects.all()
+        }
+        self.assertEqual(before, after)
+
+    def test_rating_stats_race(self):
+        """Test rating saved while stats of the item are being created."""
+        RatingStats.objects.filter(item=self.movie).delete()
+        # get_for_items() computed stats before the rating, and inserts them after
+        stale = RatingStats.compute_for_items([self.movie])
+        Rating.update_item_rating(self.movie, self.users[0].identity, 7)
+        RatingStats.objects.bulk_create(stale, ignore_conflicts=True)
+        stats = RatingStats.get_for_item(self.movie)
+        self.assertEqual(stats.count, 1)
+        self.assertEqual(stats.total, 7)
+
+    def test_prefetch_rating_info(self):
+        """Test batch loaded rating info and tags match single item ones."""
+        for i, user in enumerate(self.users):
+            Rating.update_item_rating(self.book, user.identity, i + 1)
+            Rating.update_item_rating(self.tvseason, user.identity, 10 - i // 2)
+            TagManager.tag_item_for_owner(user.identity, self.book, [f"t{i % 3}"])
+        items = [
+            Item.objects.get(pk=i.pk)
+            for i in [self.book, self.movie, self.tvshow, self.tvseason]
+        ]
+        Item.prefetch_rating_info(items)
+        Item.prefetch_tags(items)
+        for i in items:
+            self.assertEqual(i.rating_info, Rating.get_info_for_item(i))
+            self.assertEqual(i.tags, TagManager.indexable_tags_for_item(i))
+        self.assertEqual(items[2].rating_count, 10)
+        self.assertEqual(items[0].tags, ["t0", "t1", "t2"])
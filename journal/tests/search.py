@@ -1,6 +1,11 @@
+from unittest.mock import patch
+
+import django_rq
+from django.db import transaction
 from django.test import TestCase
 
-from catalog.models import Edition
+from catalog.models import Edition, TVEpisode, TVSeason, TVShow
+from takahe.models import Post
 from users.models import User
 
 from ..models import *
@@ -15,13 +20,91 @@ class SearchTest(TestCase):
         self.user1 = User.register(email="x@y.com", username="userx")
         self.index = JournalIndex.instance()
         self.index.delete_by_owner([self.user1.identity.pk])
+        flush_pending_index()
+
+    def owned_pieces(self):
+        owner = self.user1.identity
+        return [
+            *ShelfMember.objects.filter(owner=owner),
+            *Comment.objects.filter(owner=owner),
+            *Rating.objects.filter(owner=owner),
+            *Collection.objects.filter(owner=owner),
+        ]
 
     def test_post(self):
-        mark = Mark(self.user1.identity, self.book1)
-        mark.update(ShelfType.WISHLIST, "a gentle comment", 9, ["Sci-Fi", "fic"], 0)
-        mark = Mark(self.user1.identity, self.book2)
-        mark.update(ShelfType.WISHLIST, "a gentle comment", None, ["nonfic"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark = Mark(self.user1.identity, self.book1)
+            mark.update(ShelfType.WISHLIST, "a gentle comment", 9, ["Sci-Fi", "fic"], 0)
+            mark = Mark(self.user1.identity, self.book2)
+            mark.update(ShelfType.WISHLIST, "a gentle comment", None, ["nonfic"], 1)
+        self.assertGreater(get_pending_index_stats()["pending"], 0)
+        flush_pending_index()
+        self.assertEqual(get_pending_index_stats()["pending"], 0)
         q = JournalQueryParser("gentle")
         q.filter_by_owner(self.user1.identity)
         r = self.index.search(q)
         self.assertEqual(r.total, 2)
+
+    def test_index_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Mark(self.user1.identity, self.book1).update(ShelfType.WISHLIST)
+                self.assertEqual(get_pending_index_stats()["pending"], 0)
+            self.assertEqual(get_pending_index_stats()["pending"], 0)
+        self.assertGreater(get_pending_index_stats()["pending"], 0)
+
+    def test_index_retry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Mark(self.user1.identity, self.book1).update(ShelfType.WISHLIST)
+        with patch.object(self.index, "replace_docs", side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                flush_pending_index()
+        stats = get_pending_index_stats()
+        self.assertGreater(stats["pending"], 0)
+        self.assertGreater(stats["lag"], 0)
+        registry = django_rq.get_queue("import").scheduled_job_registry
+        self.assertIn("journal_pending_index_retry", registry.get_job_ids())
+        flush_pending_index()
+        self.assertEqual(get_pending_index_stats(), {"pending": 0, "lag": 0})
+
+    def test_prefetch(self):
+        mark = Mark(self.user1.identity, self.book1)
+        mark.update(ShelfType.WISHLIST, "a gentle comment", 9, ["Sci-Fi", "fic"], 0)
+        mark = Mark(self.user1.identity, self.book2)
+        mark.update(ShelfType.PROGRESS, None, None, ["nonfic"], 1)
+        members = list(ShelfMember.objects.filter(owner=self.user1.identity))
+        docs = [JournalIndex.piece_to_doc(m) for m in members]
+        members = list(ShelfMember.objects.filter(owner=self.user1.identity))
+        Piece.prefetch_latest_posts(members)
+        ShelfMember.prefetch_siblings(members)
+        member = next(m for m in members if m.item_id == self.book1.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(member.tags, ["Sci-Fi", "fic"])
+            self.assertEqual(member.sibling_rating.grade, 9)  # type:ignore
+            self.assertIsNotNone(member.latest_post)
+        self.assertEqual(JournalIndex.pieces_to_docs(members), docs)
+
+    def test_pieces_to_docs(self):
+        show = TVShow.objects.create(title="Dark")
+        season = TVSeason.objects.create(title="Season 1", show=show)
+        episode = TVEpisode.objects.create(title="Secrets", season=season)
+        Mark(self.user1.identity, self.book1).update(
+            ShelfType.COMPLETE, "a gentle comment", 8, ["scifi"], 0
+        )
+        Mark(self.user1.identity, season).update(ShelfType.PROGRESS, "so dark", 7)
+        Comment.objects.create(
+            owner=self.user1.identity, item=episode, text="time travel"
+        )
+        collection = Collection.objects.create(
+            owner=self.user1.identity, title="my list"
+        )
+        collection.append_item(self.book2, note="a note")
+        collection.append_item(episode)
+        docs = [JournalIndex.piece_to_doc(p) for p in self.owned_pieces()]
+        docs = [d for d in docs if d]
+        self.assertEqual(JournalIndex.pieces_to_docs(self.owned_pieces()), docs)
+        posts = list(Post.objects.filter(author_id=self.user1.identity.pk))
+        self.assertEqual(
+            JournalIndex.posts_to_docs(posts),
+            [JournalIndex.post_to_doc(p) for p in posts],
+        )
@@ -199,12 +199,17 @@ def collection_retrieve_items(
     if last_pos:
         last_member = int_(request.GET.get("last_member"))
         members = members.filter(position__gte=last_pos).exclude(id=last_member)
+    members = list(members[:20].prefetch_related("item"))
+    if request.user.is_authenticated:
+        marks = Mark.bulk_load(request.user.identity, [m.item for m in members])
+        for m in members:
+            m.viewer_mark = marks[m.item_id]
     return render(
         request,
         "collection_items.html",
         {
             "collection": collection,
-            "members": members[:20],
+            "members": members,
             "collection_edit": edit or request.GET.get("edit"),
             "msg": msg,
         },
@@ -103,6 +103,8 @@ def render_list(
     paginator = CustomPaginator(queryset, request)  # type:ignore
     page_number = int(request.GET.get("page", default=1))
     members = paginator.get_page(page_number)
+    if type != "review":
+        Mark.bulk_for_members(members)
     pagination = PageLinksGenerator(page_number, paginator.num_pages, request.GET)
     shelf_labels = (
         ShelfManager.get_labels_for_category(item_category) if item_category else []
@@ -62,3 +62,31 @@ class TakaheStats(BaseJob):
         # disable /api/v1/instance/activity for now as it's slow
         cache.set("instance_activity_stats", [], timeout=None)
         logger.info("Tahake stats updated.")
+
+
+@JobManager.register
+class PostStatsReconciler(BaseJob):
+    """
+    recalculate stats of posts with interactions or replies changed since last run
+
+    stats are maintained incrementally as posts are interacted with or replied to,
+    this job repairs drift of those counters, e.g. from concurrent or failed updates.
+    """
+
+    interval = timedelta(hours=1)
+    batch_size = 1000
+
+    def run(self):
+        changed = 0
+        total = 0
+        pks = Post.pop_stats_changed(self.batch_size)
+        while pks:
+            try:
+                changed += Post.reconcile_stats(list(Post.objects.filter(pk__in=pks)))
+            except Exception:
+                # put them back so next run will retry
+                Post.add_stats_changed(pks)
+                raise
+            total += len(pks)
+            pks = Post.pop_stats_changed(self.batch_size)
+        logger.info(f"Post stats reconciled, {changed} of {total} posts updated.")
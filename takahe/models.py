@@ -22,6 +22,7 @@ from django.template.defaultfilters import linebreaks_filter
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
+from django_redis import get_redis_connection
 from lxml import etree
 
 from .html import ContentRenderer, FediverseHtmlParser
@@ -999,6 +1000,9 @@ class PostManager(models.Manager):
     #     return self.get_queryset().tagged_with(hashtag=hashtag)
 
 
+_STATS_CHANGED_KEY = "post_stats_changed"
+
+
 class Post(models.Model):
     """
     A post (status, toot) that is either local or remote.
@@ -1234,15 +1238,8 @@ class Post(models.Model):
                     visibility = reply_to.Visibilities.local_only
             # Find emoji in this post
             emojis = Emoji.emojis_from_content(content, None)
-            # Strip all unwanted HTML and apply linebreaks filter, grabbing hashtags on the way
-            parser = FediverseHtmlParser(linebreaks_filter(content), find_hashtags=True)
-            content = (
-                parser.html.replace("<p>", "<p>" + raw_prepend_content, 1)
-                + raw_append_content
-            )
-            hashtags = (
-                sorted([tag[: Hashtag.MAXIMUM_LENGTH] for tag in parser.hashtags])
-                or None
+            content, hashtags = cls.local_content_and_hashtags(
+                content, raw_prepend_content, raw_append_content
             )
             post_obj = {
                 "author": author,
@@ -1281,14 +1278,129 @@ class Post(models.Model):
                 if type_data:
                     post.type_data = type_data
                 post.save()
-            # Recalculate parent stats for replies
+            # Update parent stats for replies
             if reply_to:
-                reply_to.calculate_stats()
+                cls.increment_stats(cls.objects.filter(pk=reply_to.pk), replies=1)
             if post.state == "fanned_out":
                 # add post to auther's timeline directly if it's old
                 post.add_to_timeline(author)
         return post
 
+    @classmethod
+    def local_content_and_hashtags(
+        cls, content: str, raw_prepend_content: str, raw_append_content: str
+    ) -> tuple[str, list[str] | None]:
+        """
+        Strip all unwanted HTML and apply linebreaks filter, grabbing hashtags on the way
+        """
+        parser = FediverseHtmlParser(linebreaks_filter(content), find_hashtags=True)
+        html = (
+            parser.html.replace("<p>", "<p>" + raw_prepend_content, 1)
+            + raw_append_content
+        )
+        hashtags = (
+            sorted([tag[: Hashtag.MAXIMUM_LENGTH] for tag in parser.hashtags]) or None
+        )
+        return html, hashtags
+
+    @classmethod
+    def build_local_backdated(
+        cls,
+        author: Identity,
+        content: str,
+        raw_prepend_content: str,
+        raw_append_content: str,
+        summary: str | None = None,
+        sensitive: bool = False,
+        visibility: int = Visibilities.public,
+        type_data: dict | None = None,
+        published: datetime.datetime | None = None,
+        edited: datetime.datetime | None = None,
+        language: str = "",
+    ) -> "tuple[Post, set[Identity], list[str]]":
+        """
+        Build an unsaved local Post published beyond FANOUT_LIMIT_DAYS ago, with
+        its mentions and emoji shortcodes, to be saved by bulk_create_local()
+        """
+        if not published or timezone.now() - published <= datetime.timedelta(
+            days=settings.FANOUT_LIMIT_DAYS
+        ):
+            raise ValueError("Only posts published long ago can be built in bulk")
+        mentions = cls.mentions_from_content(content, author)
+        emojis = FediverseHtmlParser(content, find_emojis=True).emojis
+        html, hashtags = cls.local_content_and_hashtags(
+            content, raw_prepend_content, raw_append_content
+        )
+        post = cls(
+            id=Snowflake.generate_post_at(published.timestamp()),
+            author=author,
+            content=html,
+            summary=summary or None,
+            sensitive=bool(summary) or sensitive,
+            local=True,
+            visibility=visibility,
+            hashtags=hashtags,
+            language=language,
+            type_data=type_data or None,
+            published=published,
+            edited=edited,
+            state="fanned_out",  # add post quietly since it's old
+        )
+        post.object_uri = post.urls.object_uri
+        post.url = post.absolute_object_uri()
+        return post, mentions, sorted(set(emojis))
+
+    @classmethod
+    def bulk_create_local(
+        cls, built: "list[tuple[Post, set[Identity], list[str]]]"
+    ) -> "list[Post]":
+        """
+        Save Posts from build_local_backdated() with their mentions, emojis and
+        events on authors' timeline, in a fixed number of queries
+        """
+        if not built:
+            return []
+        shortcodes = {code for _, _, codes in built for code in codes}
+        emojis = (
+            {
+                e.shortcode: e
+                for e in Emoji.objects.filter(local=True, shortcode__in=shortcodes)
+            }
+            if shortcodes
+            else {}
+        )
+        posts = [post for post, _, _ in built]
+        with transaction.atomic(using="takahe"):
+            cls.objects.bulk_create(posts)
+            cls.mentions.through.objects.bulk_create(
+                [
+                    cls.mentions.through(post_id=post.pk, identity_id=identity.pk)
+                    for post, mentions, _ in built
+                    for identity in mentions
+                ]
+            )
+            cls.emojis.through.objects.bulk_create(
+                [
+                    cls.emojis.through(post_id=post.pk, emoji_id=emojis[code].pk)
+                    for post, _, codes in built
+                    for code in codes
+                    if code in emojis
+                ]
+            )
+            TimelineEvent.objects.bulk_create(
+                [
+                    TimelineEvent(
+                        identity=post.author,
+                        type=TimelineEvent.Types.post,
+                        subject_post=post,
+                        subject_identity=post.author,
+                        published=post.published,
+                    )
+                    for post in posts
+                ]
+            )
+        return posts
+
     def edit_local(
         self,
         content: str,
@@ -1386,6 +1498,87 @@ class Post(models.Model):
         if save:
             self.save()
 
+    @classmethod
+    def increment_stats(cls, posts: "models.QuerySet[Post]", **deltas: int):
+        """
+        Atomically add deltas to counters in stats of posts, e.g. likes=1 or replies=-1,
+        stats never calculated before are recalculated in full instead
+        """
+        deltas = {k: v for k, v in deltas.items() if v}
+        if not deltas:
+            return
+        rows = list(posts.values_list("pk", "stats"))
+        if not rows:
+            return
+        pks = [pk for pk, _ in rows]
+        recalculated = [pk for pk, stats in rows if stats is None]
+        for post in cls.objects.filter(pk__in=recalculated):
+            post.calculate_stats(save=False)
+            post.save(update_fields=["stats"])
+        counters = ", ".join(
+            ["%s, GREATEST(COALESCE((stats->>%s)::int, 0) + %s, 0)"] * len(deltas)
+        )
+        cls.objects.filter(pk__in=pks, stats__isnull=False).exclude(
+            pk__in=recalculated
+        ).update(
+            stats=models.expressions.RawSQL(
+                f"stats || jsonb_build_object({counters})",
+                [x for k, v in deltas.items() for x in (k, k, v)],
+                output_field=models.JSONField(),
+            )
+        )
+        cls.add_stats_changed(pks)
+
+    @staticmethod
+    def add_stats_changed(post_pks: list[int]):
+        """remember posts with stats changed incrementally, to be reconciled later"""
+        get_redis_connection("default").sadd(_STATS_CHANGED_KEY, *post_pks)
+
+    @staticmethod
+    def pop_stats_changed(count: int) -> list[int]:
+        ids = get_redis_connection("default").spop(_STATS_CHANGED_KEY, count)
+        return [int(i) for i in ids or []]
+
+    @classmethod
+    def reconcile_stats(cls, posts: "list[Post]") -> int:
+        """
+        Recalculate stats for posts in a fixed number of queries, to repair drift of
+        counters maintained by increment_stats(); return number of posts updated
+        """
+        from .models import PostInteraction
+
+        active = ["new", "fanned_out"]
+        counts = {p.pk: {"likes": 0, "boosts": 0, "replies": 0} for p in posts}
+        for post_id, typ, n in (
+            PostInteraction.objects.filter(
+                post__in=posts,
+                state__in=active,
+                type__in=[PostInteraction.Types.like, PostInteraction.Types.boost],
+            )
+            .values("post_id", "type")
+            .annotate(n=models.Count("id"))
+            .values_list("post_id", "type", "n")
+        ):
+            counts[post_id][typ + "s"] = n
+        pks_by_uri = {p.object_uri: p.pk for p in posts if p.object_uri}
+        for uri, n in (
+            cls.objects.filter(in_reply_to__in=pks_by_uri.keys())
+            .exclude(state__in=["deleted", "deleted_fanned_out"])
+            .values("in_reply_to")
+            .annotate(n=models.Count("id"))
+            .values_list("in_reply_to", "n")
+        ):
+            counts[pks_by_uri[uri]]["replies"] = n
+        changed = []
+        for post in posts:
+            stats = dict(post.stats or {})
+            stats.update(counts[post.pk])
+            if stats != post.stats:
+                post.stats = stats
+                changed.append(post)
+        cls.objects.bulk_update(changed, ["stats"])
+        return len(changed)
+
     @property
     def safe_content_local(self):
         return ContentRenderer(local=True).render_post(self.content, self)
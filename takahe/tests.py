@@ -1 +1,51 @@
-# Create your tests here.
+from django.test import TestCase
+
+from users.models import User
+
+from .jobs import PostStatsReconciler
+from .models import Post
+from .utils import Takahe
+
+
+class PostStatsTest(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.user1 = User.register(email="a@b.com", username="user1")
+        self.user2 = User.register(email="x@y.com", username="user2")
+
+    def stats(self, post: Post):
+        post.refresh_from_db()
+        return post.stats_with_defaults
+
+    def test_increment_stats(self):
+        i1, i2 = self.user1.identity.pk, self.user2.identity.pk
+        post = Takahe.post(i1, "hello", Takahe.Visibilities.public)
+        assert post
+        Takahe.like_post(post.pk, i2)
+        Takahe.like_post(post.pk, i2)
+        Takahe.boost_post(post.pk, i1)
+        self.assertEqual(self.stats(post), {"likes": 1, "boosts": 1, "replies": 0})
+        Takahe.unlike_post(post.pk, i2)
+        Takahe.boost_post(post.pk, i1)
+        self.assertEqual(self.stats(post), {"likes": 0, "boosts": 0, "replies": 0})
+        reply = Takahe.reply_post(post.pk, i2, "hi", Takahe.Visibilities.public)
+        Takahe.reply_post(post.pk, i1, "hey", Takahe.Visibilities.public)
+        self.assertEqual(self.stats(post)["replies"], 2)
+        Takahe.delete_posts([reply.pk])  # type:ignore
+        Takahe.delete_posts([reply.pk])  # type:ignore
+        self.assertEqual(self.stats(post)["replies"], 1)
+
+    def test_reconcile_stats(self):
+        i1, i2 = self.user1.identity.pk, self.user2.identity.pk
+        post = Takahe.post(i1, "hello", Takahe.Visibilities.public)
+        assert post
+        Takahe.like_post(post.pk, i2)
+        Takahe.reply_post(post.pk, i2, "hi", Takahe.Visibilities.public)
+        Post.objects.filter(pk=post.pk).update(stats={"likes": 5})
+        PostStatsReconciler().run()
+        self.assertEqual(self.stats(post), {"likes": 1, "boosts": 0, "replies": 1})
+        # only posts with stats changed since last run are reconciled
+        Post.objects.filter(pk=post.pk).update(stats={"likes": 5})
+        PostStatsReconciler().run()
+        self.assertEqual(self.stats(post)["likes"], 5)
@@ -1,12 +1,16 @@
 import io
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import timedelta
-from typing import TYPE_CHECKING
+from functools import wraps
+from typing import TYPE_CHECKING, Callable
 
 import blurhash
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.images import ImageFile
 from django.core.signing import b62_encode
+from django.db import transaction
 from django.db.models import Count
 from django.utils import timezone
 from loguru import logger
@@ -17,6 +21,63 @@ from .models import *
 if TYPE_CHECKING:
     from users.models import User as NeoUser
 
+# follow/block/mute states may also be changed by stator or remote servers,
+# so relationships are only cached in redis for a short while
+_RELATIONSHIP_CACHE_TTL = 60
+_RELATIONSHIP_KINDS = [
+    "following",
+    "follower",
+    "following_request",
+    "requested_follower",
+    "muting",
+    "blocking",
+    "rejecting",
+]
+_request_relationship_cache: ContextVar[dict | None] = ContextVar(
+    "request_relationship_cache", default=None
+)
+_POST_BATCH_SIZE = 500
+
+
+class _PostBatch:
+    """posts built by Takahe.post() in bulk mode, pending to be saved"""
+
+    def __init__(self):
+        self.posts: dict[int, tuple] = {}
+        self.identities: dict[int, Identity] = {}
+
+
+_post_batch: ContextVar[_PostBatch | None] = ContextVar("post_batch", default=None)
+# pks of posts created by Takahe.post() in recording_new_posts() scope
+_new_posts: ContextVar[list[int] | None] = ContextVar("new_posts", default=None)
+
+
+def _relationship_cache_key(kind: str, identity_pk: int) -> str:
+    return f"takahe_rel:{kind}:{identity_pk}"
+
+
+def _cached_relationship(kind: str):
+    """cache id list of a relationship in redis and in current request"""
+
+    def decorator(func: Callable[[int], list[int]]):
+        @wraps(func)
+        def wrapper(identity_pk: int) -> list[int]:
+            key = _relationship_cache_key(kind, identity_pk)
+            local = _request_relationship_cache.get()
+            if local is not None and key in local:
+                return list(local[key])
+            ids = cache.get(key)
+            if ids is None:
+                ids = func(identity_pk)
+                cache.set(key, ids, timeout=_RELATIONSHIP_CACHE_TTL)
+            if local is not None:
+                local[key] = ids
+            return list(ids)
+
+        return wrapper
+
+    return decorator
+
 
 class Takahe:
     Visibilities = Post.Visibilities
@@ -223,6 +284,7 @@ class Takahe:
         ).exists()
 
     @staticmethod
+    @_cached_relationship("following")
     def get_following_ids(identity_pk: int):
         targets = Follow.objects.filter(
             source_id=identity_pk, state="accepted"
@@ -230,6 +292,7 @@ class Takahe:
         return list(targets)
 
     @staticmethod
+    @_cached_relationship("follower")
     def get_follower_ids(identity_pk: int):
         targets = Follow.objects.filter(
             target_id=identity_pk, state="accepted"
@@ -237,6 +300,7 @@ class Takahe:
         return list(targets)
 
     @staticmethod
+    @_cached_relationship("following_request")
     def get_following_request_ids(identity_pk: int):
         targets = Follow.objects.filter(
             source_id=identity_pk, state__in=["unrequested", "pending_approval"]
@@ -244,12 +308,36 @@ class Takahe:
         return list(targets)
 
     @staticmethod
+    @_cached_relationship("requested_follower")
     def get_requested_follower_ids(identity_pk: int):
         targets = Follow.objects.filter(
             target_id=identity_pk, state="pending_approval"
         ).values_list("source", flat=True)
         return list(targets)
 
+    @staticmethod
+    @contextmanager
+    def relationship_cache_scope():
+        """reuse relationship id lists within this scope, e.g. a request"""
+        token = _request_relationship_cache.set({})
+        try:
+            yield
+        finally:
+            _request_relationship_cache.reset(token)
+
+    @staticmethod
+    def invalidate_relationships(*identity_pks: int):
+        keys = [
+            _relationship_cache_key(kind, pk)
+            for pk in identity_pks
+            for kind in _RELATIONSHIP_KINDS
+        ]
+        cache.delete_many(keys)
+        local = _request_relationship_cache.get()
+        if local is not None:
+            for k in keys:
+                local.pop(k, None)
+
     @staticmethod
     def update_follow_state(
         source_pk: int, target_pk: int, from_states: list[str], to_state: str
@@ -262,6 +350,7 @@ class Takahe:
         ):
             follow.state = to_state
             follow.save()
+            Takahe.invalidate_relationships(source_pk, target_pk)
         return follow
 
     @staticmethod
@@ -282,6 +371,7 @@ class Takahe:
             )
             follow.uri = source.actor_uri + f"follow/{follow.pk}/"
             follow.save()
+        Takahe.invalidate_relationships(source_pk, target_pk)
 
     @staticmethod
     def unfollow(source_pk: int, target_pk: int):
@@ -303,6 +393,7 @@ class Takahe:
         Takahe.update_follow_state(source_pk, target_pk, [], "rejecting")
 
     @staticmethod
+    @_cached_relationship("muting")
     def get_muting_ids(identity_pk: int) -> list[int]:
         targets = Block.objects.filter(
             source_id=identity_pk,
@@ -312,6 +403,7 @@ class Takahe:
         return list(targets)
 
     @staticmethod
+    @_cached_relationship("blocking")
     def get_blocking_ids(identity_pk: int) -> list[int]:
         targets = Block.objects.filter(
             source_id=identity_pk,
@@ -321,6 +413,7 @@ class Takahe:
         return list(targets)
 
     @staticmethod
+    @_cached_relationship("rejecting")
     def get_rejecting_ids(identity_pk: int) -> list[int]:
         pks1 = Block.objects.filter(
             source_id=identity_pk,
@@ -353,13 +446,15 @@ class Takahe:
             if not is_mute:
                 Takahe.unfollow(source_pk, target_pk)
                 Takahe.reject_follow_request(target_pk, source_pk)
-            return block
+        Takahe.invalidate_relationships(source_pk, target_pk)
+        return block
 
     @staticmethod
     def undo_block_or_mute(source_pk: int, target_pk: int, is_mute: bool):
         Block.objects.filter(
             source_id=source_pk, target_id=target_pk, mute=is_mute
         ).update(state="undone")
+        Takahe.invalidate_relationships(source_pk, target_pk)
 
     @staticmethod
     def block(source_pk: int, target_pk: int):
@@ -379,12 +474,17 @@ class Takahe:
 
     @staticmethod
     def _force_state_cycle():  # for unit testing only
+        pks = set()
+        for m in [Follow, Block]:
+            for source_pk, target_pk in m.objects.values_list("source_id", "target_id"):
+                pks.update([source_pk, target_pk])
         Follow.objects.filter(
             state__in=["rejecting", "undone", "pending_removal"]
         ).delete()
         Follow.objects.all().update(state="accepted")
         Block.objects.filter(state="new").update(state="sent")
         Block.objects.exclude(state="sent").delete()
+        Takahe.invalidate_relationships(*pks)
 
     @staticmethod
     def upload_image(
@@ -434,6 +534,38 @@ class Takahe:
         attachments: list | None = None,
         language: str = "",
     ) -> Post | None:
+        batch = _post_batch.get()
+        if batch is not None:
+            if (
+                not post_pk
+                and not reply_to_pk
+                and not attachments
+                and post_time
+                and timezone.now() - post_time
+                > timedelta(days=settings.FANOUT_LIMIT_DAYS)
+            ):
+                if len(batch.posts) >= _POST_BATCH_SIZE:
+                    Takahe.flush_posts()
+                if author_pk not in batch.identities:
+                    batch.identities[author_pk] = Identity.objects.get(pk=author_pk)
+                built = Post.build_local_backdated(
+                    batch.identities[author_pk],
+                    content,
+                    prepend_content,
+                    append_content,
+                    summary,
+                    sensitive,
+                    visibility=visibility,
+                    type_data=data,
+                    published=post_time,
+                    edited=edit_time,
+                    language=language,
+                )
+                batch.posts[built[0].pk] = built
+                Takahe._record_new_post(built[0].pk)
+                return built[0]
+            # make sure posts to be edited or replied to are saved
+            Takahe.flush_posts()
         identity = Identity.objects.get(pk=author_pk)
         post = (
             Post.objects.filter(author=identity, pk=post_pk).first()
@@ -484,14 +616,102 @@ class Takahe:
                 subject_identity=identity,
                 defaults={"published": post_time or timezone.now()},
             )
+            Takahe._record_new_post(post.pk)
         return post
 
+    @staticmethod
+    def _record_new_post(post_pk: int):
+        new_posts = _new_posts.get()
+        if new_posts is not None:
+            new_posts.append(post_pk)
+
+    @staticmethod
+    @contextmanager
+    def recording_new_posts():
+        """collect pks of posts created by Takahe.post() in this scope"""
+        new_posts = []
+        token = _new_posts.set(new_posts)
+        try:
+            yield new_posts
+        finally:
+            _new_posts.reset(token)
+
+    @staticmethod
+    def discard_posts(post_pks: list[int]):
+        """drop posts pending in bulk_posting() scope, delete others"""
+        batch = _post_batch.get()
+        saved = [pk for pk in post_pks if not (batch and batch.posts.pop(pk, None))]
+        if saved:
+            Takahe.delete_posts(saved)
+
+    @staticmethod
+    @contextmanager
+    def bulk_posting(discard_on_error: bool = False):
+        """
+        save posts created by Takahe.post() in this scope in batches, e.g. when importing
+
+        only new posts published beyond FANOUT_LIMIT_DAYS ago are batched, since they
+        are not fanned out anyway; pending ones are saved when leaving the scope, or
+        before other posts are created or edited. Pieces linked to them may have been
+        saved already, so pending posts are saved even if the scope exits with an
+        exception, unless either database is in a failed transaction, or
+        discard_on_error is set because the caller will roll back those pieces.
+        """
+        token = _post_batch.set(_PostBatch())
+        try:
+            yield
+        except BaseException:
+            if discard_on_error:
+                logger.warning("pending posts discarded")
+            elif (
+                transaction.get_connection().needs_rollback
+                or transaction.get_connection("takahe").needs_rollback
+            ):
+                logger.error("unable to save pending posts in failed transaction")
+            else:
+                try:
+                    Takahe.flush_posts()
+                except Exception:
+                    logger.exception("unable to save pending posts")
+            raise
+        else:
+            Takahe.flush_posts()
+        finally:
+            _post_batch.reset(token)
+
+    @staticmethod
+    def flush_posts():
+        """save pending posts in bulk_posting() scope, and index pieces linked to them"""
+        from journal.models import PiecePost, enqueue_index_pieces
+
+        batch = _post_batch.get()
+        if batch and batch.posts:
+            built = list(batch.posts.values())
+            batch.posts.clear()
+            posts = Post.bulk_create_local(built)
+            # pieces were indexed before their posts are saved
+            enqueue_index_pieces(
+                list(
+                    PiecePost.objects.filter(
+                        post_id__in=[p.pk for p in posts]
+                    ).values_list("piece_id", flat=True)
+                )
+            )
+
+    @staticmethod
+    def _flush_if_pending(post_pks) -> None:
+        batch = _post_batch.get()
+        if batch and any(pk in batch.posts for pk in post_pks):
+            Takahe.flush_posts()
+
     @staticmethod
     def get_post(post_pk: int) -> Post | None:
+        Takahe._flush_if_pending([post_pk])
         return Post.objects.filter(pk=post_pk).first()
 
     @staticmethod
     def get_posts(post_pks: list[int]):
+        Takahe._flush_if_pending(post_pks)
         return (
             Post.objects.filter(pk__in=post_pks)
             .exclude(state__in=["deleted", "deleted_fanned_out"])
@@ -505,22 +725,24 @@ class Takahe:
 
     @staticmethod
     def update_post(post_pk, **kwargs):
+        Takahe._flush_if_pending([post_pk])
         Post.objects.filter(pk=post_pk).update(**kwargs)
 
     @staticmethod
     def delete_posts(post_pks):
-        parent_posts = list(
-            Post.objects.filter(
-                object_uri__in=Post.objects.filter(
-                    pk__in=post_pks, in_reply_to__isnull=False
-                )
-                .distinct("in_reply_to")
-                .values_list("in_reply_to", flat=True)
-            )
+        Takahe._flush_if_pending(post_pks)
+        replies = dict(
+            Post.objects.filter(pk__in=post_pks, in_reply_to__isnull=False)
+            .exclude(state__in=["deleted", "deleted_fanned_out"])
+            .values("in_reply_to")
+            .annotate(n=Count("id"))
+            .values_list("in_reply_to", "n")
+        )
+        Post.objects.filter(pk__in=post_pks).update(
+            state="deleted", state_changed=timezone.now()
         )
-        Post.objects.filter(pk__in=post_pks).update(state="deleted")
-        for post in parent_posts:
-            post.calculate_stats()
+        for uri, n in replies.items():
+            Post.increment_stats(Post.objects.filter(object_uri=uri), replies=-n)
         # TimelineEvent.objects.filter(subject_post__in=[post.pk]).delete()
         PostInteraction.objects.filter(post__in=post_pks).update(state="undone")
 
@@ -562,27 +784,40 @@ class Takahe:
             identity_id=identity_pk,
             post=post,
         )
+        delta = 1 if created else 0
         if flip and not created:
+            if interaction.state in ["new", "fanned_out"]:
+                delta = -1
             Takahe.update_state(interaction, "undone")
         elif interaction.state not in ["new", "fanned_out"]:
+            delta = 1
             Takahe.update_state(interaction, "new")
-        post.calculate_stats()
+        Takahe._increment_interaction_stats(post_pk, type, delta)
         return interaction
 
+    @staticmethod
+    def _increment_interaction_stats(post_pk: int, type: str, delta: int):
+        counter = {"like": "likes", "boost": "boosts"}.get(type)
+        if counter:
+            Post.increment_stats(Post.objects.filter(pk=post_pk), **{counter: delta})
+
     @staticmethod
     def uninteract_post(post_pk: int, identity_pk: int, type: str):
         post = Post.objects.filter(pk=post_pk).first()
         if not post:
             logger.warning(f"Cannot find post {post_pk}")
             return
+        delta = 0
         for interaction in PostInteraction.objects.filter(
             type=type,
             identity_id=identity_pk,
             post=post,
         ):
+            if interaction.state in ["new", "fanned_out"]:
+                delta -= 1
             interaction.state = "undone"
             interaction.save()
-        post.calculate_stats()
+        Takahe._increment_interaction_stats(post_pk, type, delta)
 
     @staticmethod
     def reply_post(
@@ -928,4 +1163,5 @@ class Takahe:
 
     @staticmethod
     def bookmark(post_pk: int, identity_pk: int):
+        Takahe._flush_if_pending([post_pk])
         Bookmark.objects.get_or_create(post_id=post_pk, identity_id=identity_pk)
@@ -4,6 +4,8 @@ from django.conf import settings
 from django.middleware.locale import LocaleMiddleware
 from django.utils import translation
 
+from takahe.utils import Takahe
+
 if TYPE_CHECKING:
     from users.models import User
 
@@ -29,3 +31,14 @@ class LanguageMiddleware(LocaleMiddleware):
     def process_request(self, request):
         user = getattr(request, "user", None)
         activate_language_for_user(user, request)
+
+
+class RelationshipCacheMiddleware:
+    """reuse follow/block/mute id lists of identities within a request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with Takahe.relationship_cache_scope():
+            return self.get_response(request)
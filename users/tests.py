@@ -72,6 +72,21 @@ class UserTest(TestCase):
         self.assertEqual(self.alice.rejecting, [])
         self.assertEqual(self.alice.ignoring, [])
 
+    def test_relationship_cache(self):
+        self.assertEqual(self.alice.following, [])
+        with Takahe.relationship_cache_scope():
+            self.alice.follow(self.bob, True)
+            self.assertEqual(self.alice.following, [self.bob.pk])
+            self.assertEqual(self.bob.followers, [self.alice.pk])
+            with self.assertNumQueries(0, using="takahe"):
+                self.assertEqual(self.alice.following, [self.bob.pk])
+                self.assertEqual(self.bob.followers, [self.alice.pk])
+            self.alice.block(self.bob)
+            self.assertEqual(self.alice.following, [])
+            self.assertEqual(self.bob.rejecting, [self.alice.pk])
+        self.assertEqual(self.alice.following, [])
+        self.assertEqual(self.alice.blocking, [self.bob.pk])
+
     # def test_external_domain_block(self):
     #     self.alice.mastodon_domain_blocks.append(self.bob.mastodon_site)
     #     self.alice.save()